@@ -5,3 +5,15 @@ __email__ = "hrishikesh.ram@nist.gov"
 __version__ = "0.0.0"
 
 from dft_toolbox.utilities import *
+from dft_toolbox.gaussian_log import *
+from dft_toolbox.cache import *
+from dft_toolbox.batch import *
+from dft_toolbox.campaign import *
+from dft_toolbox.jobs import *
+from dft_toolbox.monitor import *
+from dft_toolbox.scheduler import *
+from dft_toolbox.policy import *
+from dft_toolbox.geometry import *
+from dft_toolbox.ragged import *
+from dft_toolbox.templating import *
+from dft_toolbox.thermo import *
@@ -1,7 +1,8 @@
-
 import os
 import subprocess
 import argparse
+import asyncio
+import signal
 
 def get_parser():
     """ Process line arguments
@@ -23,11 +24,59 @@ def get_parser():
         help="Compile the documentation locally. Automatic if the documentation is not yet compiled.",
     )
 
+    subparsers = parser.add_subparsers(dest="command")
+    monitor = subparsers.add_parser(
+        "monitor",
+        help="Poll SLURM and the job log directories, and serve the Running / Oscillating / Complete / Failed status of the jobs as JSON over HTTP.",
+    )
+    monitor.add_argument("username", help="Your userID on HPC cluster.")
+    monitor.add_argument("directories", nargs="*", default=["."], help="Directories of the SLURM output logs, default is the current directory.")
+    monitor.add_argument("--interval", type=float, default=60, help="Time (s) between polls, default is 60.")
+    monitor.add_argument("--host", default="127.0.0.1", help="Address on which to listen, default is 127.0.0.1.")
+    monitor.add_argument("--port", type=int, default=8765, help="Port on which to listen, default is 8765.")
+    monitor.add_argument("--socket", default=None, help="Path of a Unix socket on which to listen instead of --host and --port.")
+    monitor.add_argument("--output-prefix", default="outputlog", help="Prefix of the SLURM output logs, default is 'outputlog'.")
+    monitor.add_argument("--error-prefix", default="errorlog", help="Prefix of the SLURM error logs, default is 'errorlog'. Use 'none' to classify finished jobs with sacct.")
+    monitor.add_argument("--state-file", default=None, help="Path of the state file of the oscillation detector.")
+    monitor.add_argument("--n-points", type=int, default=5, help="Number of step sizes scaled to 0.000 before a job is flagged as oscillating, default is 5.")
+
     return parser
 
-parser = get_parser()
-args = parser.parse_args()
-path=os.sep.join(os.path.dirname(__file__).split(os.sep)[:-1])
-os.chmod('{}{}docs{}run.sh'.format(path,os.sep,os.sep), 0o755)
-subprocess.check_call("{}{}docs{}run.sh {} {}".format(path,os.sep,os.sep,args.docs,args.compile_docs), shell=True)
 
+def run_monitor(args):
+    """ Run the job monitoring service until interrupted
+    """
+    from dft_toolbox.monitor import MonitorService
+
+    service = MonitorService(
+        args.username,
+        args.directories,
+        interval=args.interval,
+        output_prefix=args.output_prefix,
+        error_prefix=None if args.error_prefix.lower() == "none" else args.error_prefix,
+        state_file=args.state_file,
+        n_points=args.n_points,
+    )
+
+    async def serve():
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, service.stop)
+        await service.run(host=args.host, port=args.port, socket_path=args.socket)
+
+    asyncio.run(serve())
+
+
+def main():
+    parser = get_parser()
+    args = parser.parse_args()
+    if args.command == "monitor":
+        run_monitor(args)
+        return
+    path=os.sep.join(os.path.dirname(__file__).split(os.sep)[:-1])
+    os.chmod('{}{}docs{}run.sh'.format(path,os.sep,os.sep), 0o755)
+    subprocess.check_call("{}{}docs{}run.sh {} {}".format(path,os.sep,os.sep,args.docs,args.compile_docs), shell=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Parallel parsing of many Gaussian output files, and batch generation of the inputs that depend on them.
+"""
+
+import concurrent.futures
+import os
+import traceback
+
+import dft_toolbox.cache as cache
+from dft_toolbox import utilities
+from dft_toolbox.gaussian_log import GaussianLog
+
+log_fields = ["extract_coordinates", "distances", "frequencies", "nbo_charges", "dGSolvPCM", "multipole_moments"]
+
+
+def parse_logs(paths, fields=("dGSolvPCM",), workers=None, backend="process"):
+    """
+    Extract the same quantities from many Gaussian .log/.out files in parallel.
+
+    Each file is indexed once with ``GaussianLog`` and every requested field is extracted from that index. If the parse cache is enabled (see ``enable_parse_cache``), the extractors read from and fill the cache in every worker instead.
+
+    Parameters
+    ----------
+    paths : list
+        Paths of the .log/.out files to parse.
+    fields : list, Optional, default=("dGSolvPCM",)
+        Quantities to extract from each file. Entries are either the name of an extractor of this package, one of ``log_fields``, or a function that takes a path or ``GaussianLog`` as the only argument (a module level function if ``backend="process"``).
+    workers : int, Optional, default=None
+        Number of worker processes or threads. By default, the number of CPUs is used. If 1, files are parsed serially in this process.
+    backend : str, Optional, default="process"
+        Either "process" or "thread". Processes are best for parsing, which is limited by Python execution, while threads avoid the start up cost for a small number of files.
+
+    Returns
+    -------
+    results : list
+        A list of the same length and order as ``paths``, each entry being a dictionary of field name to value, or None if parsing of that file failed.
+    errors : dict
+        Dictionary of the index in ``paths`` of each failed file to the formatted traceback of the error.
+    """
+    if backend not in ("process", "thread"):
+        raise ValueError("The backend, {}, should be either 'process' or 'thread'.".format(backend))
+    fields = list(fields)
+    for field in fields:
+        if not callable(field) and field not in log_fields:
+            raise ValueError("Field {} is not supported, choose from: {}".format(field, ", ".join(log_fields)))
+    paths = list(paths)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    results = [None] * len(paths)
+    errors = {}
+    if workers == 1 or len(paths) <= 1:
+        outputs = map(_parse_log, paths, [fields] * len(paths))
+        return _collect(outputs, results, errors)
+
+    if backend == "process":
+        active = cache._active_cache
+        settings = None if active is None else (active.cache_dir, active.max_size, active.use_hash)
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(settings,))
+        chunksize = max(1, len(paths) // (4 * workers))
+    else:
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+        chunksize = 1
+    with executor:
+        outputs = executor.map(_parse_log, paths, [fields] * len(paths), chunksize=chunksize)
+        return _collect(outputs, results, errors)
+
+
+def _collect(outputs, results, errors):
+    """Place the (values, error) output of each file in ``results`` or ``errors``."""
+    for i, (values, error) in enumerate(outputs):
+        if error is None:
+            results[i] = values
+        else:
+            errors[i] = error
+    return results, errors
+
+
+def _init_worker(settings):
+    """Enable the parse cache of the parent process in a worker process."""
+    if settings is not None:
+        cache.enable_parse_cache(*settings)
+
+
+def _parse_log(path, fields):
+    """Extract ``fields`` from one file, returning the dictionary of values and None, or None and the traceback of the error."""
+    try:
+        if cache._active_cache is not None:
+            if not os.path.isfile(path):
+                raise FileNotFoundError("Could not locate the file {}.".format(path))
+            source = path
+        else:
+            source = GaussianLog(path)
+        values = {}
+        for field in fields:
+            if callable(field):
+                values[getattr(field, "__name__", repr(field))] = field(source)
+            else:
+                values[field] = getattr(utilities, field)(source)
+        return values, None
+    except Exception:
+        return None, traceback.format_exc()
+
+
+def create_arkane_inputs(species_specs, workers=None, backend="process", kwargs_lot={}):
+    """
+    Create the Arkane species files and the "input.py" file of many species at once, see ``create_arkane_input``.
+
+    The symmetry numbers of all frequency calculations are extracted in parallel with ``parse_logs``, searching each file backwards from its end, and "input.py" is written once with the header of ``write_arkane_input_header`` followed by the ``species(...)`` and ``thermo(...)`` entries of every species, replacing any existing file. The files are generated in the directory within which this function is run.
+
+    Parameters
+    ----------
+    species_specs : list
+        A list of dictionaries of the arguments of ``create_arkane_input`` for each species, besides ``kwargs_lot``, e.g., ``{"name": "sim1", "freq_log": "sim1_gas.log", "pcm_log": "sim1_PCM.log"}``.
+    workers : int, Optional, default=None
+        Number of workers, see ``parse_logs``.
+    backend : str, Optional, default="process"
+        Either "process" or "thread", see ``parse_logs``.
+    kwargs_lot : dict, Optional, default={}
+        Keyword arguements for the level of theory specifications in Arkane. See ``write_arkane_input_header`` for options.
+
+    Returns
+    -------
+    names : list
+        Names of the species, in the order of the entries of "input.py".
+    """
+    species_specs = [dict(spec) for spec in species_specs]
+    for spec in species_specs:
+        if "name" not in spec or "freq_log" not in spec:
+            raise ValueError("Each species specification should include a name and a freq_log, given: {}".format(spec))
+    names = [spec["name"] for spec in species_specs]
+    if len(set(names)) != len(names):
+        raise ValueError("The names of the species are not unique.")
+
+    results, errors = parse_logs([spec["freq_log"] for spec in species_specs], fields=[_symmetry_number], workers=workers, backend=backend)
+    if errors:
+        i = min(errors)
+        raise ValueError("Could not extract the symmetry number of {} from {}:\n{}".format(names[i], species_specs[i]["freq_log"], errors[i]))
+
+    entries = utilities._arkane_header_lines(**kwargs_lot)
+    for spec, values in zip(species_specs, results):
+        name = spec.pop("name")
+        freq_log = spec.pop("freq_log")
+        with open("{}.py".format(name), "w") as f:
+            f.writelines(utilities._arkane_species_lines(freq_log, values["_symmetry_number"], **spec))
+        entries.extend(utilities._arkane_entry_lines(name))
+    with open("input.py", "w") as f:
+        f.writelines(entries)
+    return names
+
+
+def _symmetry_number(source):
+    """Rotational symmetry number of a path or ``GaussianLog``, see ``GaussianLog.symmetry_number``."""
+    if not isinstance(source, GaussianLog):
+        source = GaussianLog(source)
+    return source.symmetry_number
@@ -0,0 +1,294 @@
+"""
+Opt-in persistent cache of parsed output files.
+
+Parsed values are stored in a single SQLite database as NumPy ``.npz`` blobs (no pickling), keyed by the absolute file path, the parsing function and its arguments. An entry is only used while the file size and modification time, and optionally the content hash, are unchanged, and the least recently used entries are evicted once the database exceeds a size limit.
+"""
+
+import atexit
+import functools
+import hashlib
+import io
+import json
+import numbers
+import os
+import sqlite3
+import threading
+import time
+import weakref
+import numpy as np
+
+_active_cache = None
+# Caches whose pending access times are written at exit, without keeping them alive
+_instances = weakref.WeakSet()
+
+
+class ParseCache:
+    """
+    Size-bounded, least recently used on-disk cache of parsed values.
+
+    Each thread of each process uses its own SQLite connection, so that the cache can be shared by the workers of ``parse_logs`` with either backend.
+
+    Parameters
+    ----------
+    cache_dir : str, Optional, default=None
+        Directory of the cache database, "parse_cache.sqlite". By default, the environment variable ``DFT_TOOLBOX_CACHE_DIR`` is used if set, otherwise "~/.cache/dft_toolbox". Use a directory next to the data to share the cache with other users of the data.
+    max_size : int, Optional, default=1073741824
+        Maximum total size (bytes) of the stored values, beyond which the least recently used entries are removed.
+    use_hash : bool, Optional, default=False
+        If True, the BLAKE2 hash of the file content is also checked before an entry is used. This requires reading each file, but protects against file systems with unreliable modification times.
+    """
+
+    def __init__(self, cache_dir=None, max_size=1 << 30, use_hash=False):
+        if cache_dir is None:
+            cache_dir = os.environ.get("DFT_TOOLBOX_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "dft_toolbox"))
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+        self.filename = os.path.join(cache_dir, "parse_cache.sqlite")
+        self.max_size = max_size
+        self.use_hash = use_hash
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pid = None
+        self._accessed = {}
+        _instances.add(self)
+
+    def __repr__(self):
+        return "{}({!r})".format(type(self).__name__, self.filename)
+
+    @property
+    def connection(self):
+        """SQLite connection of the current thread and process, reopened after a fork."""
+        pid = os.getpid()
+        with self._lock:
+            if self._pid != pid:
+                # Access times pending in the parent are written by the parent
+                self._pid = pid
+                self._accessed = {}
+        if getattr(self._local, "pid", None) != pid:
+            connection = sqlite3.connect(self.filename, timeout=60)
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries (path TEXT, name TEXT, size INTEGER, mtime INTEGER, hash TEXT, "
+                "value BLOB, nbytes INTEGER, last_access REAL, PRIMARY KEY (path, name))"
+            )
+            connection.commit()
+            self._local.connection = connection
+            self._local.pid = pid
+        return self._local.connection
+
+    def _signature(self, path):
+        """Size, modification time and (optional) content hash of ``path``."""
+        stat = os.stat(path)
+        digest = ""
+        if self.use_hash:
+            h = hashlib.blake2b()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 22), b""):
+                    h.update(chunk)
+            digest = h.hexdigest()
+        return stat.st_size, stat.st_mtime_ns, digest
+
+    def get(self, path, name):
+        """
+        Retrieve a stored value.
+
+        Parameters
+        ----------
+        path : str
+            Path of the parsed file.
+        name : str
+            Name of the parsed quantity, including any arguments that change its value.
+
+        Returns
+        -------
+        found : bool
+            True if a valid entry was found.
+        value : object
+            The stored value, None if not found.
+        """
+        path = os.path.abspath(path)
+        row = self.connection.execute("SELECT size, mtime, hash, value FROM entries WHERE path=? AND name=?", (path, name)).fetchone()
+        if row is None:
+            return False, None
+        if tuple(row[:3]) != self._signature(path):
+            self.connection.execute("DELETE FROM entries WHERE path=? AND name=?", (path, name))
+            self.connection.commit()
+            return False, None
+        # Access times are written in batches, so that a warm run doesn't commit on every read
+        with self._lock:
+            self._accessed[(path, name)] = time.time()
+            pending = len(self._accessed)
+        if pending >= 1024:
+            self.flush()
+        return True, _decode(row[3])
+
+    def flush(self):
+        """Write the pending access times of the entries read by this process, used for the least recently used eviction."""
+        with self._lock:
+            if not self._accessed or self._pid != os.getpid():
+                return
+            accessed, self._accessed = self._accessed, {}
+        self.connection.executemany("UPDATE entries SET last_access=? WHERE path=? AND name=?", [(t,) + key for key, t in accessed.items()])
+        self.connection.commit()
+
+    def set(self, path, name, value, signature=None):
+        """
+        Store a value, then evict the least recently used entries if the cache exceeds ``max_size``.
+
+        Parameters
+        ----------
+        path : str
+            Path of the parsed file.
+        name : str
+            Name of the parsed quantity, including any arguments that change its value.
+        value : object
+            Value to store, any nesting of tuples, lists, dicts, NumPy arrays, numbers, strings and None.
+        signature : tuple, Optional, default=None
+            Size, modification time and hash of the file taken before it was parsed, so that a file still being written is parsed again once it changes. By default, the current signature of the file is used.
+        """
+        path = os.path.abspath(path)
+        if signature is None:
+            signature = self._signature(path)
+        blob = _encode(value)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, name) + tuple(signature) + (sqlite3.Binary(blob), len(blob), time.time()),
+        )
+        self.connection.commit()
+        self.evict()
+
+    def evict(self):
+        """Remove the least recently used entries until the total stored size is within ``max_size``."""
+        self.flush()
+        total = self.connection.execute("SELECT COALESCE(SUM(nbytes), 0) FROM entries").fetchone()[0]
+        if total <= self.max_size:
+            return
+        rows = self.connection.execute("SELECT rowid, nbytes FROM entries ORDER BY last_access").fetchall()
+        remove = []
+        for rowid, nbytes in rows:
+            if total <= self.max_size:
+                break
+            remove.append((rowid,))
+            total -= nbytes
+        self.connection.executemany("DELETE FROM entries WHERE rowid=?", remove)
+        self.connection.commit()
+
+    def clear(self):
+        """Remove all entries."""
+        self.connection.execute("DELETE FROM entries")
+        self.connection.commit()
+        self.connection.execute("VACUUM")
+
+
+def enable_parse_cache(cache_dir=None, max_size=1 << 30, use_hash=False):
+    """
+    Turn on the persistent cache used by the parsing functions (e.g., ``extract_coordinates``, ``frequencies``, ``nbo_charges``, ``distances``, ``dGSolvPCM``, and ``calc_thermo_Arkane``).
+
+    Parameters
+    ----------
+    cache_dir : str, Optional, default=None
+        Directory of the cache database, see ``ParseCache``.
+    max_size : int, Optional, default=1073741824
+        Maximum total size (bytes) of the stored values.
+    use_hash : bool, Optional, default=False
+        If True, the content hash of each file is also checked.
+
+    Returns
+    -------
+    cache : ParseCache
+        The active cache.
+    """
+    global _active_cache
+    _active_cache = ParseCache(cache_dir=cache_dir, max_size=max_size, use_hash=use_hash)
+    return _active_cache
+
+
+def disable_parse_cache():
+    """Turn off the persistent cache of the parsing functions. Stored entries are kept on disk."""
+    global _active_cache
+    if _active_cache is not None:
+        _active_cache.flush()
+    _active_cache = None
+
+
+def cached_parser(function):
+    """
+    Decorator of a parsing function whose first argument is a file path, or an object with an ``fname`` attribute, to use the active ``ParseCache``.
+
+    Without an active cache, or for a first argument that isn't an existing file, the function is simply called.
+    """
+
+    @functools.wraps(function)
+    def wrapper(fname, *args, **kwargs):
+        cache = _active_cache
+        path = fname if isinstance(fname, str) else getattr(fname, "fname", None)
+        if cache is None or not isinstance(path, str) or not os.path.isfile(path):
+            return function(fname, *args, **kwargs)
+        name = function.__name__
+        if args or kwargs:
+            name += repr((args, sorted(kwargs.items())))
+        found, value = cache.get(path, name)
+        if not found:
+            # The signature precedes the parse, so that a value parsed from a growing file is stored as stale
+            signature = cache._signature(path)
+            value = function(fname, *args, **kwargs)
+            cache.set(path, name, value, signature=signature)
+        return value
+
+    return wrapper
+
+
+@atexit.register
+def _flush_instances():
+    """Write the pending access times of every cache still in use."""
+    for cache in list(_instances):
+        cache.flush()
+
+
+def _encode(value):
+    """Serialize a nested value into ``.npz`` bytes, with arrays stored natively and the structure as JSON."""
+    arrays = {}
+
+    def pack(obj):
+        if isinstance(obj, np.ndarray):
+            key = "a{}".format(len(arrays))
+            arrays[key] = obj
+            return {"array": key}
+        if isinstance(obj, tuple):
+            return {"tuple": [pack(item) for item in obj]}
+        if isinstance(obj, list):
+            if obj and all(isinstance(item, numbers.Real) and not isinstance(item, bool) for item in obj):
+                return {"number_list": pack(np.array(obj))}
+            return {"list": [pack(item) for item in obj]}
+        if isinstance(obj, dict):
+            return {"dict": [[key, pack(item)] for key, item in obj.items()]}
+        if isinstance(obj, np.generic):
+            obj = obj.item()
+        if obj is not None and not isinstance(obj, (bool, int, float, str)):
+            raise TypeError("Values of type {} can't be cached.".format(type(obj).__name__))
+        return {"value": obj}
+
+    structure = json.dumps(pack(value))
+    buffer = io.BytesIO()
+    np.savez(buffer, __structure__=np.array(structure), **arrays)
+    return buffer.getvalue()
+
+
+def _decode(blob):
+    """Inverse of ``_encode``."""
+    with np.load(io.BytesIO(blob), allow_pickle=False) as data:
+        arrays = {key: data[key] for key in data.files}
+
+    def unpack(obj):
+        if "array" in obj:
+            return arrays[obj["array"]]
+        if "tuple" in obj:
+            return tuple(unpack(item) for item in obj["tuple"])
+        if "number_list" in obj:
+            return unpack(obj["number_list"]).tolist()
+        if "list" in obj:
+            return [unpack(item) for item in obj["list"]]
+        if "dict" in obj:
+            return {key: unpack(item) for key, item in obj["dict"]}
+        return obj["value"]
+
+    return unpack(json.loads(str(arrays.pop("__structure__"))))
@@ -0,0 +1,280 @@
+"""
+Columnar table of the per-structure results of a simulation campaign, written to Parquet or Feather files with pyarrow.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+from dft_toolbox import utilities
+from dft_toolbox.batch import parse_logs
+
+
+class CampaignTable:
+    """
+    Builder of a table with one row per structure, collecting the output of the extractors of this package into typed columns.
+
+    Rows are added from Gaussian gas-phase opt/freq logs, and optionally the matching PCM logs, with ``add`` or, in parallel, ``add_logs``. The table is available as a pandas DataFrame with ``to_dataframe``, and ``write`` saves it as a Parquet or Feather file with the rows of each ``group`` stored together (a row group, or record batch), so that analysis can read back only the columns and groups it needs with ``CampaignTable.read``. Files are partitioned by simulation by default: the group of a structure added without one is its simulation name. Give groups, e.g., the solute and number of waters, to store many structures per row group instead.
+
+    Energies from the gas-phase log are in Hartree, the continuum solvation free energy in kcal/mol, frequencies in cm^(-1), the dipole in Debye and the quadrupole in Debye*Angstroms.
+    """
+
+    #: Column name and pandas dtype of the table, list columns are stored as Arrow lists of float64
+    columns = {
+        "simulation": "string",
+        "group": "string",
+        "gas_log": "string",
+        "gas_log_size": "int64",
+        "gas_log_mtime": "float64",
+        "pcm_log": "string",
+        "n_atoms": "int32",
+        "scf_energy": "float64",
+        "thermal_enthalpy": "float64",
+        "thermal_free_energy": "float64",
+        "dG_solv": "float64",
+        "symmetry_number": "int32",
+        "n_imaginary": "int32",
+        "frequencies": "object",
+        "nbo_charges": "object",
+        "dipole": "float64",
+        "quadrupole": "float64",
+    }
+
+    def __init__(self):
+        self.rows = []
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add(self, gas_log, pcm_log=None, simulation=None, group=None):
+        """
+        Add the row of one structure.
+
+        Parameters
+        ----------
+        gas_log : str
+            Path of the gas-phase opt/freq .log/.out file.
+        pcm_log : str, Optional, default=None
+            Path of the PCM .log/.out file from which the solvation free energy is extracted.
+        simulation : str, Optional, default=None
+            Name of the structure, by default the name of ``gas_log`` without the "_gas.log" suffix.
+        group : str, Optional, default=None
+            Name of the group of structures (e.g., solute and number of waters) used to partition written files, by default ``simulation``, so that each structure is its own row group.
+
+        Returns
+        -------
+        row : dict
+            The added row.
+        """
+        row = _structure_record(gas_log)
+        dG_solv = utilities.dGSolvPCM(pcm_log) if pcm_log is not None else None
+        return self._append(row, gas_log, pcm_log, dG_solv, simulation, group)
+
+    def add_logs(self, gas_logs, pcm_logs=None, simulations=None, group=None, workers=None, backend="process"):
+        """
+        Add the rows of many structures, parsing the files in parallel with ``parse_logs``.
+
+        Parameters
+        ----------
+        gas_logs : list
+            Paths of the gas-phase opt/freq .log/.out files.
+        pcm_logs : list, Optional, default=None
+            Paths of the PCM .log/.out files, in the same order as ``gas_logs``.
+        simulations : list, Optional, default=None
+            Names of the structures, see ``add``.
+        group : str, Optional, default=None
+            Name of the group of all of these structures, by default the simulation name of each, see ``add``.
+        workers : int, Optional, default=None
+            Number of workers, see ``parse_logs``.
+        backend : str, Optional, default="process"
+            Either "process" or "thread", see ``parse_logs``.
+
+        Returns
+        -------
+        errors : dict
+            Dictionary of the index in ``gas_logs`` of each structure that couldn't be added to the traceback of the error.
+        """
+        gas_logs = list(gas_logs)
+        if pcm_logs is not None and len(pcm_logs) != len(gas_logs):
+            raise ValueError("The number of PCM logs, {}, does not match that of gas-phase logs, {}.".format(len(pcm_logs), len(gas_logs)))
+        if simulations is not None and len(simulations) != len(gas_logs):
+            raise ValueError("The number of simulation names, {}, does not match that of gas-phase logs, {}.".format(len(simulations), len(gas_logs)))
+
+        records, errors = parse_logs(gas_logs, fields=[_structure_record], workers=workers, backend=backend)
+        dG_solv = [None] * len(gas_logs)
+        if pcm_logs is not None:
+            pcm_records, pcm_errors = parse_logs(pcm_logs, fields=["dGSolvPCM"], workers=workers, backend=backend)
+            dG_solv = [None if record is None else record["dGSolvPCM"] for record in pcm_records]
+            for i, error in pcm_errors.items():
+                errors.setdefault(i, error)
+
+        for i, record in enumerate(records):
+            if i in errors:
+                continue
+            self._append(
+                record["_structure_record"],
+                gas_logs[i],
+                None if pcm_logs is None else pcm_logs[i],
+                dG_solv[i],
+                None if simulations is None else simulations[i],
+                group,
+            )
+        return errors
+
+    def _append(self, row, gas_log, pcm_log, dG_solv, simulation, group):
+        if simulation is None:
+            simulation = os.path.basename(gas_log)
+            for suffix in ("_gas.log", "_gas.out", ".log", ".out"):
+                if simulation.endswith(suffix):
+                    simulation = simulation[: -len(suffix)]
+                    break
+        if group is None:
+            # Partition by simulation unless the structures are grouped
+            group = simulation
+        stat = os.stat(gas_log)
+        row.update(
+            simulation=simulation,
+            group=group,
+            gas_log=os.path.abspath(gas_log),
+            gas_log_size=stat.st_size,
+            gas_log_mtime=stat.st_mtime,
+            pcm_log=None if pcm_log is None else os.path.abspath(pcm_log),
+            dG_solv=dG_solv,
+        )
+        self.rows.append(row)
+        return row
+
+    def to_dataframe(self):
+        """
+        Table of all rows, with the dtypes of ``CampaignTable.columns``.
+
+        Returns
+        -------
+        table : pandas.DataFrame
+            DataFrame with one row per structure.
+        """
+        table = pd.DataFrame(self.rows, columns=list(self.columns))
+        for name, dtype in self.columns.items():
+            if dtype != "object":
+                table[name] = table[name].astype(dtype)
+        return table
+
+    def write(self, fname, file_format=None):
+        """
+        Write the table to a Parquet or Feather file, with the rows of each group stored together. Requires pyarrow.
+
+        Parameters
+        ----------
+        fname : str
+            Path of the output file.
+        file_format : str, Optional, default=None
+            Either "parquet" or "feather", by default chosen from the extension of ``fname`` (".feather" or ".arrow" for Feather, Parquet otherwise).
+        """
+        pa = _import_pyarrow()
+        file_format = _file_format(fname, file_format)
+        table = self.to_dataframe().sort_values(["group", "simulation"], kind="stable")
+        schema = _arrow_schema(pa, self.columns)
+        groups = [part for _, part in table.groupby("group", sort=False, dropna=False)] if len(table) else [table]
+        if file_format == "parquet":
+            import pyarrow.parquet as pq
+
+            with pq.ParquetWriter(fname, schema) as writer:
+                for part in groups:
+                    writer.write_table(pa.Table.from_pandas(part, schema=schema, preserve_index=False))
+        else:
+            with pa.OSFile(fname, "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+                for part in groups:
+                    writer.write_table(pa.Table.from_pandas(part, schema=schema, preserve_index=False))
+
+    @staticmethod
+    def read(fname, columns=None, groups=None, file_format=None):
+        """
+        Read back a table written by ``write``. Requires pyarrow.
+
+        Parameters
+        ----------
+        fname : str
+            Path of the Parquet or Feather file.
+        columns : list, Optional, default=None
+            Names of the columns to read, by default all.
+        groups : list, Optional, default=None
+            Names of the groups to read, by default all. With Parquet files, other row groups are skipped without being read.
+        file_format : str, Optional, default=None
+            Either "parquet" or "feather", by default chosen from the extension of ``fname``.
+
+        Returns
+        -------
+        table : pandas.DataFrame
+            DataFrame of the selected columns and rows.
+        """
+        pa = _import_pyarrow()
+        file_format = _file_format(fname, file_format)
+        read_columns = columns
+        if columns is not None and groups is not None and "group" not in columns:
+            read_columns = list(columns) + ["group"]
+        if file_format == "parquet":
+            import pyarrow.parquet as pq
+
+            filters = None if groups is None else [("group", "in", list(groups))]
+            table = pq.read_table(fname, columns=read_columns, filters=filters).to_pandas()
+        else:
+            import pyarrow.feather as feather
+
+            table = feather.read_table(fname, columns=read_columns, memory_map=True).to_pandas()
+            if groups is not None:
+                table = table[table["group"].isin(list(groups))].reset_index(drop=True)
+        if columns is not None:
+            table = table[list(columns)]
+        return table
+
+
+def _structure_record(fname):
+    """Columns extracted from one gas-phase log, a path or ``GaussianLog``, for ``CampaignTable``."""
+    log = utilities._gaussian_log(fname)
+    freq = np.array(log.frequencies, dtype=np.float64)
+    charges = np.array(list(log.nbo_charges.values()), dtype=np.float64)
+    if len(charges) == log.atom_count and len(charges) > 0:
+        dipole, quadrupole = utilities.multipole_moments(log)
+    else:
+        dipole, quadrupole = np.nan, np.nan
+    return {
+        "n_atoms": log.atom_count,
+        "scf_energy": log.scf_energy,
+        "thermal_enthalpy": log.thermal_enthalpy,
+        "thermal_free_energy": log.thermal_free_energy,
+        "symmetry_number": log.symmetry_number,
+        "n_imaginary": int(np.sum(freq < 0)),
+        "frequencies": freq,
+        "nbo_charges": charges,
+        "dipole": dipole,
+        "quadrupole": quadrupole,
+    }
+
+
+def _file_format(fname, file_format):
+    if file_format is None:
+        file_format = "feather" if os.path.splitext(fname)[1].lower() in (".feather", ".arrow") else "parquet"
+    if file_format not in ("parquet", "feather"):
+        raise ValueError("The file format, {}, should be either 'parquet' or 'feather'.".format(file_format))
+    return file_format
+
+
+def _arrow_schema(pa, columns):
+    """Arrow schema equivalent to the pandas dtypes of ``columns``."""
+    types = {
+        "string": pa.string(),
+        "int64": pa.int64(),
+        "int32": pa.int32(),
+        "float64": pa.float64(),
+        "object": pa.list_(pa.float64()),
+    }
+    return pa.schema([(name, types[dtype]) for name, dtype in columns.items()])
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+    except ImportError:
+        raise ImportError("Writing and reading campaign tables requires pyarrow, e.g., pip install pyarrow")
+    return pyarrow
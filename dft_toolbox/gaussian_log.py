@@ -0,0 +1,471 @@
+"""
+Indexed access to Gaussian16 output files.
+
+Sections of interest are located with compiled byte regular expressions over a memory map of the file, searching backwards from the end for the quantities Gaussian prints last, and only the lines of a section are decoded and parsed, when it is first requested. Memory use is therefore of the order of the largest parsed section rather than of the file.
+"""
+
+import bisect
+import contextlib
+import mmap
+import os
+import re
+import numpy as np
+
+atomic_num = {
+    1: 'H',
+    6: 'C',
+    7: 'N',
+    8: 'O',
+    11: 'Na',
+    16: 'S',
+    17: 'Cl'
+}
+
+
+class GaussianLog:
+    """
+    Indexed view of a Gaussian16 .log/.out file.
+
+    Section headers are located on demand in a memory map of the file, the first occurrence of a section by a forward search from the relevant offset, and the last occurrence by a backward search from the end, so that only the bytes between the file end and the requested section are touched. Sections are parsed lazily on first access and the result is kept, so that any number of quantities can be extracted from the same log. The complete ``offsets`` index of every header is built on first access.
+
+    Parameters
+    ----------
+    fname : str
+        A string specifying the complete path of the .log/.out file.
+
+    Attributes
+    ----------
+    fname : str
+        Path of the indexed file.
+    size : int
+        Size of the file (bytes) when it was opened.
+    """
+
+    markers = {
+        "input_orientation": "Input orientation:",
+        "distance_matrix": "Distance matrix (angstroms)",
+        "stoichiometry": " Stoichiometry ",
+        "optimization_complete": "Optimization complete",
+        "scf_done": "SCF Done:",
+        "harmonic_frequencies": "Harmonic frequencies (cm**-1)",
+        "thermochemistry": "- Thermochemistry -",
+        "rotational_symmetry": "Rotational symmetry number",
+        "thermal_enthalpy": "Sum of electronic and thermal Enthalpies=",
+        "thermal_free_energy": "Sum of electronic and thermal Free Energies=",
+        "npa_summary": "Summary of Natural Population Analysis",
+        "dG_solv": "DeltaG (solv)",
+        "link1": "Link1:  Proceeding to internal job step number",
+        "normal_termination": "Normal termination of Gaussian",
+        "error_termination": "Error termination",
+    }
+    patterns = {key: re.compile(re.escape(marker.encode())) for key, marker in markers.items()}
+
+    def __init__(self, fname):
+        self.fname = fname
+        self.size = os.path.getsize(fname)
+        self._offsets = None
+        self._cache = {}
+
+    def __repr__(self):
+        return "{}({!r})".format(type(self).__name__, self.fname)
+
+    @contextlib.contextmanager
+    def _mapped(self):
+        """Read-only memory map of the first ``size`` bytes of the file, None for an empty file."""
+        if not self.size:
+            yield None
+            return
+        with open(self.fname, "rb") as f, mmap.mmap(f.fileno(), self.size, access=mmap.ACCESS_READ) as mm:
+            yield mm
+
+    @property
+    def offsets(self):
+        """Dictionary of section name, the keys of ``GaussianLog.markers``, to the list of byte offsets, in file order, at which the section header lines start."""
+        if self._offsets is None:
+            offsets = {key: [] for key in self.markers}
+            with self._mapped() as mm:
+                if mm is not None:
+                    for key, pattern in self.patterns.items():
+                        offsets[key] = [mm.rfind(b"\n", 0, match.start()) + 1 for match in pattern.finditer(mm)]
+            self._offsets = offsets
+        return self._offsets
+
+    def _first(self, key, after=0, before=None):
+        """Return the line offset of the first header of section ``key`` in [after, before), or None."""
+        if before is None:
+            before = self.size
+        if self._offsets is not None:
+            offsets = self._offsets[key]
+            i = bisect.bisect_left(offsets, after)
+            return offsets[i] if i < len(offsets) and offsets[i] < before else None
+        with self._mapped() as mm:
+            match = None if mm is None else self.patterns[key].search(mm, after, before)
+            return None if match is None else mm.rfind(b"\n", 0, match.start()) + 1
+
+    def _last(self, key, after=0, before=None):
+        """Return the line offset of the last header of section ``key`` in [after, before), searching backwards from ``before``, or None."""
+        if before is None:
+            before = self.size
+        if self._offsets is not None:
+            offsets = self._offsets[key]
+            i = bisect.bisect_left(offsets, before) - 1
+            return offsets[i] if i >= 0 and offsets[i] >= after else None
+        with self._mapped() as mm:
+            position = -1 if mm is None else mm.rfind(self.markers[key].encode(), after, before)
+            return None if position == -1 else mm.rfind(b"\n", 0, position) + 1
+
+    def _lines(self, offset, skip=0, stop=None, count=None):
+        """
+        Read decoded lines starting at byte ``offset``.
+
+        Parameters
+        ----------
+        offset : int
+            Byte offset of the first line.
+        skip : int, Optional, default=0
+            Number of lines to discard before collecting.
+        stop : function, Optional, default=None
+            Predicate called on each collected line, reading ends (exclusively) at the first line for which it returns True.
+        count : int, Optional, default=None
+            Maximum number of lines to collect.
+
+        Returns
+        -------
+        lines : list
+            List of lines, including line endings.
+        """
+        lines = []
+        with self._mapped() as mm:
+            if mm is None:
+                return lines
+            mm.seek(offset)
+            for _ in range(skip):
+                mm.readline()
+            while count is None or len(lines) < count:
+                line = mm.readline()
+                if not line:
+                    break
+                line = line.decode("utf-8", errors="replace").replace("\r\n", "\n")
+                if stop is not None and stop(line):
+                    break
+                lines.append(line)
+        return lines
+
+    def _final_geometry_region(self):
+        """Offsets bounding the job step that holds the converged geometry, from "Optimization complete" to the following job end."""
+        # Each job step converges once, so the first "Optimization complete" of the file is the last one of the first job step holding one
+        start = self._last("optimization_complete", before=self._first("link1"))
+        if start is None:
+            start = self._first("optimization_complete")
+        if start is None:
+            start = 0
+        ends = [self._first(key, after=start) for key in ("link1", "normal_termination")]
+        ends = [end for end in ends if end is not None]
+        return start, (min(ends) if ends else None)
+
+    @property
+    def job_steps(self):
+        """Byte offsets at which each job step begins, the first being 0 and the others the Link1 markers."""
+        return [0] + self.offsets["link1"]
+
+    def _read_orientation(self, offset):
+        """Atomic symbols, coordinate strings and coordinate array of the "Input orientation" table at ``offset``."""
+        atoms, coord_lines, coords = [], [], []
+        if offset is not None:
+            for line in self._lines(offset, skip=5, stop=lambda l: l.lstrip().startswith("---")):
+                line = line.lstrip()
+                line = line[line.find(" ") :].lstrip()
+                atom = atomic_num[int(line[: line.find(" ")])]
+                temp = line[line.find(" ") :].lstrip()
+                temp = temp[temp.find(" ") :].lstrip()
+                atoms.append(atom)
+                coord_lines.append(temp)
+                coords.append([float(c) for c in temp.split()])
+        return atoms, coord_lines, np.array(coords)
+
+    def _parse_input_orientation(self):
+        if "geometry" not in self._cache:
+            start, end = self._final_geometry_region()
+            self._cache["geometry"] = self._read_orientation(self._first("input_orientation", after=start, before=end))
+        return self._cache["geometry"]
+
+    @property
+    def last_geometry(self):
+        """
+        Tuple of the atomic symbols and the 2-D NumPy array of shape (atom_count, 3) of the last geometry printed in the file, in Angstroms.
+
+        The geometry is found by searching backwards from the end of the file, so that the latest step of a long, possibly still running, optimization is read without scanning the rest of the file. A table that is still being written is skipped.
+        """
+        atoms, _, coords = self._read_orientation(self._last_complete_orientation())
+        return atoms, coords
+
+    def _last_complete_orientation(self):
+        """Offset of the last "Input orientation" table that is completely written, or None."""
+        before = None
+        while True:
+            offset = self._last("input_orientation", before=before)
+            if offset is None:
+                return None
+            with self._mapped() as mm:
+                if _orientation_table(mm, offset)[0] is not None:
+                    return offset
+            before = offset
+
+    def iter_geometries(self):
+        """
+        Generator of every geometry printed in the file, e.g., each step of an optimization, see ``iter_geometries``.
+
+        Yields
+        ------
+        step : int
+            Index of the geometry in the file, starting at 0.
+        energy : float
+            Electronic energy (Hartree) of the first "SCF Done" line following the geometry, NaN if there is none before the next geometry.
+        coords : numpy.ndarray
+            Array of shape (atom_count, 3) of the coordinates, in Angstroms.
+        """
+        orientation = self.patterns["input_orientation"]
+        scf_done = self.patterns["scf_done"]
+        with self._mapped() as mm:
+            if mm is None:
+                return
+            step = 0
+            match = orientation.search(mm)
+            while match is not None:
+                coords, table_end = _orientation_table(mm, match.end())
+                if coords is None:
+                    # The table is still being written
+                    return
+                next_match = orientation.search(mm, table_end)
+                end = self.size if next_match is None else next_match.start()
+                energy = np.nan
+                scf = scf_done.search(mm, table_end, end)
+                if scf is not None:
+                    line_end = mm.find(b"\n", scf.start(), end)
+                    if line_end != -1:
+                        energy = float(mm[scf.start() : line_end].split()[4])
+                yield step, energy, coords
+                step += 1
+                match = next_match
+
+    @property
+    def atoms(self):
+        """List of atomic symbols of the final (converged) geometry."""
+        return self._parse_input_orientation()[0]
+
+    @property
+    def atom_count(self):
+        """Number of atoms in the final (converged) geometry."""
+        return len(self.atoms)
+
+    @property
+    def coordinate_lines(self):
+        """List of the coordinate strings, "x y z\\n", of the final geometry as written in the log."""
+        return self._parse_input_orientation()[1]
+
+    @property
+    def coordinates(self):
+        """2-D NumPy array of shape (atom_count, 3) containing the final geometry, in Angstroms."""
+        return self._parse_input_orientation()[2]
+
+    @property
+    def distance_matrix(self):
+        """
+        Tuple of the atomic symbols and the 2-D NumPy array of shape (atom_count, atom_count) of interatomic distances printed by Gaussian for the final geometry, in Angstroms.
+
+        Gaussian prints the lower triangle in blocks of five columns, each block is placed and the result symmetrized.
+        """
+        if "distance_matrix" in self._cache:
+            return self._cache["distance_matrix"]
+        start, end = self._final_geometry_region()
+        offset = self._first("distance_matrix", after=start, before=end)
+        if offset is None:
+            raise ValueError("No distance matrix was found in {}.".format(self.fname))
+        lines = self._lines(offset, skip=1, stop=lambda l: "Stoichiometry" in l)
+        atoms = {}
+        entries = []
+        column = 0
+        for line in lines:
+            values = line.split()
+            if not values:
+                continue
+            if all(value.isdigit() for value in values):
+                column = int(values[0]) - 1
+                continue
+            row = int(values[0]) - 1
+            atoms[row] = values[1]
+            entries.append((row, column, [float(x) for x in values[2:]]))
+        n_atoms = len(atoms)
+        matrix = np.zeros((n_atoms, n_atoms))
+        for row, column, values in entries:
+            matrix[row, column : column + len(values)] = values
+        matrix = np.tril(matrix) + np.tril(matrix, -1).T
+        self._cache["distance_matrix"] = ([atoms[i] for i in range(n_atoms)], matrix)
+        return self._cache["distance_matrix"]
+
+    @property
+    def frequencies(self):
+        """List of harmonic frequencies in cm^(-1), taken from the second job step if present."""
+        if "frequencies" in self._cache:
+            return self._cache["frequencies"]
+        start = self._first("link1")
+        offset = self._first("harmonic_frequencies", after=start or 0)
+        freq = []
+        if offset is not None:
+            for line in self._lines(offset, skip=4, stop=lambda l: "Thermochemistry" in l):
+                if "Frequencies" in line:
+                    freq.extend(float(value) for value in line.split()[2:])
+        self._cache["frequencies"] = freq
+        return freq
+
+    @property
+    def nbo_charges(self):
+        """Dictionary of atom ("type_index") to partial charge from the first Natural Population Analysis summary."""
+        if "nbo_charges" in self._cache:
+            return self._cache["nbo_charges"]
+        offset = self._first("npa_summary")
+        partial_charges = {}
+        if offset is not None:
+            for line in self._lines(offset, skip=6, stop=lambda l: l.lstrip().startswith("=") or not l.strip()):
+                line = line.split()
+                partial_charges[line[0] + "_" + line[1]] = float(line[2])
+        self._cache["nbo_charges"] = partial_charges
+        return partial_charges
+
+    @property
+    def dG_solv(self):
+        """Continuum solvation free energy (kcal/mol) from the last "DeltaG (solv)" line, 0 if absent."""
+        offset = self._last("dG_solv")
+        if offset is None:
+            return 0
+        return float(self._lines(offset, count=1)[0].split()[4])
+
+    @property
+    def symmetry_number(self):
+        """Rotational symmetry number from the last thermochemistry section, 0 if absent."""
+        offset = self._last("rotational_symmetry")
+        if offset is None:
+            return 0
+        symm = self._lines(offset, count=1)[0].split()[3]
+        return int(symm[: symm.find(".")])
+
+    def _last_value(self, key, index):
+        """Float of the ``index`` whitespace separated field of the last line of section ``key``, None if absent."""
+        offset = self._last(key)
+        if offset is None:
+            return None
+        return float(self._lines(offset, count=1)[0].split()[index])
+
+    @property
+    def scf_energy(self):
+        """Electronic energy (Hartree) of the last "SCF Done" line, None if absent."""
+        return self._last_value("scf_done", 4)
+
+    @property
+    def thermal_enthalpy(self):
+        """Sum of electronic and thermal enthalpies (Hartree) of the last thermochemistry section, None if absent."""
+        return self._last_value("thermal_enthalpy", -1)
+
+    @property
+    def thermal_free_energy(self):
+        """Sum of electronic and thermal free energies (Hartree) of the last thermochemistry section, None if absent."""
+        return self._last_value("thermal_free_energy", -1)
+
+    @property
+    def termination(self):
+        """Either "normal" or "error" from the last termination line of the file, None if the last job step is not terminated."""
+        step = self._last("link1") or 0
+        normal = self._last("normal_termination", after=step)
+        error = self._last("error_termination", after=step)
+        if normal is None and error is None:
+            return None
+        return "normal" if (error is None or (normal is not None and normal > error)) else "error"
+
+
+def _orientation_table(mm, position):
+    """
+    Coordinates of the "Input orientation" table whose header line contains ``position``, read directly from the memory map ``mm``.
+
+    Returns
+    -------
+    coords : numpy.ndarray
+        Array of shape (atom_count, 3), None if the table is incomplete.
+    position : int
+        Offset of the line following the table, None if the table is incomplete.
+    """
+    for _ in range(5):
+        position = mm.find(b"\n", position) + 1
+        if position == 0:
+            return None, None
+    rows = []
+    while True:
+        end = mm.find(b"\n", position)
+        if end == -1:
+            return None, None
+        line = mm[position:end]
+        position = end + 1
+        if line.lstrip().startswith(b"---"):
+            break
+        rows.append(line.split()[3:6])
+    return np.array(rows, dtype=np.float64).reshape(-1, 3), position
+
+
+def iter_geometries(fname):
+    """
+    Lazily iterate over every geometry printed in a Gaussian .log/.out file, such as each step of an optimization.
+
+    The file is memory mapped and each "Input orientation" table is located and parsed in turn, so memory use is constant regardless of the file size. The size of the file is fixed when the iteration starts, and an incomplete table at the end of a file that is still being written is ignored.
+
+    Parameters
+    ----------
+    fname : str/GaussianLog
+        A string specifying the complete path of the .log/.out file, or an already indexed ``GaussianLog``.
+
+    Yields
+    ------
+    step : int
+        Index of the geometry in the file, starting at 0.
+    energy : float
+        Electronic energy (Hartree) of the first "SCF Done" line following the geometry, NaN if there is none before the next geometry.
+    coords : numpy.ndarray
+        Array of shape (atom_count, 3) of the coordinates, in Angstroms.
+    """
+    log = fname if isinstance(fname, GaussianLog) else GaussianLog(fname)
+    yield from log.iter_geometries()
+
+
+def read_geometries(fname, dtype=np.float32):
+    """
+    Read every geometry printed in a Gaussian .log/.out file into one preallocated array, see ``iter_geometries``.
+
+    Parameters
+    ----------
+    fname : str/GaussianLog
+        A string specifying the complete path of the .log/.out file, or an already indexed ``GaussianLog``.
+    dtype : numpy.dtype, Optional, default=numpy.float32
+        Data type of the coordinate array.
+
+    Returns
+    -------
+    energies : numpy.ndarray
+        Array of shape (n_steps,) of the electronic energy (Hartree) of each geometry, NaN where absent.
+    coords : numpy.ndarray
+        Array of shape (n_steps, atom_count, 3) of the coordinates, in Angstroms.
+    """
+    log = fname if isinstance(fname, GaussianLog) else GaussianLog(fname)
+    with log._mapped() as mm:
+        n_steps = 0 if mm is None else sum(1 for _ in log.patterns["input_orientation"].finditer(mm))
+    energies = np.full(n_steps, np.nan)
+    coords = None
+    n_read = 0
+    for step, energy, xyz in log.iter_geometries():
+        if coords is None:
+            coords = np.empty((n_steps,) + xyz.shape, dtype=dtype)
+        elif xyz.shape != coords.shape[1:]:
+            raise ValueError("The number of atoms of step {}, {}, differs from that of the first step, {}.".format(step, len(xyz), coords.shape[1]))
+        energies[step] = energy
+        coords[step] = xyz
+        n_read = step + 1
+    if coords is None:
+        coords = np.empty((0, 0, 3), dtype=dtype)
+    return energies[:n_read], coords[:n_read]
@@ -0,0 +1,437 @@
+"""
+Vectorized geometry of atomic coordinates, with optional periodic boundary conditions.
+"""
+
+import concurrent.futures
+import glob
+import os
+import numpy as np
+from scipy.spatial import cKDTree
+from scipy.spatial.distance import cdist
+
+#: Number of atoms above which ``distance_matrix`` returns float32 values by default
+float32_atoms = 2000
+
+
+def box_lengths(box):
+    """
+    Edge lengths of an orthorhombic periodic box.
+
+    Parameters
+    ----------
+    box : float/array_like
+        Either the edge length of a cubic box, such as the ``box_size`` of ``coordinate_wrapper``, or the three edge lengths, in Angstroms.
+
+    Returns
+    -------
+    box : numpy.ndarray
+        Array of the three edge lengths.
+    """
+    box = np.asarray(box, dtype=np.float64)
+    if box.ndim == 0:
+        box = np.repeat(box, 3)
+    if box.shape != (3,) or not np.all(box > 0):
+        raise ValueError("The box should be a positive edge length or three positive edge lengths, not {}.".format(box))
+    return box
+
+
+def distance_matrix(coords, box=None, dtype=None):
+    """
+    Matrix of the distances between each atom and all others, computed from coordinates.
+
+    Rows are computed in blocks with ``scipy.spatial.distance.cdist``, or per axis with the minimum image convention in a periodic box, so that temporary arrays stay small next to the output.
+
+    Parameters
+    ----------
+    coords : array_like
+        Array of shape (atom_count, 3) of the coordinates, such as the second output of ``extract_coordinates``, in Angstroms.
+    box : float/array_like, Optional, default=None
+        Edge length(s) of the periodic box, see ``box_lengths``. If None, the system is not periodic.
+    dtype : numpy.dtype, Optional, default=None
+        Data type of the output. By default float64, or float32 for more than ``float32_atoms`` atoms to halve the memory used.
+
+    Returns
+    -------
+    matrix : numpy.ndarray
+        Array of shape (atom_count, atom_count) of the distances, in Angstroms.
+    """
+    coords = _as_coordinates(coords)
+    n_atoms = len(coords)
+    if dtype is None:
+        dtype = np.float32 if n_atoms > float32_atoms else np.float64
+    if box is not None:
+        box = box_lengths(box)
+
+    matrix = np.empty((n_atoms, n_atoms), dtype=dtype)
+    rows = max(1, (1 << 22) // max(n_atoms, 1))
+    for start in range(0, n_atoms, rows):
+        block = coords[start : start + rows]
+        if box is None:
+            matrix[start : start + rows] = cdist(block, coords)
+            continue
+        squared = np.zeros((len(block), n_atoms))
+        for axis in range(3):
+            delta = np.abs(block[:, axis, np.newaxis] - coords[np.newaxis, :, axis])
+            delta %= box[axis]
+            np.minimum(delta, box[axis] - delta, out=delta)
+            squared += delta * delta
+        matrix[start : start + rows] = np.sqrt(squared)
+    return matrix
+
+
+def neighbor_pairs(coords, cutoff, box=None, selection=None, neighbors=None):
+    """
+    Sparse list of the pairs of atoms within a cutoff distance, and the coordination number of each atom, from a KD-tree.
+
+    The cost scales with the number of atoms and pairs rather than the square of the number of atoms, so that solvation shells of clusters of thousands of atoms can be analyzed without a full ``distance_matrix``. In a periodic box, coordinates are wrapped into the box, so that they may be centered anywhere as with ``coordinate_wrapper``, and pairs are found between the nearest periodic images.
+
+    Parameters
+    ----------
+    coords : array_like
+        Array of shape (atom_count, 3) of the coordinates, such as the second output of ``extract_coordinates``, in Angstroms.
+    cutoff : float
+        Maximum distance between the atoms of a pair, in Angstroms.
+    box : float/array_like, Optional, default=None
+        Edge length(s) of the periodic box, see ``box_lengths``. If None, the system is not periodic.
+    selection : array_like, Optional, default=None
+        Indices of the central atoms, e.g., of a Na+ ion. If provided, only pairs of a selected atom and one of ``neighbors`` are returned.
+    neighbors : array_like, Optional, default=None
+        Indices of the candidate neighbors of ``selection``, e.g., of the water oxygens. By default, all atoms.
+
+    Returns
+    -------
+    pairs : numpy.ndarray
+        Array of shape (n_pairs, 2) of the indices of the atoms of each pair, sorted. Without ``selection``, each pair appears once with the smaller index first, otherwise the first index is that of the selected atom.
+    distances : numpy.ndarray
+        Array of shape (n_pairs,) of the distance of each pair, in Angstroms.
+    coordination : numpy.ndarray
+        Number of neighbors of each atom, or of each atom of ``selection`` if provided.
+    """
+    coords = _as_coordinates(coords)
+    n_atoms = len(coords)
+    if box is not None:
+        box = box_lengths(box)
+        coords = np.mod(coords, box)
+        # Rounding of np.mod can give exactly the box length
+        coords = np.where(coords >= box, coords - box, coords)
+
+    if selection is None and neighbors is None:
+        tree = cKDTree(coords, boxsize=box)
+        pairs = tree.query_pairs(cutoff, output_type="ndarray").astype(np.int64).reshape(-1, 2)
+        pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+        coordination = np.bincount(pairs.ravel(), minlength=n_atoms)
+    else:
+        selection = np.arange(n_atoms) if selection is None else np.asarray(selection, dtype=np.int64).ravel()
+        neighbors = np.arange(n_atoms) if neighbors is None else np.asarray(neighbors, dtype=np.int64).ravel()
+        matrix = cKDTree(coords[selection], boxsize=box).sparse_distance_matrix(cKDTree(coords[neighbors], boxsize=box), cutoff, output_type="ndarray")
+        i, j = matrix["i"].astype(np.int64), matrix["j"].astype(np.int64)
+        pairs = np.column_stack([selection[i], neighbors[j]])
+        keep = pairs[:, 0] != pairs[:, 1]
+        order = np.lexsort((pairs[keep, 1], pairs[keep, 0]))
+        pairs = pairs[keep][order]
+        coordination = np.bincount(i[keep], minlength=len(selection))
+    return pairs, pair_distances(coords, pairs, box), coordination
+
+
+def pair_distances(coords, pairs, box=None):
+    """
+    Distances between the atoms of each pair, with the minimum image convention in a periodic box.
+
+    Parameters
+    ----------
+    coords : array_like
+        Array of shape (atom_count, 3) of the coordinates, in Angstroms.
+    pairs : array_like
+        Array of shape (n_pairs, 2) of atom indices.
+    box : float/array_like, Optional, default=None
+        Edge length(s) of the periodic box, see ``box_lengths``. If None, the system is not periodic.
+
+    Returns
+    -------
+    distances : numpy.ndarray
+        Array of shape (n_pairs,) of the distances, in Angstroms.
+    """
+    coords = _as_coordinates(coords)
+    pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    delta = coords[pairs[:, 1]] - coords[pairs[:, 0]]
+    if box is not None:
+        box = box_lengths(box)
+        delta -= box * np.round(delta / box)
+    return np.sqrt(np.einsum("ij,ij->i", delta, delta))
+
+
+def wrap_coordinates(coords, box, cutoff, center=0):
+    """
+    Wrap coordinates around a central atom or point, as ``coordinate_wrapper`` does, for any number of frames at once.
+
+    Coordinates are first made relative to the center, then each coordinate beyond ``cutoff`` (below ``-cutoff``) is shifted by one box length down (up).
+
+    Parameters
+    ----------
+    coords : array_like
+        Array of shape (atom_count, 3), or (n_frames, atom_count, 3), of the coordinates, in Angstroms.
+    box : float/array_like
+        Edge length(s) of the periodic box, see ``box_lengths``.
+    cutoff : float/array_like
+        Distance from the center beyond which coordinates are wrapped, in Angstroms, either one value or one per axis.
+    center : int/array_like, Optional, default=0
+        Either the index of the central atom, the first atom by default, or the coordinates of the center, of shape (3,) or (n_frames, 3).
+
+    Returns
+    -------
+    wrapped : numpy.ndarray
+        Array of the same shape as ``coords`` of the wrapped coordinates, relative to the center.
+    """
+    coords = np.asarray(coords, dtype=np.float64)
+    if coords.ndim < 2 or coords.shape[-1] != 3:
+        raise ValueError("The coordinates should be of shape (atom_count, 3) or (n_frames, atom_count, 3), not {}.".format(coords.shape))
+    box = box_lengths(box)
+    if isinstance(center, (int, np.integer)):
+        origin = np.take(coords, [center], axis=-2)
+    else:
+        origin = np.asarray(center, dtype=np.float64)[..., np.newaxis, :]
+    relative = coords - origin
+    return relative - box * (np.sign(relative) * (np.abs(relative) > cutoff))
+
+
+def read_xyz(fname):
+    """
+    Read the atoms and coordinates of a single-frame .xyz file, whose first two lines are a header (the atom count and a comment, or blank lines as written by ``write_xyz``).
+
+    Parameters
+    ----------
+    fname : str
+        Path of the .xyz file.
+
+    Returns
+    -------
+    atoms : list
+        Atom labels, as written in the file.
+    coords : numpy.ndarray
+        Array of shape (atom_count, 3) of the coordinates.
+    """
+    with open(fname, "r") as f:
+        rows = [line.split() for line in f.readlines()[2:]]
+    rows = [row for row in rows if row]
+    atoms = [row[0] for row in rows]
+    coords = np.array([row[1:4] for row in rows], dtype=np.float64).reshape(-1, 3)
+    return atoms, coords
+
+
+def iter_xyz_frames(fname):
+    """
+    Lazily iterate over the frames of a multi-frame .xyz trajectory, each frame being the atom count, a comment line and one line per atom.
+
+    Only one frame is held in memory at a time, and an incomplete last frame, e.g., of a trajectory still being written, is ignored.
+
+    Parameters
+    ----------
+    fname : str
+        Path of the .xyz file.
+
+    Yields
+    ------
+    atoms : numpy.ndarray
+        Array of the atom labels, as written in the file.
+    coords : numpy.ndarray
+        Array of shape (atom_count, 3) of the coordinates.
+    """
+    with open(fname, "r") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            n_atoms = int(line.split()[0])
+            f.readline()
+            lines = [f.readline() for _ in range(n_atoms)]
+            if n_atoms and len(lines[-1].split()) < 4:
+                # Incomplete frame at the end of the file
+                return
+            tokens = " ".join(lines).split()
+            if len(tokens) != 4 * n_atoms:
+                # Extra columns, e.g., velocities, or an incomplete frame
+                rows = [row.split() for row in lines]
+                if any(len(row) < 4 for row in rows):
+                    return
+                tokens = [token for row in rows for token in row[:4]]
+            atoms = np.array(tokens[0::4])
+            del tokens[0::4]
+            yield atoms, np.array(list(map(float, tokens)), dtype=np.float64).reshape(n_atoms, 3)
+
+
+def select_cluster(atoms, coords, solute, n_waters, box=None, water="O", water_size=3):
+    """
+    Indices of the atoms of a cluster of a solute and the water molecules nearest to it.
+
+    Water molecules are assumed to be stored as consecutive atoms starting with the oxygen, e.g., O, H, H, and are ranked by the distance of their oxygen to the nearest solute atom, with the minimum image convention in a periodic box.
+
+    Parameters
+    ----------
+    atoms : array_like
+        Atom labels.
+    coords : array_like
+        Array of shape (atom_count, 3) of the coordinates, in Angstroms.
+    solute : int/array_like
+        Index or indices of the solute atoms.
+    n_waters : int
+        Number of water molecules in the cluster.
+    box : float/array_like, Optional, default=None
+        Edge length(s) of the periodic box, see ``box_lengths``. If None, the system is not periodic.
+    water : str, Optional, default="O"
+        Label of the water oxygens.
+    water_size : int, Optional, default=3
+        Number of atoms of each water molecule.
+
+    Returns
+    -------
+    index : numpy.ndarray
+        Indices of the solute atoms followed by those of the water molecules, from the nearest to the farthest.
+    """
+    coords = _as_coordinates(coords)
+    solute = np.atleast_1d(np.asarray(solute, dtype=np.int64))
+    oxygens = np.flatnonzero(np.asarray(atoms) == water)
+    oxygens = oxygens[~np.isin(oxygens, solute)]
+    if len(oxygens) < n_waters:
+        raise ValueError("The number of waters, {}, exceeds that of water oxygens, {}.".format(n_waters, len(oxygens)))
+    delta = coords[oxygens, np.newaxis, :] - coords[np.newaxis, solute, :]
+    if box is not None:
+        box = box_lengths(box)
+        delta -= box * np.round(delta / box)
+    distance = np.einsum("ijk,ijk->ij", delta, delta).min(axis=1)
+    if n_waters < len(oxygens):
+        nearest = np.argpartition(distance, n_waters - 1)[:n_waters]
+    else:
+        nearest = np.arange(len(oxygens))
+    nearest = nearest[np.argsort(distance[nearest], kind="stable")]
+    molecules = oxygens[nearest, np.newaxis] + np.arange(water_size)
+    return np.concatenate([solute, molecules.ravel()])
+
+
+def iter_clusters(trajectory, solute, n_waters, box=None, water="O", water_size=3, atom_map=None):
+    """
+    Lazily extract a cluster of a solute and its nearest water molecules from each frame of a trajectory, see ``select_cluster``.
+
+    Each cluster is centered on the first solute atom and, in a periodic box, each solute atom and water oxygen is moved to its minimum image relative to the center, and the other atoms of each water to their minimum image relative to its oxygen, so that water molecules are whole even if they straddle the box boundary. Clusters are ready to be passed to ``create_g16_input`` without intermediate files.
+
+    Parameters
+    ----------
+    trajectory : str/iterable
+        Path of a multi-frame .xyz file read with ``iter_xyz_frames``, or any iterable of (atoms, coords) frames, e.g., ``((u.atoms.names, ts.positions) for ts in u.trajectory)`` with an MDAnalysis Universe ``u``.
+    solute : int/array_like
+        Index or indices of the solute atoms.
+    n_waters : int
+        Number of water molecules in each cluster.
+    box : float/array_like, Optional, default=None
+        Edge length(s) of the periodic box, see ``box_lengths``. If None, the system is not periodic.
+    water : str, Optional, default="O"
+        Label of the water oxygens in the trajectory.
+    water_size : int, Optional, default=3
+        Number of atoms of each water molecule.
+    atom_map : dict, Optional, default=None
+        Dictionary of trajectory labels to the atomic symbols written in the cluster, e.g., ``{"OW": "O", "HW": "H"}``.
+
+    Yields
+    ------
+    frame : int
+        Index of the frame in the trajectory.
+    atoms : list
+        Atomic symbols of the cluster.
+    coords : numpy.ndarray
+        Array of shape (cluster_size, 3) of the coordinates, in Angstroms.
+    """
+    frames = iter_xyz_frames(trajectory) if isinstance(trajectory, str) else trajectory
+    atom_map = {} if atom_map is None else atom_map
+    if box is not None:
+        box = box_lengths(box)
+    n_solute = len(np.atleast_1d(solute))
+    for i, (atoms, coords) in enumerate(frames):
+        atoms = np.asarray(atoms)
+        index = select_cluster(atoms, coords, solute, n_waters, box=box, water=water, water_size=water_size)
+        cluster = np.asarray(coords, dtype=np.float64)[index]
+        cluster = cluster - cluster[0]
+        if box is not None:
+            cluster -= box * np.round(cluster / box)
+            # Hydrogens follow their oxygen rather than the center
+            waters = cluster[n_solute:].reshape(-1, water_size, 3)
+            bonds = waters[:, 1:] - waters[:, :1]
+            waters[:, 1:] = waters[:, :1] + bonds - box * np.round(bonds / box)
+            cluster[n_solute:] = waters.reshape(-1, 3)
+        yield i, [atom_map.get(atom, atom) for atom in atoms[index].tolist()], cluster
+
+
+def write_xyz(fname, atoms, coords):
+    """
+    Write atoms and coordinates in the .xyz format of ``coordinate_wrapper``, with two blank header lines and indented rows, read by ``extract_coordinates``.
+
+    Parameters
+    ----------
+    fname : str
+        Path of the .xyz file.
+    atoms : list
+        Atom labels.
+    coords : array_like
+        Array of shape (atom_count, 3) of the coordinates, in Angstroms.
+    """
+    rows = ["\n" + " " * 10 + str(atom) + " " * 10 + f"{x:.5f}" + f"     {y:.5f}" + f"     {z:.5f}" for atom, (x, y, z) in zip(atoms, np.asarray(coords).tolist())]
+    with open(fname, "w") as f:
+        f.write("\n" + "".join(rows))
+
+
+def wrap_xyz_files(fnames, box, cutoff, output_dir, center=0, workers=None):
+    """
+    Wrap the coordinates of many .xyz files with ``wrap_coordinates``, in parallel, writing new files.
+
+    Parameters
+    ----------
+    fnames : str/list
+        Paths of the .xyz files, or a glob pattern such as "sodiumIonCluster_*.xyz".
+    box : float/array_like
+        Edge length(s) of the periodic box, see ``box_lengths``.
+    cutoff : float/array_like
+        Distance from the center beyond which coordinates are wrapped, see ``wrap_coordinates``.
+    output_dir : str
+        Directory of the wrapped files, created if needed, which are given the names of the input files. Input files are never overwritten.
+    center : int/array_like, Optional, default=0
+        Index of the central atom or coordinates of the center, see ``wrap_coordinates``.
+    workers : int, Optional, default=None
+        Number of worker processes, by default the number of CPUs. If 1, files are processed serially in this process.
+
+    Returns
+    -------
+    outputs : list
+        Paths of the written files, in the order of ``fnames``.
+    """
+    if isinstance(fnames, str):
+        fnames = sorted(glob.glob(fnames))
+    fnames = list(fnames)
+    os.makedirs(output_dir, exist_ok=True)
+    outputs = [os.path.join(output_dir, os.path.basename(fname)) for fname in fnames]
+    for fname, output in zip(fnames, outputs):
+        if os.path.abspath(fname) == os.path.abspath(output):
+            raise ValueError("The output file {} would overwrite its input, choose another output directory.".format(output))
+    if len(set(outputs)) != len(outputs):
+        raise ValueError("Input files with the same name would be written to the same output file.")
+
+    args = [(fname, output, box, cutoff, center) for fname, output in zip(fnames, outputs)]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers == 1 or len(fnames) <= 1:
+        list(map(_wrap_xyz_file, args))
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(_wrap_xyz_file, args, chunksize=max(1, len(args) // (4 * workers))))
+    return outputs
+
+
+def _wrap_xyz_file(args):
+    """Read, wrap and write one .xyz file for ``wrap_xyz_files``."""
+    fname, output, box, cutoff, center = args
+    atoms, coords = read_xyz(fname)
+    write_xyz(output, atoms, wrap_coordinates(coords, box, cutoff, center))
+
+
+def _as_coordinates(coords):
+    """Float64 array of shape (atom_count, 3)."""
+    coords = np.asarray(coords, dtype=np.float64)
+    if coords.ndim != 2 or coords.shape[1] != 3:
+        raise ValueError("The coordinates should be of shape (atom_count, 3), not {}.".format(coords.shape))
+    return coords
@@ -0,0 +1,505 @@
+"""
+Monitoring of Gaussian 16 jobs on SLURM.
+"""
+
+import csv
+import json
+import os
+import re
+import subprocess
+import numpy as np
+
+#: Classification of jobs reported by ``JobMonitor.check``
+job_statuses = ["Running", "Oscillating", "Complete", "Failed"]
+
+#: SLURM job states of ``sacct`` that are classified as "Failed"
+failed_states = ["FAILED", "CANCELLED", "TIMEOUT", "OUT_OF_MEMORY", "NODE_FAIL", "PREEMPTED", "BOOT_FAIL", "DEADLINE"]
+
+_progress = re.compile(rb"(Step size scaled by|SCF Done:|RMS     Force)([^\n]*)")
+_error = re.compile(rb"error|Error|ERROR")
+
+
+class JobMonitor:
+    """
+    Status of many Gaussian 16 jobs on SLURM, from a single scheduler query per check.
+
+    Each output log of SLURM (e.g., outputlog#####.txt) starts with the job ID ("Job ID: #####", as written by the submission script of ``create_slurm_script``). Only this first line is read, once per file. The Gaussian output of running jobs (e.g., sim#####.out) is scanned in-process for "Step size scaled by" lines, starting from the byte offset reached by the previous check, so that repeated checks only read the data appended since.
+
+    Parameters
+    ----------
+    username : str
+        Your userID on HPC cluster.
+    output_logs : list
+        Paths of the SLURM output logs.
+    error_logs : list, Optional, default=None
+        Paths of the SLURM error logs, in the same order as ``output_logs``. Finished jobs with "error" in their error log are classified as "Failed", others as "Complete". If None, the state reported by ``sacct`` is used instead.
+    gaussian_outputs : list, Optional, default=None
+        Paths of the Gaussian output files written while the jobs run, in the same order as ``output_logs``. By default, the file "sim#####.out" of each "outputlog#####.txt" in ``gaussian_dir``.
+    gaussian_dir : str, Optional, default=None
+        Directory of the default Gaussian outputs, by default the current working directory, i.e., the directory from which the jobs were submitted.
+    n_points : int, Optional, default=5
+        Number of consecutive step size scalings to 0.000 after which a running job is flagged as oscillating.
+    state_file : str, Optional, default=None
+        Path of the state file of the ``OscillationDetector`` used for running jobs, saved after each check. If None, the state is only kept in memory.
+    """
+
+    def __init__(self, username, output_logs, error_logs=None, gaussian_outputs=None, n_points=5, state_file=None, gaussian_dir=None):
+        self.username = username
+        self.gaussian_dir = gaussian_dir
+        self.output_logs = []
+        self.error_logs = None if error_logs is None else []
+        self.gaussian_outputs = []
+        self.n_points = n_points
+        self.detector = OscillationDetector(state_file, n_points=n_points)
+        self._job_ids = {}
+        self._finished = {}
+        self.add_jobs(output_logs, error_logs, gaussian_outputs)
+
+    def add_jobs(self, output_logs, error_logs=None, gaussian_outputs=None):
+        """
+        Add jobs to monitor.
+
+        Parameters
+        ----------
+        output_logs : list
+            Paths of the SLURM output logs.
+        error_logs : list, Optional, default=None
+            Paths of the SLURM error logs, in the same order as ``output_logs``, required if error logs were given on creation.
+        gaussian_outputs : list, Optional, default=None
+            Paths of the Gaussian output files, in the same order as ``output_logs``, see ``JobMonitor``.
+        """
+        output_logs = list(output_logs)
+        if (error_logs is None) != (self.error_logs is None):
+            raise ValueError("Error logs should be given for either all or none of the jobs.")
+        if error_logs is not None and len(error_logs) != len(output_logs):
+            raise ValueError("The number of error logs, {}, does not match that of output logs, {}.".format(len(error_logs), len(output_logs)))
+        if gaussian_outputs is None:
+            gaussian_outputs = [_gaussian_output(fname, directory=self.gaussian_dir) for fname in output_logs]
+        elif len(gaussian_outputs) != len(output_logs):
+            raise ValueError("The number of Gaussian outputs, {}, does not match that of output logs, {}.".format(len(gaussian_outputs), len(output_logs)))
+        self.output_logs.extend(output_logs)
+        if error_logs is not None:
+            self.error_logs.extend(error_logs)
+        self.gaussian_outputs.extend(gaussian_outputs)
+
+    def job_id(self, output_log):
+        """
+        Job ID written on the first line of a SLURM output log, None if the line is not written yet.
+
+        Parameters
+        ----------
+        output_log : str
+            Path of the SLURM output log.
+
+        Returns
+        -------
+        job_id : str
+            The job ID.
+        """
+        if output_log not in self._job_ids:
+            try:
+                with open(output_log, "r") as f:
+                    line = f.readline()
+            except FileNotFoundError:
+                return None
+            if not line.endswith("\n"):
+                return None
+            self._job_ids[output_log] = line[8:].rstrip("\n").strip()
+        return self._job_ids[output_log]
+
+    def scheduler_states(self, finished=False):
+        """
+        State of the jobs of ``username`` known to SLURM, from a single ``squeue`` call, or ``sacct`` call if ``finished=True``.
+
+        Parameters
+        ----------
+        finished : bool, Optional, default=False
+            If True, ``sacct`` is used so that the state of recently finished jobs is also reported.
+
+        Returns
+        -------
+        states : dict
+            Dictionary of job ID to SLURM state, e.g., "RUNNING", "PENDING" or "COMPLETED".
+        """
+        command = scheduler_command(self.username, finished)
+        output = subprocess.run(command, stdout=subprocess.PIPE, check=True, universal_newlines=True).stdout
+        return parse_scheduler_states(output, finished)
+
+    def step_sizes(self, gaussian_output):
+        """
+        Last ``n_points`` values of "Step size scaled by" in a Gaussian output, reading only the lines appended since the previous call.
+
+        Parameters
+        ----------
+        gaussian_output : str
+            Path of the Gaussian output file.
+
+        Returns
+        -------
+        step_sizes : list
+            Values of the last (up to) ``n_points`` step size scalings.
+        """
+        return self.detector.update(gaussian_output)["step_sizes"][-self.n_points :]
+
+    def is_oscillating(self, gaussian_output):
+        """
+        Determine if a running job is oscillating, see ``OscillationDetector.classify``.
+
+        Parameters
+        ----------
+        gaussian_output : str
+            Path of the Gaussian output file.
+
+        Returns
+        -------
+        oscillating : bool
+            True if the job is oscillating.
+        """
+        return self.detector.classify(gaussian_output) is not None
+
+    def check(self, states=None):
+        """
+        Classify each job as "Running", "Oscillating", "Complete" or "Failed".
+
+        The scheduler is queried once. Jobs that are neither pending nor running are classified once, removed from the oscillation detector state, and then skipped in later checks. Jobs whose output log doesn't yet contain a job ID are not reported.
+
+        Parameters
+        ----------
+        states : dict, Optional, default=None
+            Output of ``scheduler_states`` (with ``finished=True`` if no error logs are used), by default queried here.
+
+        Returns
+        -------
+        status : dict
+            Dictionary of each status in ``job_statuses`` to the list of job IDs. Oscillating jobs are also listed as running.
+        """
+        status = {key: [] for key in job_statuses}
+        if states is None:
+            states = self.scheduler_states(finished=self.error_logs is None)
+        for i, output_log in enumerate(self.output_logs):
+            job_id = self.job_id(output_log)
+            if job_id is None:
+                continue
+            if job_id in self._finished:
+                status[self._finished[job_id]].append(job_id)
+                continue
+            state = states.get(job_id)
+            if state in ("RUNNING", "PENDING", "CONFIGURING", "COMPLETING", "REQUEUED", "RESIZING", "SUSPENDED"):
+                status["Running"].append(job_id)
+                if self.is_oscillating(self.gaussian_outputs[i]):
+                    status["Oscillating"].append(job_id)
+                continue
+            if self.error_logs is not None:
+                try:
+                    failed = bool(scan_appended(self.error_logs[i], 0, _error)[0])
+                except FileNotFoundError:
+                    failed = False
+            elif state is None:
+                # Not yet in the accounting records
+                continue
+            else:
+                failed = state.split()[0].rstrip("+") in failed_states
+            self._finished[job_id] = "Failed" if failed else "Complete"
+            status[self._finished[job_id]].append(job_id)
+            # The state file only keeps the jobs still running
+            self.detector.forget(self.gaussian_outputs[i])
+        if self.detector.state_file is not None:
+            self.detector.save()
+        return status
+
+    @staticmethod
+    def write_csv(status, filename="job_status.csv"):
+        """
+        Write the job IDs and status of ``check`` to a csv file.
+
+        Parameters
+        ----------
+        status : dict
+            Output of ``check``.
+        filename : str, Optional, default="job_status.csv"
+            Filename for output csv file
+        """
+        labels = {"Running": "In Progress"}
+        with open(filename, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["JobID", "Status"])
+            for key in job_statuses:
+                for job_id in status[key]:
+                    writer.writerow([job_id, labels.get(key, key)])
+
+
+class OscillationDetector:
+    """
+    Incremental detection of oscillating Gaussian 16 optimizations, following the output files as they grow.
+
+    For each output file, the byte offset reached and rolling windows of the last step size scalings ("Step size scaled by"), SCF energies ("SCF Done") and RMS forces are kept, and optionally saved to a small JSON state file between runs. Each update only reads the data appended since the previous one, so that a periodic check of many running jobs costs about as much as the new output written in between.
+
+    Two types of oscillation are detected:
+
+        - "piecewise", such as what occurs during optimization of large systems with explicit solvent: the last ``n_points`` step sizes were all scaled to 0.000.
+        - "sinusoidal", such as a methyl rotation: after removing the linear trend, the autocorrelation of the energy window has a peak above ``threshold`` past its first zero, the trend is smaller than the oscillation and the RMS force is not converged.
+
+    Parameters
+    ----------
+    state_file : str, Optional, default=None
+        Path of the JSON state file, loaded if it exists. If None, the state is only kept in memory.
+    window : int, Optional, default=50
+        Number of values kept for each quantity.
+    n_points : int, Optional, default=5
+        Number of consecutive step size scalings to 0.000 after which a job is flagged as oscillating.
+    threshold : float, Optional, default=0.6
+        Minimum autocorrelation of the periodic energy peak for sinusoidal oscillation.
+    min_points : int, Optional, default=12
+        Minimum number of energies before sinusoidal oscillation is considered.
+    rms_force : float, Optional, default=0.0003
+        RMS force (Hartree/Bohr) below which the optimization is considered converged, the default threshold of Gaussian.
+    """
+
+    #: Names of the rolling windows kept for each file
+    quantities = ["step_sizes", "energies", "rms_forces"]
+
+    def __init__(self, state_file=None, window=50, n_points=5, threshold=0.6, min_points=12, rms_force=0.0003):
+        if n_points > window:
+            raise ValueError("The number of points, {}, cannot exceed the window, {}.".format(n_points, window))
+        self.state_file = state_file
+        self.window = window
+        self.n_points = n_points
+        self.threshold = threshold
+        self.min_points = min_points
+        self.rms_force = rms_force
+        self.jobs = {}
+        if state_file is not None and os.path.isfile(state_file):
+            with open(state_file, "r") as f:
+                self.jobs = json.load(f)["jobs"]
+
+    def save(self):
+        """Write the state to ``state_file``, replacing it atomically."""
+        if self.state_file is None:
+            raise ValueError("No state file was provided.")
+        tmp = "{}.{}.tmp".format(self.state_file, os.getpid())
+        with open(tmp, "w") as f:
+            json.dump({"version": 1, "jobs": self.jobs}, f)
+        os.replace(tmp, self.state_file)
+
+    def forget(self, fname):
+        """Remove the state of a file, e.g., once its job is finished."""
+        self.jobs.pop(os.path.abspath(fname), None)
+
+    def update(self, fname):
+        """
+        Read the lines appended to a Gaussian output file since the previous update.
+
+        Parameters
+        ----------
+        fname : str
+            Path of the Gaussian output file. A missing file is treated as empty.
+
+        Returns
+        -------
+        state : dict
+            State of the file, with the byte offset reached, "offset", the hexadecimal bytes preceding it, "tail", used to detect a rewritten file, and the lists of the last ``window`` values of each of ``quantities``.
+        """
+        key = os.path.abspath(fname)
+        try:
+            inode = os.stat(key).st_ino
+        except FileNotFoundError:
+            inode = None
+        state = self.jobs.get(key)
+        if state is None or state["inode"] != inode or (inode is not None and _tail(key, state["offset"]) != state["tail"]):
+            # New file, or a file replaced or rewritten, e.g., by a resubmitted job
+            state = {"inode": inode, "offset": 0, "tail": ""}
+            state.update((name, []) for name in self.quantities)
+            self.jobs[key] = state
+        if inode is None:
+            return state
+        matches, offset = scan_appended(key, state["offset"], _progress)
+        if offset < state["offset"]:
+            for name in self.quantities:
+                state[name] = []
+        state["offset"] = offset
+        state["tail"] = _tail(key, offset)
+        for match in matches:
+            label, values = match.group(1), match.group(2).split()
+            try:
+                if label == b"Step size scaled by":
+                    state["step_sizes"].append(float(values[0]))
+                elif label == b"SCF Done:":
+                    state["energies"].append(float(values[2]))
+                else:
+                    state["rms_forces"].append(float(values[0]))
+            except (IndexError, ValueError):
+                continue
+        for name in self.quantities:
+            del state[name][: -self.window]
+        return state
+
+    def classify(self, fname, update=True):
+        """
+        Determine if the job writing a Gaussian output file is oscillating.
+
+        Parameters
+        ----------
+        fname : str
+            Path of the Gaussian output file.
+        update : bool, Optional, default=True
+            If True, the lines appended since the previous update are read first.
+
+        Returns
+        -------
+        oscillation : str
+            Either "piecewise" or "sinusoidal", or None if the job isn't oscillating.
+        """
+        state = self.update(fname) if update else self.jobs.get(os.path.abspath(fname))
+        if state is None:
+            return None
+        step_sizes = state["step_sizes"][-self.n_points :]
+        if len(step_sizes) == self.n_points and all(value < 0.0005 for value in step_sizes):
+            return "piecewise"
+        if state["rms_forces"] and state["rms_forces"][-1] > self.rms_force and _is_periodic(state["energies"], self.threshold, self.min_points):
+            return "sinusoidal"
+        return None
+
+    def check(self, fnames):
+        """
+        Update and classify many Gaussian output files, then save the state if ``state_file`` is set.
+
+        Parameters
+        ----------
+        fnames : list
+            Paths of the Gaussian output files.
+
+        Returns
+        -------
+        oscillation : dict
+            Dictionary of each path to the output of ``classify``.
+        """
+        output = {fname: self.classify(fname) for fname in fnames}
+        if self.state_file is not None:
+            self.save()
+        return output
+
+
+def _tail(fname, offset, size=64):
+    """Hexadecimal string of the (up to) ``size`` bytes of a file preceding ``offset``."""
+    with open(fname, "rb") as f:
+        f.seek(max(0, offset - size))
+        return f.read(min(size, offset)).hex()
+
+
+def _is_periodic(values, threshold, min_points):
+    """Whether the detrended ``values`` oscillate about a trend smaller than the oscillation, from their autocorrelation."""
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n < min_points:
+        return False
+    t = np.arange(n)
+    slope, intercept = np.polyfit(t, values, 1)
+    residual = values - (slope * t + intercept)
+    amplitude = np.ptp(residual)
+    if amplitude == 0 or abs(slope) * (n - 1) > amplitude:
+        return False
+    variance = np.mean(residual**2)
+    lags = np.arange(1, n // 2 + 1)
+    correlation = np.array([np.mean(residual[:-lag] * residual[lag:]) for lag in lags]) / variance
+    negative = np.flatnonzero(correlation < 0)
+    if negative.size == 0:
+        return False
+    return bool(correlation[negative[0] :].max() > threshold)
+
+
+def scheduler_command(username, finished=False):
+    """
+    Command listing the state of the jobs of a user, ``squeue`` or, if ``finished=True``, ``sacct``, see ``parse_scheduler_states``.
+
+    Parameters
+    ----------
+    username : str
+        Your userID on HPC cluster.
+    finished : bool, Optional, default=False
+        If True, ``sacct`` is used so that the state of recently finished jobs is also reported.
+
+    Returns
+    -------
+    command : list
+        Command and arguments.
+    """
+    if finished:
+        return ["sacct", "-u", username, "-X", "-n", "-P", "--format=JobID,State"]
+    return ["squeue", "-u", username, "--noheader", "--format=%A %T"]
+
+
+def parse_scheduler_states(output, finished=False):
+    """
+    Parse the output of the command of ``scheduler_command``.
+
+    Parameters
+    ----------
+    output : str
+        Standard output of the command.
+    finished : bool, Optional, default=False
+        Whether the command is ``sacct``.
+
+    Returns
+    -------
+    states : dict
+        Dictionary of job ID to SLURM state, e.g., "RUNNING", "PENDING" or "COMPLETED". Lines with only a job ID are assumed to be running.
+    """
+    separator = "|" if finished else None
+    states = {}
+    for line in output.splitlines():
+        values = line.strip().strip('"').split(separator)
+        if values and values[0]:
+            states[values[0].strip()] = values[1].split()[0] if len(values) > 1 and values[1].strip() else "RUNNING"
+    return states
+
+
+def scan_appended(fname, offset, pattern, chunk_size=1 << 22):
+    """
+    Find the matches of a byte regular expression in the complete lines appended to a file since ``offset``.
+
+    The file is read in chunks from ``offset``, so that repeated calls only read new data. An incomplete last line is left for the next call. If the file is now smaller than ``offset``, it is assumed to have been replaced and is read from the start.
+
+    Parameters
+    ----------
+    fname : str
+        Path of the file.
+    offset : int
+        Byte offset of the end of the data read by the previous call, 0 for the first call.
+    pattern : re.Pattern
+        Compiled byte regular expression, matches should not span lines.
+    chunk_size : int, Optional, default=4194304
+        Number of bytes read at a time.
+
+    Returns
+    -------
+    matches : list
+        Match objects in the order of the file, whose ``string`` is the chunk containing them.
+    offset : int
+        Byte offset of the end of the last complete line.
+    """
+    matches = []
+    with open(fname, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < offset:
+            offset = 0
+        f.seek(offset)
+        remainder = b""
+        while offset + len(remainder) < size:
+            data = remainder + f.read(min(chunk_size, size - offset - len(remainder)))
+            end = data.rfind(b"\n") + 1
+            if end == 0:
+                if offset + len(data) >= size:
+                    break
+                remainder = data
+                continue
+            matches.extend(pattern.finditer(data, 0, end))
+            offset += end
+            remainder = data[end:]
+    return matches, offset
+
+
+def _gaussian_output(output_log, prefix="outputlog", directory=None):
+    """Gaussian output "sim#####.out" of the SLURM output log "{prefix}#####.txt", in ``directory``, by default the current working directory."""
+    filename = os.path.basename(output_log)
+    name = filename[filename.find(prefix) + len(prefix) :] if prefix in filename else filename
+    return os.path.abspath(os.path.join(os.getcwd() if directory is None else directory, "sim{}.out".format(os.path.splitext(name)[0])))
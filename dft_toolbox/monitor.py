@@ -0,0 +1,158 @@
+"""
+Asynchronous service that monitors Gaussian 16 jobs on SLURM and serves their status as JSON.
+"""
+
+import asyncio
+import glob
+import json
+import os
+import time
+
+from dft_toolbox.jobs import JobMonitor, _gaussian_output, parse_scheduler_states, scheduler_command
+
+
+class MonitorService:
+    """
+    Service polling SLURM and the log directories of Gaussian 16 jobs on an interval, keeping the classification of ``JobMonitor`` in memory.
+
+    The scheduler is queried with an asynchronous subprocess and the log files are scanned in a worker thread, so that the event loop keeps answering requests while a poll is in progress. The status is served as JSON over HTTP, on a local TCP port or a Unix socket, e.g., ``curl http://127.0.0.1:8765/status`` or ``curl --unix-socket monitor.sock http://localhost/status``.
+
+    Parameters
+    ----------
+    username : str
+        Your userID on HPC cluster.
+    directories : list
+        Directories in which the SLURM output logs of the jobs are written, new logs are picked up at each poll.
+    interval : float, Optional, default=60
+        Time (s) between polls.
+    output_prefix : str, Optional, default="outputlog"
+        Prefix of the SLURM output logs, "{output_prefix}#####.txt", whose Gaussian output is "sim#####.out" in the same directory.
+    error_prefix : str, Optional, default="errorlog"
+        Prefix of the SLURM error log of each output log, "{error_prefix}#####.txt". If None, the state of finished jobs is obtained with ``sacct``.
+    state_file : str, Optional, default=None
+        Path of the state file of the ``OscillationDetector``, see ``JobMonitor``.
+    n_points : int, Optional, default=5
+        See ``JobMonitor``.
+    """
+
+    def __init__(self, username, directories, interval=60, output_prefix="outputlog", error_prefix="errorlog", state_file=None, n_points=5):
+        self.username = username
+        self.directories = [directories] if isinstance(directories, str) else list(directories)
+        self.interval = interval
+        self.output_prefix = output_prefix
+        self.error_prefix = error_prefix
+        self.monitor = JobMonitor(username, [], error_logs=None if error_prefix is None else [], n_points=n_points, state_file=state_file)
+        self.status = {"updated": None, "error": None, "jobs": {}}
+        self._known = set()
+        self._stop = None
+
+    def _discover(self):
+        """Add the output logs that appeared in ``directories`` since the previous poll."""
+        new = []
+        for directory in self.directories:
+            for fname in sorted(glob.glob(os.path.join(directory, "{}*.txt".format(self.output_prefix)))):
+                if fname not in self._known:
+                    self._known.add(fname)
+                    new.append(fname)
+        gaussian_outputs = [_gaussian_output(fname, self.output_prefix, directory=os.path.dirname(fname)) for fname in new]
+        error_logs = None
+        if self.error_prefix is not None:
+            error_logs = []
+            for fname in new:
+                path, name = os.path.split(fname)
+                error_logs.append(os.path.join(path, self.error_prefix + name[len(self.output_prefix) :]))
+        self.monitor.add_jobs(new, error_logs, gaussian_outputs)
+
+    def _classify(self, states):
+        self._discover()
+        return self.monitor.check(states)
+
+    async def poll(self):
+        """
+        Query the scheduler and classify the jobs once, updating ``status``.
+
+        Returns
+        -------
+        status : dict
+            Dictionary with the time of the poll, "updated", the error message of a failed poll, "error", and the job IDs of each status of ``job_statuses``, "jobs".
+        """
+        finished = self.error_prefix is None
+        try:
+            process = await asyncio.create_subprocess_exec(*scheduler_command(self.username, finished), stdout=asyncio.subprocess.PIPE)
+            stdout, _ = await process.communicate()
+            if process.returncode != 0:
+                raise RuntimeError("The scheduler command exited with status {}.".format(process.returncode))
+            states = parse_scheduler_states(stdout.decode(), finished)
+            jobs = await asyncio.get_running_loop().run_in_executor(None, self._classify, states)
+        except Exception as e:
+            # Keep serving the last classification
+            self.status = dict(self.status, error="{}: {}".format(type(e).__name__, e))
+        else:
+            self.status = {"updated": time.time(), "error": None, "jobs": jobs}
+        return self.status
+
+    async def _handle(self, reader, writer):
+        """Answer one HTTP request with the JSON status."""
+        try:
+            request = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request.decode("latin-1").split()
+            if len(parts) < 2 or parts[0] != "GET":
+                code, body = "405 Method Not Allowed", {"error": "Only GET is supported."}
+            elif parts[1].split("?")[0] in ("/", "/status"):
+                code, body = "200 OK", self.status
+            else:
+                code, body = "404 Not Found", {"error": "Unknown path {}, use /status.".format(parts[1])}
+            data = json.dumps(body).encode()
+            header = "HTTP/1.0 {}\r\nContent-Type: application/json\r\nContent-Length: {}\r\nConnection: close\r\n\r\n".format(code, len(data))
+            writer.write(header.encode() + data)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def start_server(self, host="127.0.0.1", port=8765, socket_path=None):
+        """
+        Start serving the status, see ``run``.
+
+        Returns
+        -------
+        server : asyncio.base_events.Server
+            The server, already serving.
+        """
+        if socket_path is not None:
+            return await asyncio.start_unix_server(self._handle, path=socket_path)
+        return await asyncio.start_server(self._handle, host=host, port=port)
+
+    async def run(self, host="127.0.0.1", port=8765, socket_path=None):
+        """
+        Serve the status and poll every ``interval`` seconds until ``stop`` is called.
+
+        Parameters
+        ----------
+        host : str, Optional, default="127.0.0.1"
+            Address on which the HTTP server listens.
+        port : int, Optional, default=8765
+            Port on which the HTTP server listens.
+        socket_path : str, Optional, default=None
+            If provided, the server listens on this Unix socket instead of ``host`` and ``port``.
+        """
+        self._stop = asyncio.Event()
+        server = await self.start_server(host, port, socket_path)
+        try:
+            while not self._stop.is_set():
+                await self.poll()
+                try:
+                    await asyncio.wait_for(self._stop.wait(), self.interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            server.close()
+            await server.wait_closed()
+            if socket_path is not None and os.path.exists(socket_path):
+                os.remove(socket_path)
+
+    def stop(self):
+        """Stop ``run`` after the current poll."""
+        if self._stop is not None:
+            self._stop.set()
@@ -0,0 +1,234 @@
+"""
+Automatic cancellation and resubmission of oscillating or failed Gaussian 16 jobs.
+"""
+
+import json
+import os
+import re
+import time
+
+from dft_toolbox import utilities
+from dft_toolbox.gaussian_log import GaussianLog
+from dft_toolbox.jobs import OscillationDetector
+
+_route_token = re.compile(r"[^\s(=]+(?:=?\([^)]*\)|=\S+)?")
+
+
+class ResubmitPolicy:
+    """
+    Policy that cancels oscillating Gaussian 16 jobs, and optionally resubmits failed ones, restarting them from their last geometry with modified optimization keywords.
+
+    Each job is identified by the ``fname`` given to ``create_g16_input`` and ``create_slurm_script``, i.e., its files are "{name}_gas.com", "{name}_PCM.com", "{name}.slurm" and the Gaussian output "{name}_gas.log". A job is restarted by:
+
+        1. cancelling it, if it is still in the queue,
+        2. moving its Gaussian output to "{name}_gas_retry#.log",
+        3. writing new inputs with ``create_g16_input`` from the last complete geometry of that output, with the route sections of the previous inputs and ``opt_options`` added to the "opt" keyword,
+        4. writing a new submission script with ``create_slurm_script`` and submitting it.
+
+    Every scheduler action goes through ``backend``, e.g., ``SlurmBackend`` or ``LocalBackend``, and is appended to the JSON lines ``audit_log``. After ``max_retries`` restarts, an oscillating job is cancelled and abandoned.
+
+    Parameters
+    ----------
+    backend : SlurmBackend
+        Scheduler backend, any object with the ``submit``, ``cancel`` and ``states`` methods of ``SlurmBackend``.
+    slurm_options : dict
+        Keyword arguments of ``create_slurm_script`` besides ``fname`` and ``filename_g16``, e.g., ``{"nodes": 1, "partition": "batch", "mem": 64}``.
+    opt_options : dict, Optional, default={"maxstep": 10}
+        Options added to, or replacing those of, the "opt" keyword of the gas-phase route section, see ``update_route_options``.
+    max_retries : int, Optional, default=2
+        Maximum number of restarts of each job.
+    resubmit_failed : bool, Optional, default=False
+        If True, jobs that left the queue without a normal termination of their gas-phase output are also restarted.
+    audit_log : str, Optional, default="resubmit_audit.jsonl"
+        Path of the JSON lines file to which each action is appended.
+    state_file : str, Optional, default=None
+        Path of the JSON file in which the jobs and their number of restarts are saved after each check, loaded if it exists.
+    detector : OscillationDetector, Optional, default=None
+        Detector of oscillating jobs, by default one with the default settings, kept in memory.
+    """
+
+    def __init__(self, backend, slurm_options, opt_options=None, max_retries=2, resubmit_failed=False, audit_log="resubmit_audit.jsonl", state_file=None, detector=None):
+        self.backend = backend
+        self.slurm_options = dict(slurm_options)
+        self.opt_options = {"maxstep": 10} if opt_options is None else dict(opt_options)
+        self.max_retries = max_retries
+        self.resubmit_failed = resubmit_failed
+        self.audit_log = audit_log
+        self.state_file = state_file
+        self.detector = OscillationDetector() if detector is None else detector
+        self.jobs = {}
+        if state_file is not None and os.path.isfile(state_file):
+            with open(state_file, "r") as f:
+                self.jobs = json.load(f)["jobs"]
+
+    def add_job(self, name, job_id, gaussian_output=None):
+        """
+        Add a submitted job to which the policy applies.
+
+        Parameters
+        ----------
+        name : str
+            The ``fname`` given to ``create_g16_input`` and ``create_slurm_script`` for this job.
+        job_id : str
+            ID of the submitted job.
+        gaussian_output : str, Optional, default=None
+            Path of the gas-phase Gaussian output, by default "{name}_gas.log".
+        """
+        if gaussian_output is None:
+            gaussian_output = "{}_gas.log".format(name)
+        self.jobs[name] = {"job_id": str(job_id), "gaussian_output": gaussian_output, "retries": 0, "status": "active"}
+
+    def check(self):
+        """
+        Query the scheduler once and apply the policy to every active job.
+
+        Returns
+        -------
+        actions : list
+            The audit records of the actions taken, see ``audit_log``.
+        """
+        states = self.backend.states()
+        actions = []
+        for name, job in self.jobs.items():
+            if job["status"] != "active":
+                continue
+            in_queue = job["job_id"] in states
+            if in_queue:
+                if states[job["job_id"]] != "RUNNING":
+                    continue
+                oscillation = self.detector.classify(job["gaussian_output"])
+                if oscillation is None:
+                    continue
+                reason = "{} oscillation".format(oscillation)
+            else:
+                termination = GaussianLog(job["gaussian_output"]).termination if os.path.isfile(job["gaussian_output"]) else None
+                self.detector.forget(job["gaussian_output"])
+                if termination == "normal":
+                    job["status"] = "complete"
+                    continue
+                if not self.resubmit_failed:
+                    job["status"] = "failed"
+                    continue
+                reason = "failed" if termination == "error" else "ended without termination"
+            actions.extend(self.restart(name, reason, cancel=in_queue))
+        if self.state_file is not None:
+            self.save()
+        return actions
+
+    def restart(self, name, reason, cancel=True):
+        """
+        Cancel and restart one job, as described in ``ResubmitPolicy``.
+
+        Parameters
+        ----------
+        name : str
+            Name of the job, see ``add_job``.
+        reason : str
+            Reason recorded in the audit log.
+        cancel : bool, Optional, default=True
+            If True, the job is cancelled first.
+
+        Returns
+        -------
+        actions : list
+            The audit records of the actions taken.
+        """
+        job = self.jobs[name]
+        actions = []
+        if cancel:
+            self.backend.cancel(job["job_id"])
+            actions.append(self._audit(name, "cancel", reason))
+        if job["retries"] >= self.max_retries:
+            job["status"] = "abandoned"
+            actions.append(self._audit(name, "abandon", "reached the maximum of {} retries".format(self.max_retries)))
+            return actions
+
+        gas_log = job["gaussian_output"]
+        if not os.path.isfile(gas_log) or GaussianLog(gas_log)._last_complete_orientation() is None:
+            job["status"] = "abandoned"
+            actions.append(self._audit(name, "abandon", "no geometry in {}".format(gas_log)))
+            return actions
+        gas_route, charge, spin = _read_g16_input("{}_gas.com".format(name))
+        pcm_route = _read_g16_input("{}_PCM.com".format(name))[0]
+        retries = job["retries"] + 1
+        saved_log = "{}_gas_retry{}.log".format(name, retries)
+        os.replace(gas_log, saved_log)
+        self.detector.forget(gas_log)
+
+        utilities.create_g16_input(name, update_route_options(gas_route, self.opt_options), pcm_route, saved_log, charge, spin, last_geometry=True)
+        utilities.create_slurm_script(name, os.path.abspath(name), **self.slurm_options)
+        old_id = job["job_id"]
+        job["job_id"] = self.backend.submit("{}.slurm".format(name))
+        job["retries"] = retries
+        actions.append(self._audit(name, "resubmit", reason, previous_job_id=old_id, restart_log=saved_log))
+        return actions
+
+    def _audit(self, name, action, reason, **kwargs):
+        """Append an action to the audit log and return its record."""
+        job = self.jobs[name]
+        record = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "job": name,
+            "job_id": job["job_id"],
+            "action": action,
+            "reason": reason,
+            "retries": job["retries"],
+        }
+        record.update(kwargs)
+        with open(self.audit_log, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        return record
+
+    def save(self):
+        """Write the jobs to ``state_file``, replacing it atomically."""
+        if self.state_file is None:
+            raise ValueError("No state file was provided.")
+        tmp = "{}.{}.tmp".format(self.state_file, os.getpid())
+        with open(tmp, "w") as f:
+            json.dump({"version": 1, "jobs": self.jobs}, f)
+        os.replace(tmp, self.state_file)
+
+
+def update_route_options(route, options, keyword="opt"):
+    """
+    Add options to a keyword of a Gaussian route section, e.g., "opt=calcfc b3lyp/6-31g(d)" with ``{"maxstep": 10}`` gives "opt=(calcfc,maxstep=10) b3lyp/6-31g(d)".
+
+    Parameters
+    ----------
+    route : str
+        Route section, without the leading "# ".
+    options : dict
+        Dictionary of option to value, None for options without value. Existing options of the same name are replaced.
+    keyword : str, Optional, default="opt"
+        Keyword to which the options are added.
+
+    Returns
+    -------
+    route : str
+        The modified route section.
+    """
+    tokens = _route_token.findall(route)
+    for i, token in enumerate(tokens):
+        name = re.split(r"[=(]", token, maxsplit=1)[0]
+        if name.lower() != keyword.lower():
+            continue
+        values = token[len(name) :].lstrip("=").strip("()")
+        existing = [value.strip() for value in values.split(",") if value.strip()]
+        lowered = {key.lower() for key in options}
+        existing = [value for value in existing if value.split("=")[0].lower() not in lowered]
+        existing += [key if value is None else "{}={}".format(key, value) for key, value in options.items()]
+        tokens[i] = "{}=({})".format(name, ",".join(existing))
+        return " ".join(tokens)
+    raise ValueError("The route section, {}, has no {} keyword.".format(route, keyword))
+
+
+def _read_g16_input(fname):
+    """Route section (without the leading "#"), charge and spin multiplicity of a Gaussian input file written by ``create_g16_input``."""
+    with open(fname, "r") as f:
+        lines = [line.strip() for line in f]
+    start = next(i for i, line in enumerate(lines) if line.startswith("#"))
+    end = lines.index("", start)
+    route = re.sub(r"^#[nNpPtT]?\s*", "", " ".join(lines[start:end]))
+    title_end = lines.index("", end + 1)
+    charge, spin = lines[title_end + 1].split()[:2]
+    return route, int(charge), int(spin)
@@ -0,0 +1,416 @@
+"""
+Packed storage of per-cluster quantities of different lengths, e.g., the frequencies, partial charges and coordinates of clusters of different sizes.
+
+A ``RaggedArray`` holds the values of every cluster in one flat buffer, with the ``offsets`` at which each cluster starts, as in a CSR matrix. Indexing a cluster returns a view of the buffer, reductions over the values of each cluster are single ``np.ufunc.reduceat`` calls, and the buffer can be saved with ``np.save`` and memory-mapped back, so that the quantities of 10^4 clusters are a handful of arrays rather than millions of Python objects. ``extract_ragged`` fills such arrays directly from many Gaussian output files.
+"""
+
+import os
+import numpy as np
+
+from dft_toolbox.batch import parse_logs
+from dft_toolbox.gaussian_log import GaussianLog, atomic_num
+from dft_toolbox.utilities import extract_coordinates
+
+atomic_numbers = {symbol: number for number, symbol in atomic_num.items()}
+
+ragged_fields = ["frequencies", "nbo_charges", "coordinates", "atomic_numbers"]
+
+# Data type and value shape of the ragged array of each field
+_field_layouts = {
+    "frequencies": (np.float64, ()),
+    "nbo_charges": (np.float64, ()),
+    "coordinates": (np.float64, (3,)),
+    "atomic_numbers": (np.int64, ()),
+}
+
+
+class RaggedArray:
+    """
+    Values of many clusters packed in one flat buffer.
+
+    The values of cluster ``i`` are ``data[offsets[i]:offsets[i + 1]]``, each value being a scalar or an array of fixed shape, e.g., the (x, y, z) coordinates of an atom.
+
+    Parameters
+    ----------
+    data : np.ndarray
+        Concatenated values of every cluster, of shape (n_values, ...).
+    offsets : np.ndarray(dtype=np.int)
+        Index of the first value of each cluster followed by the total number of values, of shape (n_clusters + 1,).
+
+    Attributes
+    ----------
+    data : np.ndarray
+        The flat buffer, possibly a memory map, see ``load``.
+    offsets : np.ndarray
+        The offsets of each cluster.
+    """
+
+    __slots__ = ("data", "offsets")
+
+    def __init__(self, data, offsets):
+        data = np.asanyarray(data)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        if data.ndim == 0:
+            raise ValueError("The data should be at least 1-D, as the concatenated values of every cluster.")
+        if offsets.ndim != 1 or len(offsets) == 0 or offsets[0] != 0 or offsets[-1] != len(data) or np.any(np.diff(offsets) < 0):
+            raise ValueError("The offsets should increase from 0 to the number of values, {}.".format(len(data)))
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_sequences(cls, sequences, value_shape=(), dtype=np.float64):
+        """
+        Pack the values of each cluster.
+
+        Parameters
+        ----------
+        sequences : list
+            The values of each cluster, e.g., a list of frequency lists or of coordinate arrays of shape (atom_count, 3).
+        value_shape : tuple, Optional, default=()
+            Shape of each value, used for clusters without any value.
+        dtype : numpy.dtype, Optional, default=np.float64
+            Data type of the buffer.
+
+        Returns
+        -------
+        ragged : RaggedArray
+            The packed values.
+        """
+        builder = RaggedBuilder(value_shape=value_shape, dtype=dtype)
+        for values in sequences:
+            builder.append(values)
+        return builder.finish()
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __repr__(self):
+        return "{}(n_clusters={}, n_values={}, value_shape={})".format(type(self).__name__, len(self), len(self.data), self.value_shape)
+
+    def __getitem__(self, index):
+        """Values of a cluster as a view of the buffer, a ``RaggedArray`` view of a contiguous slice of clusters, or a packed copy of selected clusters."""
+        if isinstance(index, (int, np.integer)):
+            if not -len(self) <= index < len(self):
+                raise IndexError("Cluster {} is out of range for {} clusters.".format(index, len(self)))
+            index = index % len(self)
+            return self.data[self.offsets[index] : self.offsets[index + 1]]
+        if isinstance(index, slice) and index.step in (None, 1):
+            start, stop, _ = index.indices(len(self))
+            stop = max(start, stop)
+            offsets = self.offsets[start : stop + 1]
+            return RaggedArray(self.data[offsets[0] : offsets[-1]], offsets - offsets[0])
+        index = np.arange(len(self))[index]
+        lengths = self.lengths[index]
+        starts = self.offsets[:-1][index]
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        # Position of each selected value in the buffer
+        positions = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return RaggedArray(self.data[positions], offsets)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def lengths(self):
+        """Number of values of each cluster, of shape (n_clusters,)."""
+        return np.diff(self.offsets)
+
+    @property
+    def value_shape(self):
+        """Shape of each value, () for scalars."""
+        return self.data.shape[1:]
+
+    @property
+    def cluster_index(self):
+        """Index of the cluster of each value in the buffer, of shape (n_values,), e.g., to broadcast per-cluster quantities over their values."""
+        return np.repeat(np.arange(len(self)), self.lengths)
+
+    def with_data(self, data):
+        """
+        Ragged array of the same clusters with other values, e.g., the result of an element-wise operation on ``data``.
+
+        Parameters
+        ----------
+        data : np.ndarray
+            New values, of shape (n_values, ...).
+
+        Returns
+        -------
+        ragged : RaggedArray
+            The new values with the offsets of this array.
+        """
+        return RaggedArray(data, self.offsets)
+
+    def padded(self, fill=np.nan):
+        """
+        Values of each cluster padded to the largest cluster.
+
+        Parameters
+        ----------
+        fill : float, Optional, default=np.nan
+            Value of the padding.
+
+        Returns
+        -------
+        padded : np.ndarray
+            Array of shape (n_clusters, max_length, ...).
+        """
+        lengths = self.lengths
+        max_length = int(lengths.max()) if len(lengths) else 0
+        padded = np.full((len(self), max_length) + self.value_shape, fill, dtype=_fill_dtype(self.data.dtype, fill))
+        padded[self.cluster_index, np.arange(len(self.data)) - np.repeat(self.offsets[:-1], lengths)] = self.data
+        return padded
+
+    def reduce(self, ufunc, empty=np.nan):
+        """
+        Reduce the values of each cluster with a binary ufunc.
+
+        Parameters
+        ----------
+        ufunc : numpy.ufunc
+            Binary ufunc, e.g., ``np.add``, ``np.minimum`` or ``np.maximum``.
+        empty : float, Optional, default=np.nan
+            Result of clusters without any value.
+
+        Returns
+        -------
+        reduced : np.ndarray
+            Array of shape (n_clusters, ...).
+        """
+        reduced = np.full((len(self),) + self.value_shape, empty, dtype=_fill_dtype(self.data.dtype, empty))
+        nonempty = self.offsets[:-1] < self.offsets[1:]
+        if np.any(nonempty):
+            # Empty clusters lie between the starts of the non-empty ones and add nothing
+            reduced[nonempty] = ufunc.reduceat(self.data, self.offsets[:-1][nonempty], axis=0)
+        return reduced
+
+    def sum(self):
+        """Sum of the values of each cluster, 0 for empty clusters, of shape (n_clusters, ...)."""
+        return self.reduce(np.add, empty=0)
+
+    def mean(self):
+        """Mean of the values of each cluster, NaN for empty clusters, of shape (n_clusters, ...)."""
+        lengths = self.lengths.reshape((-1,) + (1,) * len(self.value_shape))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.sum() / lengths
+
+    def min(self):
+        """Minimum of the values of each cluster, NaN for empty clusters, of shape (n_clusters, ...)."""
+        return self.reduce(np.minimum)
+
+    def max(self):
+        """Maximum of the values of each cluster, NaN for empty clusters, of shape (n_clusters, ...)."""
+        return self.reduce(np.maximum)
+
+    def save(self, fname):
+        """
+        Save the buffer and the offsets with ``np.save``, as "{fname}_data.npy" and "{fname}_offsets.npy".
+
+        Parameters
+        ----------
+        fname : str
+            Path, without extension, of the saved arrays.
+        """
+        np.save(fname + "_data.npy", np.asarray(self.data))
+        np.save(fname + "_offsets.npy", self.offsets)
+
+    @classmethod
+    def load(cls, fname, mmap_mode="r"):
+        """
+        Load an array written by ``save``, by default memory-mapping the buffer, so that only the clusters that are accessed are read.
+
+        Parameters
+        ----------
+        fname : str
+            Path, without extension, given to ``save``.
+        mmap_mode : str, Optional, default="r"
+            Memory map mode of ``np.load``, or None to read the buffer into memory.
+
+        Returns
+        -------
+        ragged : RaggedArray
+            The saved values.
+        """
+        for suffix in ("_data.npy", "_offsets.npy"):
+            if not os.path.isfile(fname + suffix):
+                raise FileNotFoundError("Could not locate the file {}.".format(fname + suffix))
+        return cls(np.load(fname + "_data.npy", mmap_mode=mmap_mode), np.load(fname + "_offsets.npy"))
+
+
+class RaggedBuilder:
+    """
+    Growable buffer to which the values of one cluster after another are appended, amortizing reallocation by doubling its capacity.
+
+    Parameters
+    ----------
+    value_shape : tuple, Optional, default=()
+        Shape of each value, e.g., (3,) for coordinates.
+    dtype : numpy.dtype, Optional, default=np.float64
+        Data type of the buffer.
+    capacity : int, Optional, default=1024
+        Initial number of values of the buffer.
+    """
+
+    __slots__ = ("_data", "_offsets", "_n_values", "_n_clusters")
+
+    def __init__(self, value_shape=(), dtype=np.float64, capacity=1024):
+        self._data = np.empty((max(1, capacity),) + tuple(value_shape), dtype=dtype)
+        self._offsets = np.zeros(max(1, capacity // 16) + 1, dtype=np.int64)
+        self._n_values = 0
+        self._n_clusters = 0
+
+    def __len__(self):
+        return self._n_clusters
+
+    def append(self, values):
+        """
+        Append the values of the next cluster.
+
+        Parameters
+        ----------
+        values : np.ndarray
+            Values of the cluster, of shape (n, ...), copied into the buffer. None appends a cluster without any value.
+        """
+        value_shape = self._data.shape[1:]
+        values = np.empty((0,) + value_shape) if values is None else np.asarray(values)
+        if values.size == 0:
+            values = values.reshape((0,) + value_shape)
+        if values.shape[1:] != value_shape:
+            raise ValueError("Values of shape {} cannot be appended to values of shape {}.".format(values.shape[1:], value_shape))
+        end = self._n_values + len(values)
+        if end > len(self._data):
+            self._data = _grow(self._data, end)
+        if self._n_clusters + 2 > len(self._offsets):
+            self._offsets = _grow(self._offsets, self._n_clusters + 2)
+        self._data[self._n_values : end] = values
+        self._n_values = end
+        self._n_clusters += 1
+        self._offsets[self._n_clusters] = end
+
+    def finish(self):
+        """
+        Ragged array of the appended clusters, trimmed to their values.
+
+        Returns
+        -------
+        ragged : RaggedArray
+            The appended values.
+        """
+        return RaggedArray(self._data[: self._n_values].copy(), self._offsets[: self._n_clusters + 1].copy())
+
+
+class ClusterRecord:
+    """
+    Arrays of the quantities of one cluster, as extracted by a worker of ``extract_ragged`` and appended to the ragged arrays of all clusters.
+
+    Parameters
+    ----------
+    source : str/GaussianLog
+        Path of a Gaussian .log/.out or .xyz file, or an already indexed ``GaussianLog``.
+    fields : list, Optional, default=("frequencies", "nbo_charges", "coordinates", "atomic_numbers")
+        Quantities to extract, from ``ragged_fields``. Only the coordinates are available from .xyz files, read as by ``extract_coordinates``.
+
+    Attributes
+    ----------
+    frequencies : np.ndarray
+        Harmonic frequencies in cm^(-1), see ``GaussianLog.frequencies``.
+    nbo_charges : np.ndarray
+        Natural population analysis partial charge of each atom, in the order of the atoms, see ``GaussianLog.nbo_charges``.
+    coordinates : np.ndarray
+        Final geometry, of shape (atom_count, 3), in Angstroms.
+    atomic_numbers : np.ndarray(dtype=np.int64)
+        Atomic number of each atom of the final geometry.
+    """
+
+    __slots__ = tuple(ragged_fields)
+
+    def __init__(self, source, fields=tuple(ragged_fields)):
+        for field in ragged_fields:
+            setattr(self, field, None)
+        # parse_logs indexes every path as a GaussianLog
+        path = source.fname if isinstance(source, GaussianLog) else source
+        if os.path.splitext(path)[1] == ".xyz":
+            if any(field != "coordinates" for field in fields):
+                raise ValueError("Only the coordinates can be extracted from the .xyz file {}.".format(path))
+            output = extract_coordinates(path)
+            if isinstance(output, str):
+                raise FileNotFoundError(output)
+            self.coordinates = output[1].reshape(-1, 3)
+            return
+        if not isinstance(source, GaussianLog):
+            source = GaussianLog(source)
+        if "frequencies" in fields:
+            self.frequencies = np.array(source.frequencies, dtype=np.float64)
+        if "nbo_charges" in fields:
+            self.nbo_charges = np.fromiter(source.nbo_charges.values(), dtype=np.float64)
+        if "coordinates" in fields:
+            self.coordinates = source.coordinates
+        if "atomic_numbers" in fields:
+            self.atomic_numbers = np.array([atomic_numbers[atom] for atom in source.atoms], dtype=np.int64)
+
+
+def extract_ragged(paths, fields=("frequencies", "nbo_charges", "coordinates"), workers=None, backend="process"):
+    """
+    Extract per-cluster quantities from many Gaussian .log/.out (or .xyz) files in parallel into ragged arrays.
+
+    Each worker returns a ``ClusterRecord`` of NumPy arrays rather than the lists, dictionaries and strings of ``frequencies``, ``nbo_charges`` and ``extract_coordinates``, and the records are appended to one buffer per quantity, see ``parse_logs``.
+
+    Parameters
+    ----------
+    paths : list
+        Paths of the files to parse.
+    fields : list, Optional, default=("frequencies", "nbo_charges", "coordinates")
+        Quantities to extract, from ``ragged_fields``.
+    workers : int, Optional, default=None
+        Number of worker processes or threads, see ``parse_logs``.
+    backend : str, Optional, default="process"
+        Either "process" or "thread", see ``parse_logs``.
+
+    Returns
+    -------
+    arrays : dict
+        Dictionary of each field to the ``RaggedArray`` of its values, with one cluster per path, in the order of ``paths``. Files that failed, or that lack a quantity, have no values. The atomic numbers are stored as int64, other fields as float64.
+    errors : dict
+        Dictionary of the index in ``paths`` of each failed file to the formatted traceback of the error.
+    """
+    fields = list(fields)
+    for field in fields:
+        if field not in ragged_fields:
+            raise ValueError("Field {} is not supported, choose from: {}".format(field, ", ".join(ragged_fields)))
+    paths = list(paths)
+    results, errors = parse_logs(paths, fields=[_ClusterExtractor(fields)], workers=workers, backend=backend)
+    builders = {}
+    for field in fields:
+        dtype, value_shape = _field_layouts[field]
+        builders[field] = RaggedBuilder(value_shape=value_shape, dtype=dtype, capacity=16 * max(1, len(paths)))
+    for result in results:
+        record = None if result is None else result["cluster_record"]
+        for field, builder in builders.items():
+            builder.append(None if record is None else getattr(record, field))
+    return {field: builder.finish() for field, builder in builders.items()}, errors
+
+
+class _ClusterExtractor:
+    """Picklable extractor of a ``ClusterRecord`` of given fields, for ``parse_logs``."""
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.__name__ = "cluster_record"
+
+    def __call__(self, source):
+        return ClusterRecord(source, self.fields)
+
+
+def _fill_dtype(dtype, fill):
+    """Data type of the values of ``dtype`` and of the ``fill`` of missing values, float64 for integers with a NaN or fractional fill."""
+    if np.issubdtype(dtype, np.integer) and not float(fill).is_integer():
+        return np.float64
+    return dtype
+
+
+def _grow(array, size):
+    """Copy of ``array`` with at least ``size`` rows, doubling its length."""
+    grown = np.empty((max(size, 2 * len(array)),) + array.shape[1:], dtype=array.dtype)
+    grown[: len(array)] = array
+    return grown
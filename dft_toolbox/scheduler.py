@@ -0,0 +1,114 @@
+"""
+Scheduler backends through which jobs are submitted, cancelled and queried.
+
+Any object with the ``submit``, ``cancel`` and ``states`` methods of ``SlurmBackend`` can be used in their place, such as ``LocalBackend`` to test a workflow without a cluster.
+"""
+
+import os
+import subprocess
+
+from dft_toolbox.jobs import parse_scheduler_states, scheduler_command
+
+
+class SlurmBackend:
+    """
+    Submit, cancel and query jobs on SLURM with ``sbatch``, ``scancel`` and ``squeue``.
+
+    Parameters
+    ----------
+    username : str
+        Your userID on HPC cluster.
+    """
+
+    def __init__(self, username):
+        self.username = username
+
+    def submit(self, script, args=None):
+        """
+        Submit a job.
+
+        Parameters
+        ----------
+        script : str
+            Path of the .slurm submission script, submitted from its directory.
+        args : list, Optional, default=None
+            Additional arguments of ``sbatch``, e.g., ``["--array=0-99%20"]``.
+
+        Returns
+        -------
+        job_id : str
+            ID of the submitted job.
+        """
+        path, filename = os.path.split(os.path.abspath(script))
+        command = ["sbatch", "--parsable"] + list(args or []) + [filename]
+        output = subprocess.run(command, stdout=subprocess.PIPE, check=True, universal_newlines=True, cwd=path).stdout
+        return output.strip().split(";")[0]
+
+    def cancel(self, job_id):
+        """
+        Cancel a job.
+
+        Parameters
+        ----------
+        job_id : str
+            ID of the job.
+        """
+        subprocess.run(["scancel", str(job_id)], check=True)
+
+    def states(self):
+        """
+        State of the jobs of ``username`` in the queue, from a single ``squeue`` call.
+
+        Returns
+        -------
+        states : dict
+            Dictionary of job ID to SLURM state, e.g., "RUNNING" or "PENDING".
+        """
+        output = subprocess.run(scheduler_command(self.username), stdout=subprocess.PIPE, check=True, universal_newlines=True).stdout
+        return parse_scheduler_states(output)
+
+
+class LocalBackend:
+    """
+    In-memory stand-in for a scheduler, recording every action instead of running it.
+
+    Submitted jobs are "PENDING" until their state is changed with ``set_state``, and leave the queue when cancelled or with ``finish``.
+
+    Parameters
+    ----------
+    first_id : int, Optional, default=1
+        ID of the first submitted job, following jobs have consecutive IDs.
+    """
+
+    def __init__(self, first_id=1):
+        self.next_id = first_id
+        self.queue = {}
+        self.submitted = []
+        self.cancelled = []
+
+    def submit(self, script, args=None):
+        """Record the submission of ``script`` and return the ID of the new job, see ``SlurmBackend.submit``."""
+        if not os.path.isfile(script):
+            raise FileNotFoundError("Could not locate the submission script {}.".format(script))
+        job_id = str(self.next_id)
+        self.next_id += 1
+        self.queue[job_id] = "PENDING"
+        self.submitted.append((job_id, script, list(args or [])))
+        return job_id
+
+    def cancel(self, job_id):
+        """Remove a job from the queue, see ``SlurmBackend.cancel``."""
+        self.queue.pop(str(job_id), None)
+        self.cancelled.append(str(job_id))
+
+    def states(self):
+        """State of the jobs in the queue, see ``SlurmBackend.states``."""
+        return dict(self.queue)
+
+    def set_state(self, job_id, state="RUNNING"):
+        """Set the state of a job, adding it to the queue if needed."""
+        self.queue[str(job_id)] = state
+
+    def finish(self, job_id):
+        """Remove a job from the queue as if it ended."""
+        self.queue.pop(str(job_id), None)
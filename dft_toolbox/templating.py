@@ -0,0 +1,188 @@
+"""
+Compiled text templates of the generated Gaussian inputs and SLURM submission scripts.
+
+Templates contain named placeholders, ``{{name}}``, and may include other registered templates with ``{{> name}}``. Each template is read and compiled once per process, after which rendering only fills in the placeholders, so that batches of inputs are bounded by disk writes. The templates shipped in ``dft_toolbox/templates`` are registered under the names below, and any of them can be replaced, or new ones added, with ``register_template``:
+
+    - "submission_script": ``submissionScriptTemplate``, used by ``create_slurm_script``
+    - "job_array": ``jobArrayTemplate``, used by ``create_job_array``
+    - "gaussian_environment": ``gaussianEnvironmentTemplate``, the G16 environment settings included in both scripts
+    - "g16_gas" and "g16_pcm": ``g16GasTemplate.com`` and ``g16PCMTemplate.com``, used by ``create_g16_input``
+"""
+
+import os
+import pkgutil
+import re
+
+_placeholder = re.compile(r"\{\{\s*(>?)\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}")
+
+_registry = {
+    "submission_script": ("package", "templates/submissionScriptTemplate"),
+    "job_array": ("package", "templates/jobArrayTemplate"),
+    "gaussian_environment": ("package", "templates/gaussianEnvironmentTemplate"),
+    "g16_gas": ("package", "templates/g16GasTemplate.com"),
+    "g16_pcm": ("package", "templates/g16PCMTemplate.com"),
+}
+_compiled = {}
+
+
+class Template:
+    """
+    Text compiled into literal pieces and named placeholders.
+
+    Parameters
+    ----------
+    text : str
+        Text of the template, with placeholders ``{{name}}`` and includes ``{{> name}}`` of registered templates.
+    name : str, Optional, default=None
+        Name of the template, used in error messages.
+    """
+
+    def __init__(self, text, name=None):
+        self.name = name
+        self._pieces = []
+        self._slots = []
+        self._compile(text, (name,))
+        self.fields = frozenset(field for _, field in self._slots)
+
+    def __repr__(self):
+        return "{}({!r}, fields={})".format(type(self).__name__, self.name, sorted(self.fields))
+
+    def _compile(self, text, parents):
+        """Append the pieces of ``text``, inlining the compiled pieces of included templates."""
+        position = 0
+        for match in _placeholder.finditer(text):
+            self._append(text[position : match.start()])
+            include, field = match.groups()
+            if not include:
+                self._slots.append((len(self._pieces), field))
+                self._pieces.append("")
+            elif field in parents:
+                raise ValueError("The template {} includes itself.".format(field))
+            else:
+                self._compile(_template_text(field), parents + (field,))
+            position = match.end()
+        self._append(text[position:])
+
+    def _append(self, literal):
+        """Append a literal, merged with the previous one if it is not a placeholder."""
+        if not literal:
+            return
+        if self._pieces and (not self._slots or self._slots[-1][0] != len(self._pieces) - 1):
+            self._pieces[-1] += literal
+        else:
+            self._pieces.append(literal)
+
+    def render(self, **values):
+        """
+        Fill in the placeholders.
+
+        Parameters
+        ----------
+        values
+            Value of each placeholder, converted with ``str``. Values of names that are not placeholders are ignored.
+
+        Returns
+        -------
+        text : str
+            The rendered template.
+        """
+        pieces = self._pieces.copy()
+        for index, field in self._slots:
+            try:
+                value = values[field]
+            except KeyError:
+                raise ValueError("No value was provided for the placeholder {} of the template {}.".format(field, self.name)) from None
+            pieces[index] = value if isinstance(value, str) else str(value)
+        return "".join(pieces)
+
+    def write(self, fname, **values):
+        """
+        Render the template into a file, see ``render``.
+
+        Parameters
+        ----------
+        fname : str
+            Path of the file written.
+        values
+            Value of each placeholder.
+        """
+        text = self.render(**values)
+        with open(fname, "w") as f:
+            f.write(text)
+
+
+def register_template(name, fname=None, text=None):
+    """
+    Register a template, replacing any template of the same name, e.g., the "submission_script" of your cluster.
+
+    Parameters
+    ----------
+    name : str
+        Name of the template, used with ``get_template`` and in includes, ``{{> name}}``.
+    fname : str, Optional, default=None
+        Path of the template file, read when the template is first used.
+    text : str, Optional, default=None
+        Text of the template, if ``fname`` is not given.
+    """
+    if (fname is None) == (text is None):
+        raise ValueError("Exactly one of fname or text must be provided.")
+    if fname is not None:
+        if not os.path.isfile(fname):
+            raise FileNotFoundError("Could not locate the template {}.".format(fname))
+        _registry[name] = ("file", os.path.abspath(fname))
+    else:
+        _registry[name] = ("text", text)
+    # Templates including this one are compiled again
+    _compiled.clear()
+
+
+def get_template(name):
+    """
+    Compiled template, cached for the lifetime of the process.
+
+    Parameters
+    ----------
+    name : str
+        Name of the template, see ``register_template``.
+
+    Returns
+    -------
+    template : Template
+        The compiled template.
+    """
+    template = _compiled.get(name)
+    if template is None:
+        template = _compiled[name] = Template(_template_text(name), name=name)
+    return template
+
+
+def render_template(name, **values):
+    """
+    Render a registered template, see ``Template.render``.
+
+    Parameters
+    ----------
+    name : str
+        Name of the template, see ``register_template``.
+    values
+        Value of each placeholder.
+
+    Returns
+    -------
+    text : str
+        The rendered template.
+    """
+    return get_template(name).render(**values)
+
+
+def _template_text(name):
+    """Text of a registered template."""
+    if name not in _registry:
+        raise ValueError("No template is registered as {}, choose from: {}".format(name, ", ".join(sorted(_registry))))
+    kind, source = _registry[name]
+    if kind == "package":
+        return pkgutil.get_data("dft_toolbox", source).decode("utf-8")
+    if kind == "file":
+        with open(source, "r") as f:
+            return f.read()
+    return source
@@ -0,0 +1,463 @@
+"""
+Rigid-rotor harmonic-oscillator (RRHO) ideal gas thermochemistry, evaluated in process from Gaussian16 frequency calculations.
+
+The conventions follow Arkane, so that ``rrho_thermo_from_logs`` can replace the ``create_arkane_input``, Arkane and ``calc_thermo_Arkane`` round trip: frequencies are scaled by the frequency scale factor of the level of theory, the zero-point energy by that factor divided by 1.014, the standard state is 1 bar, and enthalpies are referenced to the elements through the atom energies of ``atom_energies/*.json`` and the experimental enthalpies of formation of the atoms. Use ``compare_thermo_arkane`` to validate the results against an Arkane "chem.inp" file.
+
+All species are evaluated together on padded arrays, and all returned values are in kcal/mol or kcal/(mol*K). The soft modes of explicit solvent clusters can be given a quasi-RRHO treatment with ``quasi_rrho_vibrations``.
+"""
+
+import json
+import pkgutil
+import numpy as np
+
+from dft_toolbox.batch import parse_logs
+from dft_toolbox.gaussian_log import GaussianLog
+from dft_toolbox.ragged import RaggedArray
+from dft_toolbox.utilities import NasaThermoTable, R
+
+planck_constant = 6.62607015e-34  # J*s
+boltzmann_constant = 1.380649e-23  # J/K
+speed_of_light = 29979245800.0  # cm/s
+avogadro = 6.02214076e23  # 1/mol
+amu = 1.66053906660e-27  # kg
+hartree_to_kcal = 627.5094740631  # kcal/mol per Hartree
+
+# Masses (amu) of the most abundant isotope, as used by Gaussian16
+atomic_masses = {
+    "H": 1.00782503207,
+    "C": 12.0,
+    "N": 14.0030740048,
+    "O": 15.99491461956,
+    "Na": 22.9897692809,
+    "S": 31.97207100,
+    "Cl": 34.96885268,
+}
+
+# Enthalpies of formation of the gas-phase atoms at 0 K and their H(298)-H(0) (kcal/mol), as tabulated by Arkane
+atom_enthalpies = {"H": 51.63, "C": 169.98, "N": 112.53, "O": 58.99, "Na": 25.69, "S": 65.66, "Cl": 28.59}
+atom_thermal = {"H": 1.01, "C": 0.25, "N": 1.04, "O": 1.04, "Na": 1.54, "S": 1.05, "Cl": 1.1}
+
+
+def rrho_thermo(frequencies, masses, coordinates, symmetry_number, temperatures, E0=0.0, spinMultiplicity=1, opticalIsomers=1, linear=None, frequency_scale=1.0, pressure=100000.0):
+    """
+    Calculate the ideal gas RRHO Cp(T), H(T), S(T) and G(T) of several species over a grid of temperatures.
+
+    Parameters
+    ----------
+    frequencies : np.ndarray(dtype=np.float)
+        Unscaled harmonic frequencies (cm^(-1)), of shape (n_species, n_modes), padded with NaN for species with fewer modes. A list of the frequency lists of each species, or a ``RaggedArray``, is padded automatically. Imaginary (negative) frequencies are ignored.
+    masses : np.ndarray(dtype=np.float)
+        Atomic masses (amu), of shape (n_species, n_atoms), padded with zeros, or a list of the mass lists of each species.
+    coordinates : np.ndarray(dtype=np.float)
+        Atomic coordinates (Angstrom), of shape (n_species, n_atoms, 3), or a list of the coordinate arrays of each species, or a ``RaggedArray``.
+    symmetry_number : int/np.ndarray(dtype=np.int)
+        External rotational symmetry number of each species, of shape (n_species,).
+    temperatures : float/np.ndarray(dtype=np.float)
+        Absolute temperature(s) (K), of shape (n_T,).
+    E0 : float/np.ndarray(dtype=np.float), Optional, default=0.0
+        Ground state energy (kcal/mol) of each species, including the zero-point energy, see ``zero_point_energy``.
+    spinMultiplicity : int/np.ndarray(dtype=np.int), Optional, default=1
+        Spin multiplicity of each species.
+    opticalIsomers : int/np.ndarray(dtype=np.int), Optional, default=1
+        Number of optical isomers of each species.
+    linear : bool/np.ndarray(dtype=bool), Optional, default=None
+        Whether each species is linear. If None, species are linear if their smallest principal moment of inertia vanishes.
+    frequency_scale : float, Optional, default=1.0
+        Scale factor of the harmonic frequencies.
+    pressure : float, Optional, default=100000.0
+        Standard state pressure (Pa) of the translational entropy.
+
+    Returns
+    -------
+    thermo : np.ndarray
+        Array of shape (n_species, n_T, 4) containing the Cp, H, S, and G of each species at each temperature, as returned by ``NasaThermoTable.evaluate``.
+    """
+    frequencies = _pad(frequencies, np.nan)
+    masses = _pad(masses, 0.0)
+    coordinates = _pad(coordinates, 0.0)
+    n_species = len(frequencies)
+    if masses.ndim != 2 or len(masses) != n_species or coordinates.shape != masses.shape + (3,):
+        raise ValueError("The masses, {}, and coordinates, {}, should be of shape (n_species, n_atoms) and (n_species, n_atoms, 3), with n_species={}.".format(masses.shape, coordinates.shape, n_species))
+    T = np.atleast_1d(np.asarray(temperatures, dtype=np.float64))[np.newaxis, :]
+
+    def per_species(values, dtype=np.float64):
+        return np.broadcast_to(np.asarray(values, dtype=dtype), (n_species,))[:, np.newaxis]
+
+    # Translation, with the PV term of the ideal gas
+    molecular_mass = masses.sum(axis=1)[:, np.newaxis] * amu
+    S = R * (np.log((2 * np.pi * molecular_mass * boltzmann_constant * T / planck_constant ** 2) ** 1.5 * boltzmann_constant * T / pressure) + 2.5)
+    Cp = np.full(S.shape, 2.5 * R)
+    H = 2.5 * R * T
+
+    # Rotation, classical rigid rotor
+    moments = principal_moments(masses, coordinates)
+    atoms = np.sum(masses > 0, axis=1)
+    if linear is None:
+        linear = moments[:, 0] < 1e-3 * np.maximum(moments[:, 2], 1e-300)
+    linear = np.broadcast_to(np.asarray(linear, dtype=bool), (n_species,)) & (atoms > 1)
+    nonlinear = ~linear & (atoms > 1)
+    # Rotational temperatures (K) from the moments of inertia (amu*Angstrom^2)
+    with np.errstate(divide="ignore"):
+        theta = planck_constant ** 2 / (8 * np.pi ** 2 * moments * amu * 1e-20 * boltzmann_constant)
+        log_sigma = np.log(per_species(symmetry_number))
+        S_linear = R * (np.log(T) - np.log(theta[:, 2:3]) - log_sigma + 1)
+        S_nonlinear = R * (0.5 * np.log(np.pi) + 1.5 * np.log(T) - 0.5 * np.sum(np.log(theta), axis=1, keepdims=True) - log_sigma + 1.5)
+    S += np.where(linear[:, np.newaxis], S_linear, np.where(nonlinear[:, np.newaxis], S_nonlinear, 0))
+    rotors = np.where(linear, 1.0, np.where(nonlinear, 1.5, 0.0))[:, np.newaxis]
+    Cp += rotors * R
+    H = H + rotors * R * T
+
+    # Vibration, harmonic oscillators excluding the zero-point energy
+    H_vib, S_vib, Cv_vib = _harmonic_oscillators(frequencies * frequency_scale, T)
+    Cp += Cv_vib
+    H = H + H_vib
+    S += S_vib
+
+    # Electronic and optical isomer degeneracies
+    S += R * (np.log(per_species(spinMultiplicity)) + np.log(per_species(opticalIsomers)))
+    H = H + per_species(E0)
+
+    thermo = np.empty((n_species, T.shape[1], 4), dtype=np.float64)
+    thermo[..., 0] = Cp
+    thermo[..., 1] = H
+    thermo[..., 2] = S
+    thermo[..., 3] = H - T * S
+    return thermo
+
+
+def zero_point_energy(frequencies, scale=1.0):
+    """
+    Calculate the harmonic zero-point energy of several species.
+
+    Parameters
+    ----------
+    frequencies : np.ndarray(dtype=np.float)
+        Harmonic frequencies (cm^(-1)), of shape (n_species, n_modes), padded with NaN, or a list of the frequency lists of each species. Imaginary (negative) frequencies are ignored.
+    scale : float, Optional, default=1.0
+        Scale factor of the zero-point energy.
+
+    Returns
+    -------
+    zpe : np.ndarray
+        Zero-point energy (kcal/mol) of each species, of shape (n_species,).
+    """
+    frequencies = _pad(frequencies, np.nan)
+    frequencies = np.where(frequencies > 0, frequencies, 0)
+    return 0.5 * planck_constant * speed_of_light * avogadro / 4184 * scale * np.sum(frequencies, axis=-1)
+
+
+def quasi_rrho_vibrations(frequencies, temperatures, offsets=None, method="grimme", cutoff=100.0, alpha=4, average_moment=1e-44, frequency_scale=1.0, chunk_size=1 << 22):
+    """
+    Calculate the vibrational enthalpy and entropy of many clusters with a quasi-RRHO treatment of their low frequency modes.
+
+    Harmonic entropies diverge as frequencies vanish, so that the soft modes of explicit solvent clusters dominate their entropy. With the "grimme" method, the entropy of each mode is interpolated between the harmonic oscillator and a free rotor of the same moment of inertia (Grimme, Chem. Eur. J. 2012, 18, 9955), and its energy between the harmonic oscillator and the classical rotor energy RT/2 (Li et al., J. Phys. Chem. C 2015, 119, 4242), with the weight ``1 / (1 + (cutoff / frequency)**alpha)``. With the "truhlar" method, frequencies below ``cutoff`` are raised to ``cutoff`` (Ribeiro et al., J. Phys. Chem. B 2011, 115, 14556). The "harmonic" method applies no correction.
+
+    The modes of all clusters are evaluated together as one flat array, so that the frequencies may be given either padded, of shape (n_clusters, n_modes) with NaN padding, or packed, as the concatenated frequencies of every cluster and the ``offsets`` at which each cluster starts, as in a CSR matrix.
+
+    Parameters
+    ----------
+    frequencies : np.ndarray(dtype=np.float)/RaggedArray
+        Unscaled harmonic frequencies (cm^(-1)), padded of shape (n_clusters, n_modes), packed of shape (n_modes_total,) with ``offsets``, a ``RaggedArray``, or a list of the frequency lists of each cluster. Imaginary (negative) frequencies are ignored.
+    temperatures : float/np.ndarray(dtype=np.float)
+        Absolute temperature(s) (K), of shape (n_T,).
+    offsets : np.ndarray(dtype=np.int), Optional, default=None
+        For packed frequencies, the index of the first mode of each cluster followed by the total number of modes, of shape (n_clusters + 1,).
+    method : str, Optional, default="grimme"
+        Either "grimme", "truhlar" or "harmonic".
+    cutoff : float, Optional, default=100.0
+        Frequency (cm^(-1)) below which modes are treated as rotors ("grimme") or raised ("truhlar").
+    alpha : int, Optional, default=4
+        Exponent of the interpolation weight of the "grimme" method.
+    average_moment : float, Optional, default=1e-44
+        Average molecular moment of inertia (kg*m^2) limiting the moment of inertia of the free rotors of the "grimme" method.
+    frequency_scale : float, Optional, default=1.0
+        Scale factor of the harmonic frequencies.
+    chunk_size : int, Optional, default=4194304
+        Maximum number of (temperature, mode) elements evaluated at once, to bound memory.
+
+    Returns
+    -------
+    H_vib : np.ndarray
+        Vibrational energy (kcal/mol) of each cluster, including the zero-point energy, of shape (n_clusters, n_T).
+    S_vib : np.ndarray
+        Vibrational entropy (kcal/(mol*K)) of each cluster, of shape (n_clusters, n_T).
+    """
+    method = method.lower()
+    if method not in ("grimme", "truhlar", "harmonic"):
+        raise ValueError("The method, {}, should be either 'grimme', 'truhlar' or 'harmonic'.".format(method))
+    if isinstance(frequencies, RaggedArray):
+        frequencies, offsets = frequencies.data, frequencies.offsets
+    if offsets is None:
+        frequencies = _pad(frequencies, np.nan)
+        if frequencies.ndim != 2:
+            raise ValueError("Padded frequencies should be of shape (n_clusters, n_modes), given: {}".format(frequencies.shape))
+        valid = ~np.isnan(frequencies)
+        offsets = np.concatenate([[0], np.cumsum(valid.sum(axis=1))])
+        frequencies = frequencies[valid]
+    else:
+        frequencies = np.asarray(frequencies, dtype=np.float64)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        if frequencies.ndim != 1 or offsets.ndim != 1 or offsets[0] != 0 or offsets[-1] != len(frequencies) or np.any(np.diff(offsets) < 0):
+            raise ValueError("Packed frequencies should be of shape (n_modes_total,), with increasing offsets from 0 to n_modes_total.")
+    frequencies = frequencies * frequency_scale
+    # Imaginary modes are dropped, and the offsets of each cluster moved accordingly
+    valid = frequencies > 0
+    offsets = np.concatenate([[0], np.cumsum(_segment_sums(valid, offsets))]).astype(np.int64)
+    frequencies = frequencies[valid]
+    if method == "truhlar":
+        frequencies = np.maximum(frequencies, cutoff)
+
+    temperatures = np.atleast_1d(np.asarray(temperatures, dtype=np.float64))
+    H_vib, S_vib = (np.empty((len(offsets) - 1, len(temperatures))) for _ in range(2))
+    if method == "grimme":
+        weight = 1 / (1 + (cutoff / frequencies) ** alpha)
+        # Moment of inertia (kg*m^2) of a free rotor of the same frequency, limited by the average molecular moment
+        moment = planck_constant / (8 * np.pi ** 2 * frequencies * speed_of_light)
+        moment = moment * average_moment / (moment + average_moment)
+        log_moment = 0.5 * np.log(8 * np.pi ** 3 * moment * boltzmann_constant / planck_constant ** 2)
+    frequencies = frequencies * (planck_constant * speed_of_light / boltzmann_constant)
+    step = max(1, chunk_size // max(1, len(frequencies)))
+    for start in range(0, len(temperatures), step):
+        T = temperatures[start : start + step, np.newaxis]
+        x = frequencies / T
+        boltzmann_factor = np.exp(-x)
+        # x * occupation, with the occupation 1 / (exp(x) - 1) of each mode
+        x_occupation = x * boltzmann_factor
+        x_occupation /= 1 - boltzmann_factor
+        S = np.log1p(-boltzmann_factor, out=boltzmann_factor)
+        np.subtract(x_occupation, S, out=S)
+        H = x_occupation
+        H += 0.5 * x
+        if method == "grimme":
+            H *= weight
+            H += (1 - weight) * 0.5
+            S *= weight
+            S += (1 - weight) * (0.5 + 0.5 * np.log(T) + log_moment)
+        H_vib[:, start : start + step] = (R * T * _segment_sums(H, offsets)).T
+        S_vib[:, start : start + step] = (R * _segment_sums(S, offsets)).T
+    return H_vib, S_vib
+
+
+def principal_moments(masses, coordinates):
+    """
+    Calculate the principal moments of inertia of several species.
+
+    Parameters
+    ----------
+    masses : np.ndarray(dtype=np.float)
+        Atomic masses (amu), of shape (n_species, n_atoms), padded with zeros.
+    coordinates : np.ndarray(dtype=np.float)
+        Atomic coordinates (Angstrom), of shape (n_species, n_atoms, 3).
+
+    Returns
+    -------
+    moments : np.ndarray
+        Principal moments of inertia (amu*Angstrom^2) in ascending order, of shape (n_species, 3).
+    """
+    masses = np.asarray(masses, dtype=np.float64)
+    coordinates = np.asarray(coordinates, dtype=np.float64)
+    total = np.maximum(masses.sum(axis=-1, keepdims=True), 1e-300)
+    center = np.einsum("...a,...ax->...x", masses, coordinates) / total
+    r = coordinates - center[..., np.newaxis, :]
+    second = np.einsum("...a,...ax,...ay->...xy", masses, r, r)
+    tensor = np.trace(second, axis1=-2, axis2=-1)[..., np.newaxis, np.newaxis] * np.eye(3) - second
+    return np.clip(np.linalg.eigvalsh(tensor), 0, None)
+
+
+def atomization_energy(energies, atoms, method, basis):
+    """
+    Convert electronic energies to energies relative to the elements in their standard state at 0 K, as Arkane does with atom energies.
+
+    Parameters
+    ----------
+    energies : float/np.ndarray(dtype=np.float)
+        Electronic energy (Hartree) of each species.
+    atoms : list
+        List of the atomic symbols of each species.
+    method : str
+        Method of the level of theory, the first portion of the atom energies filename.
+    basis : str
+        Basis set of the level of theory, the second portion of the atom energies filename.
+
+    Returns
+    -------
+    E0 : np.ndarray
+        Energy (kcal/mol) of each species, without zero-point energy.
+    """
+    atom_energies = _atom_energy_data(method, basis).get("atomEnergies")
+    if atom_energies is None:
+        raise ValueError("Internal atom energies file, atom_energies/{}_{}.json, does not contain atom energies!".format(method, basis))
+    E0 = np.array(energies, dtype=np.float64) * hartree_to_kcal
+    for i, symbols in enumerate(atoms):
+        for atom in symbols:
+            if atom not in atom_energies or atom not in atom_enthalpies:
+                raise ValueError("No atom energy or enthalpy of formation is available for {} at {}/{}.".format(atom, method, basis))
+            E0[i] += atom_enthalpies[atom] - atom_thermal[atom] - atom_energies[atom] * hartree_to_kcal
+    return E0
+
+
+def rrho_thermo_from_logs(species_specs, temperatures, method=None, basis=None, workers=None, backend="process"):
+    """
+    Calculate the RRHO thermochemistry of many species directly from their Gaussian16 frequency calculations, as Arkane would from the inputs of ``create_arkane_inputs``.
+
+    The frequencies, final geometry, symmetry number and electronic energy of every log are extracted in parallel with ``parse_logs``. The frequency scale factor and atom energies of ``atom_energies/{method}_{basis}.json`` are applied if a level of theory is given, otherwise the frequencies are unscaled and enthalpies are the absolute electronic energies plus thermal corrections.
+
+    Parameters
+    ----------
+    species_specs : list
+        A list of dictionaries of the arguments of ``create_arkane_input`` for each species, e.g., ``{"name": "sim1", "freq_log": "sim1_gas.log", "pcm_log": "sim1_PCM.log"}``. The electronic energy is read from "pcm_log" if given, and from "freq_log" otherwise.
+    temperatures : float/np.ndarray(dtype=np.float)
+        Absolute temperature(s) (K), of shape (n_T,).
+    method : str, Optional, default=None
+        Method of the level of theory, see ``write_arkane_input_header``.
+    basis : str, Optional, default=None
+        Basis set of the level of theory, see ``write_arkane_input_header``.
+    workers : int, Optional, default=None
+        Number of workers, see ``parse_logs``.
+    backend : str, Optional, default="process"
+        Either "process" or "thread", see ``parse_logs``.
+
+    Returns
+    -------
+    names : list
+        Names of the species.
+    thermo : np.ndarray
+        Array of shape (n_species, n_T, 4) containing the Cp, H, S, and G of each species at each temperature, see ``rrho_thermo``.
+    """
+    species_specs = list(species_specs)
+    names = [spec["name"] for spec in species_specs]
+    freq_logs = [spec["freq_log"] for spec in species_specs]
+    energy_logs = [spec.get("pcm_log") or spec["freq_log"] for spec in species_specs]
+    results, errors = parse_logs(freq_logs, fields=[_rrho_record], workers=workers, backend=backend)
+    energies, energy_errors = parse_logs(energy_logs, fields=[_scf_energy], workers=workers, backend=backend)
+    if errors or energy_errors:
+        i = min(set(errors) | set(energy_errors))
+        raise ValueError("Could not read the calculations of {}:\n{}".format(names[i], errors.get(i) or energy_errors[i]))
+    records = [values["_rrho_record"] for values in results]
+    energies = np.array([values["_scf_energy"] for values in energies], dtype=np.float64)
+    atoms = [record["atoms"] for record in records]
+    unknown = {atom for symbols in atoms for atom in symbols if atom not in atomic_masses}
+    if unknown:
+        raise ValueError("No atomic mass is available for {}.".format(", ".join(sorted(unknown))))
+
+    frequencies = [record["frequencies"] for record in records]
+    if method is None or basis is None:
+        frequency_scale = zpe_scale = 1.0
+        E0 = energies * hartree_to_kcal
+    else:
+        frequency_scale = _atom_energy_data(method, basis).get("frequencyScaleFactor", 1.0)
+        # Arkane scales the zero-point energy by the frequency scale factor divided by 1.014
+        zpe_scale = frequency_scale / 1.014
+        E0 = atomization_energy(energies, atoms, method, basis)
+    E0 = E0 + zero_point_energy(frequencies, zpe_scale)
+
+    linear = [spec.get("linear") for spec in species_specs]
+    thermo = rrho_thermo(
+        frequencies,
+        [[atomic_masses[atom] for atom in symbols] for symbols in atoms],
+        [record["coordinates"] for record in records],
+        [record["symmetry_number"] or 1 for record in records],
+        temperatures,
+        E0=E0,
+        spinMultiplicity=[spec.get("spinMultiplicity", 1) for spec in species_specs],
+        opticalIsomers=[spec.get("opticalIsomers", 1) for spec in species_specs],
+        linear=None if all(value is None for value in linear) else [bool(value) for value in linear],
+        frequency_scale=frequency_scale,
+    )
+    return names, thermo
+
+
+def compare_thermo_arkane(names, thermo, fname, temperatures):
+    """
+    Differences between native thermochemistry and the NASA polynomials fitted by Arkane, to validate ``rrho_thermo_from_logs``.
+
+    Parameters
+    ----------
+    names : list
+        Names of the species, as in the Arkane chemkin file.
+    thermo : np.ndarray
+        Array of shape (n_species, n_T, 4) of the Cp, H, S, and G of each species, as returned by ``rrho_thermo_from_logs``.
+    fname : str/NasaThermoTable
+        Path of the chem.inp file output from Arkane, or an already read ``NasaThermoTable``.
+    temperatures : float/np.ndarray(dtype=np.float)
+        The absolute temperature(s) (K) at which ``thermo`` was evaluated.
+
+    Returns
+    -------
+    differences : np.ndarray
+        Array of shape (n_species, n_T, 4) of ``thermo`` minus the Arkane values. Temperatures outside of the fitted range of a species result in NaN values.
+    """
+    table = fname if isinstance(fname, NasaThermoTable) else NasaThermoTable.from_chemkin(fname)
+    missing = [name for name in names if name not in table.index]
+    if missing:
+        raise ValueError("Species {} are not in the Arkane output.".format(", ".join(missing)))
+    return np.asarray(thermo, dtype=np.float64) - table.evaluate(temperatures, species=names)
+
+
+def _harmonic_oscillators(frequencies, T, chunk_size=1 << 22):
+    """Thermal enthalpy (without zero-point energy), entropy and heat capacity of the harmonic modes, of shape (n_species, n_T), evaluated on blocks of species of at most ``chunk_size`` (species, temperature, mode) elements."""
+    n_species, n_modes = frequencies.shape
+    H, S, Cv = (np.empty((n_species, T.shape[1])) for _ in range(3))
+    step = max(1, chunk_size // max(1, T.shape[1] * n_modes))
+    for start in range(0, n_species, step):
+        block = slice(start, start + step)
+        valid = (frequencies[block] > 0)[:, np.newaxis, :]
+        x = planck_constant * speed_of_light * np.where(valid, frequencies[block, np.newaxis, :], 1.0) / (boltzmann_constant * T[..., np.newaxis])
+        with np.errstate(over="ignore"):
+            occupation = np.where(valid, 1 / np.expm1(x), 0)
+            H[block] = R * T * np.sum(x * occupation, axis=-1)
+            S[block] = R * np.sum(x * occupation - np.where(valid, np.log1p(-np.exp(-x)), 0), axis=-1)
+            Cv[block] = R * np.sum(x ** 2 * occupation * (1 + occupation), axis=-1)
+    return H, S, Cv
+
+
+def _segment_sums(values, offsets):
+    """Sums along the last axis of ``values`` between consecutive ``offsets``, empty segments summing to 0."""
+    offsets = np.asarray(offsets)
+    sums = np.zeros(values.shape[:-1] + (len(offsets) - 1,))
+    nonempty = offsets[:-1] < offsets[1:]
+    if np.any(nonempty):
+        # Empty segments lie between the starts of the non-empty ones and add nothing
+        sums[..., nonempty] = np.add.reduceat(values, offsets[:-1][nonempty], axis=-1, dtype=np.float64)
+    return sums
+
+
+def _pad(values, fill):
+    """Array of ``values``, padding the sequences of each species with ``fill`` if they are of different lengths."""
+    if isinstance(values, RaggedArray):
+        return values.padded(fill)
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except ValueError:
+        pass
+    values = [np.asarray(value, dtype=np.float64) for value in values]
+    shape = (len(values),) + tuple(np.max([value.shape for value in values], axis=0))
+    padded = np.full(shape, fill, dtype=np.float64)
+    for i, value in enumerate(values):
+        padded[(i,) + tuple(slice(0, n) for n in value.shape)] = value
+    return padded
+
+
+def _atom_energy_data(method, basis):
+    """Contents of the internal atom energies file of a level of theory."""
+    try:
+        data = pkgutil.get_data("dft_toolbox", "atom_energies/{}_{}.json".format(method, basis))
+    except FileNotFoundError:
+        raise ValueError("No internal atom energies file is available for {}/{}.".format(method, basis)) from None
+    return json.loads(data)
+
+
+def _rrho_record(source):
+    """Frequencies, atoms, coordinates and symmetry number of the frequency calculation of a path or ``GaussianLog``."""
+    if not isinstance(source, GaussianLog):
+        source = GaussianLog(source)
+    return {"frequencies": source.frequencies, "atoms": source.atoms, "coordinates": source.coordinates, "symmetry_number": source.symmetry_number}
+
+
+def _scf_energy(source):
+    """Electronic energy of a path or ``GaussianLog``, see ``GaussianLog.scf_energy``."""
+    if not isinstance(source, GaussianLog):
+        source = GaussianLog(source)
+    if source.scf_energy is None:
+        raise ValueError("No SCF energy was found in {}.".format(source.fname))
+    return source.scf_energy
@@ -4,24 +4,23 @@ Created on Wed Jul 27 15:09:58 2022
 @author: hnr2 & jac16
 """
 
-import io, os, pkgutil, subprocess
+import os, pkgutil
+import functools
 import numpy as np
 import pandas as pd
+from scipy.special import logsumexp, ndtr, ndtri
 import glob
 import json
 import warnings
 
+from dft_toolbox.gaussian_log import GaussianLog, atomic_num
+from dft_toolbox.cache import cached_parser
+from dft_toolbox.jobs import JobMonitor
+from dft_toolbox.geometry import distance_matrix, iter_clusters, read_xyz, wrap_coordinates, write_xyz
+from dft_toolbox.templating import get_template
+
 R = 0.0019872042586408316  # kcal/(mol*K)
 
-atomic_num = {
-    1: 'H',
-    6: 'C',
-    7: 'N',
-    8: 'O',
-    11: 'Na',
-    16: 'S',
-    17: 'Cl'
-}
 
 def modify_coordinates(coords, box_size, wrap_cutoff):
     """
@@ -41,19 +40,18 @@ def modify_coordinates(coords, box_size, wrap_cutoff):
     modified : list
         A wrapped list of coordinates
     """
-    modified = [coords[i] - coords[0] for i in range(len(coords))]
-    for num, coord in enumerate(modified):
-        if coord > wrap_cutoff:
-            modified[num] -= box_size
-        elif coord < -wrap_cutoff:
-            modified[num] += box_size
-    return modified
+    modified = np.asarray(coords, dtype=np.float64)
+    modified = modified - modified[0]
+    modified -= box_size * (np.sign(modified) * (np.abs(modified) > wrap_cutoff))
+    return list(modified)
 
 
-def coordinate_wrapper(fname, box_size, wrap_cutoff):
+def coordinate_wrapper(fname, box_size, wrap_cutoff, output=None):
     """
     Modifies the .xyz file based on the box size to wrap the coordinates.
 
+    See ``wrap_coordinates`` to wrap arrays of coordinates of many frames at once, and ``wrap_xyz_files`` to wrap many files in parallel.
+
     Parameters
     ----------
     fname : str
@@ -62,34 +60,20 @@ def coordinate_wrapper(fname, box_size, wrap_cutoff):
         The exact box size to wrap around
     wrap_cutoff : float
         The exact cutoff distance to wrap beyond in Angstroms
+    output : str, Optional, default=None
+        The path of a new .xyz file to write the wrapped coordinates to. If None, the provided .xyz file is itself modified.
 
     Returns
     ------
-    Nothing is returned. The provided .xyz file is itself modified.
+    Nothing is returned. The provided .xyz file, or ``output``, is written.
     """
-    coords = np.transpose(extract_coordinates(fname)[1])
-    with open(fname, 'r') as f:
-        lines = f.readlines()[2:]
-    for num, line in enumerate(lines):
-        lines[num] = line.split()
-    for num, line in enumerate(lines):
-        if len(line) == 0:
-            lines.remove(lines[num])
-    atom_types = []
-    for num, line in enumerate(lines):
-        atom_types.append(line[0])
-    x_coords = modify_coordinates(coords[0], box_size, wrap_cutoff)
-    y_coords = modify_coordinates(coords[1], box_size, wrap_cutoff)
-    z_coords = modify_coordinates(coords[2], box_size, wrap_cutoff)
-    with open(fname, 'w') as f:
-        f.write("\n")
-        for num, line in enumerate(lines):
-            toWrite = '\n' + ' '*10 + atom_types[num] + ' '*10 + f'{x_coords[num]:.5f}' + f'     {y_coords[num]:.5f}' + f'     {z_coords[num]:.5f}'
-            f.write(toWrite)
+    atoms, coords = read_xyz(fname)
+    write_xyz(fname if output is None else output, atoms, wrap_coordinates(coords, box_size, wrap_cutoff))
+
 
 def checkOscillatingJob(runningJobIDs, outputLogs, n_points=5):
     """
-    Determine if job is oscillating. Two types: sinusoidal type, such as methyl rotation, or other piecewise oscillation, such as what occurs during optimization of large systems with explicit solvent. This function only supports type 2 for now...
+    Determine if job is oscillating. Two types: sinusoidal type, such as methyl rotation, or other piecewise oscillation, such as what occurs during optimization of large systems with explicit solvent. Both types are detected with ``OscillationDetector``.
 
     MAKE SURE THE ".OUT" FILENAMES ARE EQUIVALENT TO THE OUTPUTLOG NUMBERING SCHEME: outputlog#####.txt --> sim#####.out
     Parameters
@@ -103,31 +87,16 @@ def checkOscillatingJob(runningJobIDs, outputLogs, n_points=5):
 
     Returns
     ------
+    status : list
+        For each output log of a running job, in sorted order, True if the job is oscillating. See ``JobMonitor``.
 
     """
     outputLogs.sort()
-    jobIDs = []
-    for i in range(len(outputLogs)):
-        with open(outputLogs[i],'r') as o:
-            lines = o.readlines()
-        jobIDs.append(lines[0][8:])
-    jobIDs = [ID.rstrip('\n') for ID in jobIDs]
-    jobsToCheck = [outputLogs[i][outputLogs[i].find('outputlog'):] for i in range(len(outputLogs)) if jobIDs[i] in runningJobIDs]
-    jobsToCheck = ["sim{}.out".format(job[job.find('outputlog')+9:job.find('.txt')]) for job in jobsToCheck]
+    monitor = JobMonitor(None, outputLogs, n_points=n_points)
     status = []
-    for job in jobsToCheck:
-        slurmCommand = 'grep "Step size scaled by" {}'.format(job)
-        process = subprocess.Popen(slurmCommand, stdout=subprocess.PIPE, shell=True)
-        vals = process.communicate()[0].split('\n')
-        grep = [val.rstrip('"').lstrip('"') for val in vals if len(val)>0]
-        grep = grep[-n_points:]
-        oscillating = True
-        for instance in grep:
-            if "0.000" in instance:
-                continue
-            else:
-                oscillating = False
-        status.append(oscillating)
+    for outputLog, gaussianOutput in zip(monitor.output_logs, monitor.gaussian_outputs):
+        if monitor.job_id(outputLog) in runningJobIDs:
+            status.append(monitor.is_oscillating(gaussianOutput))
     return status
 
 
@@ -135,6 +104,8 @@ def check_job_status(username, errorLogs, outputLogs, print_output=True, save_ou
     """
     Determine status of G16 job on SLURM. Run this function in a directory in which G16 jobs are running on HPC.
 
+    A single ``squeue`` call is made, see ``JobMonitor`` to check the same jobs repeatedly.
+
     Parameters
     ----------
     username : str
@@ -158,59 +129,64 @@ def check_job_status(username, errorLogs, outputLogs, print_output=True, save_ou
     errorLogs.sort()
     outputLogs.sort()
 
-    jobIDs = []
-    for i in range(len(outputLogs)):
-        with open(outputLogs[i],'r') as o:
-            lines = o.readlines()
-        jobIDs.append(lines[0][8:])
-    jobIDs = [ID.rstrip('\n') for ID in jobIDs]
-
-    slurmCommand = 'squeue -u {} --noheader --format="%A"'.format(username)
-    process = subprocess.Popen(slurmCommand, shell=True, stdout=subprocess.PIPE)
-    vals = process.communicate()[0].split('\n')
-    squeue = [val.rstrip('"').lstrip('"') for val in vals if len(val)>0]
-
-    running = []
-    for i in range(len(jobIDs)):
-        if jobIDs[i] in squeue:
-            running.append(jobIDs[i])
-
-    oscillatingStatus = checkOscillatingJob(running, outputLogs)
-    oscillatingStatus = [running[i] for i in range(len(running)) if oscillatingStatus[i] ]
-
-    failed = []
-    completed = []
-    for i in range(len(errorLogs)):
-        if jobIDs[i] in running:
-            continue
-        with open(errorLogs[i],'r') as e:
-            lines = e.readlines()
-        for line in lines:
-            if "error" in line or "Error" in line or "ERROR" in line:
-                failed.append(jobIDs[i])
-                break
-            else:
-                if jobIDs[i] not in running and jobIDs[i] not in completed:
-                    completed.append(jobIDs[i])
+    monitor = JobMonitor(username, outputLogs, error_logs=errorLogs)
+    status = monitor.check()
     if print_output:
-        print("Running: {}".format(", ".join(running)))
-        print("Oscillating: {}".format(", ".join(oscillatingStatus)))
-        print("Complete: {}".format(", ".join(complete)))
-        print("Failed: {}".format(", ".join(failed)))
+        print("Running: {}".format(", ".join(status["Running"])))
+        print("Oscillating: {}".format(", ".join(status["Oscillating"])))
+        print("Complete: {}".format(", ".join(status["Complete"])))
+        print("Failed: {}".format(", ".join(status["Failed"])))
     if save_output:
-        with open(filename, "w") as f:
-            f.write("JobID, Status")
-            for job in running:
-                f.write("{}, {}".format(job,"In Progress"))
-            for job in oscillatingStatus:
-                f.write("{}, {}".format(job,"Oscillating"))
-            for job in failed:
-                f.write("{}, {}".format(job,"Failed"))
-            for job in complete:
-                f.write("{}, {}".format(job,"Complete"))
-
-
-def boltzmannG(G, beta):
+        monitor.write_csv(status, filename)
+
+
+def boltzmann_average(G, beta, H=None, S=None, axis=-1):
+    """
+    Calculate Boltzmann distribution expectation values of free energy, enthalpy and entropy terms from a single set of probabilities, calculated with the free energy values.
+
+    Probabilities are evaluated in float64 from the log-sum-exp of ``-G * beta``, so that the large magnitudes of (free energy / RT) do not overflow. Inputs of any dimension are reduced along ``axis``, so that a (n_resamples, n_samples) array of resampled values, such as provided by ``scipy.stats.bootstrap(..., vectorized=True)``, is averaged in a single call.
+
+    Parameters
+    ----------
+    G : np.ndarray(dtype=np.float)
+        The array containing the free energy samples to be averaged.
+    beta : float/np.ndarray(dtype=np.float)
+        The value of (1/RT), either as a scalar or as an array that can be broadcast against ``G``, such as one value for each value in G.
+    H : np.ndarray(dtype=np.float), Optional, default=None
+        The array containing the enthalpy samples to be averaged, of the same shape as ``G``.
+    S : np.ndarray(dtype=np.float), Optional, default=None
+        The array containing the entropy samples to be averaged, of the same shape as ``G``.
+    axis : int, Optional, default=-1
+        Axis of the samples over which to average.
+
+    Returns
+    ------
+    averagedG : float/np.ndarray
+        The Boltzmann averaged value of the G samples provided.
+    averagedH : float/np.ndarray
+        The Boltzmann averaged value of the H samples provided, None if ``H`` is not given.
+    averagedS : float/np.ndarray
+        The Boltzmann averaged value of the S samples provided, including both the weighted term and the Gibbs term, None if ``S`` is not given.
+
+    """
+    G = np.asarray(G, dtype=np.float64)
+    log_weights = -G * np.asarray(beta, dtype=np.float64)
+    log_pxi = log_weights - logsumexp(log_weights, axis=axis, keepdims=True)
+    pxi = np.exp(log_pxi)
+
+    averagedG = np.sum(G * pxi, axis=axis)
+    averagedH = None
+    if H is not None:
+        averagedH = np.sum(np.asarray(H, dtype=np.float64) * pxi, axis=axis)
+    averagedS = None
+    if S is not None:
+        weightedS = np.sum(np.asarray(S, dtype=np.float64) * pxi, axis=axis)
+        gibbsS = (-1) * R * np.sum(pxi * log_pxi, axis=axis)
+        averagedS = weightedS + gibbsS
+    return averagedG, averagedH, averagedS
+
+
+def boltzmannG(G, beta, axis=-1):
     """
     Calculate Boltzmann distribution expectation value of a free energy term.
 
@@ -218,8 +194,10 @@ def boltzmannG(G, beta):
     ----------
     G : np.ndarray(dtype=np.float)
         The array containing the samples to be averaged.
-    beta : np.ndarray(dtype=np.float)
-        An array containing the value of (1/RT) for each value in G (i.e., same length as G). This format is required in order to calculate error bars with bootstrapping.
+    beta : float/np.ndarray(dtype=np.float)
+        The value of (1/RT), either as a scalar or as an array containing the value for each value in G (i.e., same shape as G), as used to calculate error bars with paired bootstrapping.
+    axis : int, Optional, default=-1
+        Axis of the samples over which to average, see ``boltzmann_average``.
 
     Returns
     ------
@@ -227,66 +205,174 @@ def boltzmannG(G, beta):
         The Boltzmann averaged value of the G samples provided.
 
     """
-    G = np.array(G, dtype=np.float128)
-    arr1 = [np.exp(-(val) * beta[i]) for i,val in enumerate(G)]
-    Q = sum(arr1)
-    pxi = np.array(arr1) / Q
-    averagedG = np.float64(np.dot(G, pxi))
-    return averagedG
+    return boltzmann_average(G, beta, axis=axis)[0]
 
 
-def boltzmannH(G, H, beta):
+def boltzmannH(G, H, beta, axis=-1):
     """
     Calculate Boltzmann distribution expectation value of an enthalpy term. Probabilities calculated with free energy values.
 
     Parameters
     ----------
+    G : np.ndarray(dtype=np.float)
+        The array containing the free energy samples used to calculate the probabilities.
     H : np.ndarray(dtype=np.float)
         The array containing the samples to be averaged.
-    beta : np.ndarray(dtype=np.float)
-        An array containing the value of (1/RT) for each value in G (i.e., same length as G). This format is required in order to calculate error bars with bootstrapping.
+    beta : float/np.ndarray(dtype=np.float)
+        The value of (1/RT), either as a scalar or as an array containing the value for each value in G (i.e., same shape as G), as used to calculate error bars with paired bootstrapping.
+    axis : int, Optional, default=-1
+        Axis of the samples over which to average, see ``boltzmann_average``.
 
     Returns
     ------
-    averagedG : float
+    averagedH : float
         The Boltzmann averaged value of the H samples provided.
 
     """
-    G = np.array(G, dtype=np.float128)
-    H = np.array(H, dtype=np.float128)
-    arr1 = [np.exp(-(val) * beta[i]) for val in G]
-    Q = sum(arr1)
-    pxi = np.array(arr1) / Q
-    averagedH = np.float64(np.dot(H, pxi))
-    return averagedH
+    return boltzmann_average(G, beta, H=H, axis=axis)[1]
 
 
-def boltzmannS(G, S, beta):
+def boltzmannS(G, S, beta, axis=-1):
     """
     Calculate Boltzmann distribution expectation value of an entropy term, including both the weighted term and the Gibbs term. Probabilities calculated with free energy values.
 
     Parameters
     ----------
+    G : np.ndarray(dtype=np.float)
+        The array containing the free energy samples used to calculate the probabilities.
     S : np.ndarray(dtype=np.float)
         The array containing the samples to be averaged.
-    beta : np.ndarray(dtype=np.float)
-        An array containing the value of (1/RT) for each value in G (i.e., same length as G). This format is required in order to calculate error bars with bootstrapping.
+    beta : float/np.ndarray(dtype=np.float)
+        The value of (1/RT), either as a scalar or as an array containing the value for each value in G (i.e., same shape as G), as used to calculate error bars with paired bootstrapping.
+    axis : int, Optional, default=-1
+        Axis of the samples over which to average, see ``boltzmann_average``.
 
     Returns
     ------
-    averagedG : float
+    averagedS : float
         The Boltzmann averaged value of the S samples provided.
 
     """
-    G = np.array(G, dtype=np.float128)
-    S = np.array(S, dtype=np.float128)
-    arr1 = [np.exp(-(val) * beta[i]) for val in G]
-    Q = sum(arr1)
-    pxi = np.array(arr1) / Q
-    weightedS = np.dot(S, pxi)
-    gibbsS = (-1) * R * np.dot(pxi, np.log(pxi))
-    averagedS = np.float64((weightedS + gibbsS))
-    return averagedS
+    return boltzmann_average(G, beta, S=S, axis=axis)[2]
+
+
+def bootstrap_boltzmann(G, H=None, S=None, temperatures=298.15, n_resamples=10000, seed=None, method="percentile", confidence_level=0.95, chunk_size=None):
+    """
+    Calculate Boltzmann averaged free energy, and optionally enthalpy and entropy, with bootstrapped confidence intervals at one or more temperatures.
+
+    All resampling indices are drawn at once and shared by every temperature and quantity, so that the intervals are paired in the same way as ``scipy.stats.bootstrap(..., paired=True)`` applied to ``boltzmannG``. The Boltzmann averages of all temperatures and resamples are then evaluated with ``boltzmann_average`` in one vectorized pass, or in chunks of ``chunk_size`` resamples to bound memory.
+
+    Parameters
+    ----------
+    G : np.ndarray(dtype=np.float)
+        The free energy samples (e.g., solvation free energies of each cluster), either of shape (N,) to be used at every temperature, or of shape (n_T, N) with a row for each temperature.
+    H : np.ndarray(dtype=np.float), Optional, default=None
+        The enthalpy samples, of the same shape as ``G``. If provided, confidence intervals are also calculated for the averaged enthalpy.
+    S : np.ndarray(dtype=np.float), Optional, default=None
+        The entropy samples, of the same shape as ``G``. If provided, confidence intervals are also calculated for the averaged entropy.
+    temperatures : float/np.ndarray, Optional, default=298.15
+        Absolute temperature(s) (K) of the Boltzmann distribution.
+    n_resamples : int, Optional, default=10000
+        Number of bootstrap resamples.
+    seed : int/numpy.random.Generator, Optional, default=None
+        Seed or generator used to draw the resamples, for reproducible intervals.
+    method : str, Optional, default="percentile"
+        Either "percentile" or "bca" (bias-corrected and accelerated) confidence intervals, following the definitions of ``scipy.stats.bootstrap``.
+    confidence_level : float, Optional, default=0.95
+        Confidence level of the interval.
+    chunk_size : int, Optional, default=None
+        Maximum number of resamples, and of leave-one-out jackknife samples of the "bca" method, evaluated at once. If None, all resamples are evaluated together, requiring memory of order n_T * n_resamples * N floats.
+
+    Returns
+    ------
+    output : dict
+        Dictionary with key "G", and "H" and "S" if provided. Each value is an array of shape (3, n_T), or (3,) for a scalar temperature, containing the Boltzmann averaged value and the lower and upper bounds of the confidence interval.
+
+    """
+    method = method.lower()
+    if method not in ("percentile", "bca"):
+        raise ValueError("The method, {}, should be either 'percentile' or 'bca'.".format(method))
+
+    temperatures = np.asarray(temperatures, dtype=np.float64)
+    scalar_temperature = temperatures.ndim == 0
+    temperatures = np.atleast_1d(temperatures)
+    n_T = len(temperatures)
+    beta = (1 / (R * temperatures))[:, np.newaxis, np.newaxis]
+
+    samples = {}
+    for key, values in (("G", G), ("H", H), ("S", S)):
+        if values is None:
+            continue
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim == 1:
+            values = np.broadcast_to(values, (n_T, len(values)))
+        elif values.ndim != 2 or values.shape[0] != n_T:
+            raise ValueError("The {} samples should be of shape (N,) or (n_T, N), with n_T={}. Given: {}".format(key, n_T, values.shape))
+        samples[key] = values
+    n_samples = samples["G"].shape[1]
+    if any(values.shape != samples["G"].shape for values in samples.values()):
+        raise ValueError("The H and S samples should be the same shape as G.")
+
+    def statistic(index):
+        """Boltzmann averages of each quantity for the (n_sets, n) resampling ``index``, of shape (n_T, n_sets)."""
+        data = {key: values[:, index] for key, values in samples.items()}
+        averages = boltzmann_average(data["G"], beta, H=data.get("H"), S=data.get("S"), axis=-1)
+        return {key: averages["GHS".index(key)] for key in samples}
+
+    rng = np.random.default_rng(seed)
+    index = rng.integers(0, n_samples, size=(n_resamples, n_samples))
+    if chunk_size is None:
+        chunk_size = n_resamples
+    theta_hat_b = {key: np.empty((n_T, n_resamples)) for key in samples}
+    for start in range(0, n_resamples, chunk_size):
+        for key, values in statistic(index[start : start + chunk_size]).items():
+            theta_hat_b[key][:, start : start + chunk_size] = values
+
+    theta_hat = {key: values[:, 0] for key, values in statistic(np.arange(n_samples)[np.newaxis, :]).items()}
+    alpha = (1 - confidence_level) / 2
+    if method == "bca":
+        theta_hat_j = {key: np.empty((n_T, n_samples)) for key in samples}
+        for start in range(0, n_samples, chunk_size):
+            # Leave-one-out jackknife indices, row i skips sample start + i
+            jackknife = np.arange(n_samples - 1)[np.newaxis, :]
+            jackknife = jackknife + (jackknife >= np.arange(start, min(start + chunk_size, n_samples))[:, np.newaxis])
+            for key, values in statistic(jackknife).items():
+                theta_hat_j[key][:, start : start + chunk_size] = values
+
+    output = {}
+    for key, values in theta_hat_b.items():
+        values = np.sort(values, axis=-1)
+        if method == "percentile":
+            levels = np.full((2, n_T), [[alpha], [1 - alpha]])
+        else:
+            below = np.sum(values < theta_hat[key][:, np.newaxis], axis=-1)
+            below_equal = np.sum(values <= theta_hat[key][:, np.newaxis], axis=-1)
+            z0_hat = ndtri((below + below_equal) / (2 * n_resamples))
+            deviation = np.mean(theta_hat_j[key], axis=-1, keepdims=True) - theta_hat_j[key]
+            a_hat = np.sum(deviation ** 3, axis=-1) / (6 * np.sum(deviation ** 2, axis=-1) ** (3 / 2))
+            levels = []
+            for z_alpha in (ndtri(alpha), ndtri(1 - alpha)):
+                levels.append(ndtr(z0_hat + (z0_hat + z_alpha) / (1 - a_hat * (z0_hat + z_alpha))))
+            levels = np.array(levels)
+        bounds = [_sorted_percentile(values, level) for level in levels]
+        output[key] = np.array([theta_hat[key]] + bounds)
+        if scalar_temperature:
+            output[key] = output[key][:, 0]
+    return output
+
+
+def _sorted_percentile(values, levels):
+    """Linearly interpolated percentiles, with a separate ``levels`` fraction for each row of the sorted 2-D array ``values``."""
+    levels = np.asarray(levels, dtype=np.float64)
+    position = np.nan_to_num(levels) * (values.shape[-1] - 1)
+    lower = np.floor(position).astype(int)
+    upper = np.minimum(lower + 1, values.shape[-1] - 1)
+    fraction = position - lower
+    rows = np.arange(values.shape[0])
+    percentiles = values[rows, lower] * (1 - fraction) + values[rows, upper] * fraction
+    # Degenerate BCa intervals (e.g., identical samples) are undefined, as in scipy
+    percentiles[np.isnan(levels)] = np.nan
+    return percentiles
 
 
 # calc free energy IN SOLUTION. To get free energy OF SOLVATION, calculate this function first, then subtract gas-phase free energy of solute calculated at same level of theory and gas-phase standard state correction, giving delta-G of solvation.
@@ -324,58 +410,248 @@ def calc_pQCT(gas_free_energy_cluster, gas_free_energy_H2O, pcm_dG_solv, n_water
     return G_aq
 
 
+def pqct_free_energies(G_cluster, G_H2O, dG_pcm, n_water, temperatures, G_solute=None, dG_solv_H2O=-1.34, n_resamples=10000, seed=None, method="percentile", confidence_level=0.95, chunk_size=None):
+    """
+    Calculate the pQCT monomer cycle of every cluster at every temperature in one call, see ``calc_pQCT``, and Boltzmann average the resulting free energies of solvation with bootstrapped confidence intervals, see ``bootstrap_boltzmann``.
+
+    The free energy of solvation of each cluster is ``G_aq - G_solute - R * temp * log(24.46)``, where ``G_aq`` is the free energy in solution of ``calc_pQCT`` and the last term is the gas-phase standard state correction.
+
+    Parameters
+    ----------
+    G_cluster : np.ndarray(dtype=np.float)
+        The gas-phase free energies of the solute-water clusters, of shape (n_T, N), or (N,) for a scalar temperature.
+    G_H2O : float/np.ndarray(dtype=np.float)
+        The gas-phase free energy of a single water molecule at each temperature, of shape (n_T,).
+    dG_pcm : float/np.ndarray(dtype=np.float)
+        The PCM free energy of solvation of each cluster, of shape (N,), see ``dGSolvPCM``.
+    n_water : int/np.ndarray(dtype=np.int)
+        The number of water molecules of each cluster, of shape (N,).
+    temperatures : float/np.ndarray(dtype=np.float)
+        Absolute temperature(s) (K), of shape (n_T,).
+    G_solute : float/np.ndarray(dtype=np.float), Optional, default=None
+        The gas-phase free energy of the bare solute at each temperature, of shape (n_T,). If None, the free energies in solution, ``G_aq``, are averaged instead of the free energies of solvation.
+    dG_solv_H2O : float, Optional, default=-1.34
+        The PCM free energy of solvation of a single water molecule, see ``calc_pQCT``.
+    n_resamples : int, Optional, default=10000
+        Number of bootstrap resamples, unused by the "delta" method.
+    seed : int/numpy.random.Generator, Optional, default=None
+        Seed or generator used to draw the resamples, for reproducible intervals.
+    method : str, Optional, default="percentile"
+        Either "percentile" or "bca" bootstrapped confidence intervals, see ``bootstrap_boltzmann``, or "delta" for a normal interval from the delta method standard error of the Boltzmann average, without resampling. The cost of the bootstrap grows as n_resamples * n_T * N, while "delta" is a single pass, suited to large temperature scans as long as the average is not dominated by a few clusters.
+    confidence_level : float, Optional, default=0.95
+        Confidence level of the interval.
+    chunk_size : int, Optional, default=None
+        Maximum number of resamples evaluated at once, see ``bootstrap_boltzmann``.
+
+    Returns
+    ------
+    dG_solv : np.ndarray
+        The free energy of solvation (or in solution if ``G_solute`` is None) of each cluster, of shape (n_T, N), or (N,) for a scalar temperature.
+    averaged : np.ndarray
+        The Boltzmann averaged value and the lower and upper bounds of its confidence interval, of shape (3, n_T), or (3,) for a scalar temperature.
+    """
+    temperatures = np.asarray(temperatures, dtype=np.float64)
+    RT = R * np.atleast_1d(temperatures)[:, np.newaxis]
+    n_T = len(RT)
+    G_cluster = np.asarray(G_cluster, dtype=np.float64)
+    if temperatures.ndim == 0 and G_cluster.ndim == 1:
+        G_cluster = G_cluster[np.newaxis, :]
+    if temperatures.ndim > 1 or G_cluster.ndim != 2 or G_cluster.shape[0] != n_T:
+        raise ValueError("G_cluster should be of shape (n_T, N), with n_T={}. Given: {}".format(n_T, G_cluster.shape))
+
+    def per_temperature(values, name):
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim > 1 or values.size not in (1, n_T):
+            raise ValueError("{} should be a scalar or of shape (n_T,), with n_T={}. Given: {}".format(name, n_T, values.shape))
+        return values.reshape(-1, 1)
+
+    # Free energy of one water monomer in liquid water (55.5 M), removed n_water times
+    water = per_temperature(G_H2O, "G_H2O") + dG_solv_H2O + RT * (np.log(24.46) + np.log(1000 / 18.01528))
+    dG_solv = G_cluster + np.asarray(dG_pcm, dtype=np.float64) - np.asarray(n_water, dtype=np.float64) * water
+    if G_solute is None:
+        dG_solv += RT * np.log(24.46)
+    else:
+        # The standard state corrections of the cluster and of the solute cancel
+        dG_solv -= per_temperature(G_solute, "G_solute")
+
+    if method.lower() == "delta":
+        log_pxi = -dG_solv / RT
+        log_pxi -= logsumexp(log_pxi, axis=-1, keepdims=True)
+        pxi = np.exp(log_pxi)
+        averagedG = np.sum(pxi * dG_solv, axis=-1)
+        # Linearization of the weighted mean, sum(pxi * G) / sum(pxi), over the empirical distribution of clusters
+        error = ndtri(1 - (1 - confidence_level) / 2) * np.sqrt(np.sum((pxi * (dG_solv - averagedG[:, np.newaxis])) ** 2, axis=-1))
+        averaged = np.array([averagedG, averagedG - error, averagedG + error])
+        if temperatures.ndim == 0:
+            averaged = averaged[:, 0]
+    else:
+        averaged = bootstrap_boltzmann(dG_solv, temperatures=temperatures, n_resamples=n_resamples, seed=seed, method=method, confidence_level=confidence_level, chunk_size=chunk_size)["G"]
+    if temperatures.ndim == 0:
+        dG_solv = dG_solv[0]
+    return dG_solv, averaged
+
+
 def calc_thermo_NASA(coeffs, temp=298.15):
     """
     Calculate thermochemical quantities from NASA polynomial coefficients. All values are in kcal/mol or kcal/(mol*K).
 
+    The polynomials are evaluated in Horner form with NumPy broadcasting, so that a matrix of coefficients of many species can be evaluated over an array of temperatures in one call.
+
     Parameters
     ----------
     coeffs : array
-        An array containing the 7 coefficients of the NASA polynomial.
-    temp : float, Optional, default=298.15
-        Specify the absolute temperature (K) to calculate thermo at. Optional, default=298.15.
+        An array containing the 7 coefficients of the NASA polynomial, or an array of shape (..., 7), e.g., (n_species, 7), containing the coefficients of several polynomials.
+    temp : float/array, Optional, default=298.15
+        Specify the absolute temperature(s) (K) to calculate thermo at. Optional, default=298.15.
 
     Returns
     ------
     thermo : array
-        An array of length 4 returning the thermo at the specified temperture, Cp, H, S, and G.
+        For a single polynomial and temperature, an array of length 4 returning the thermo at the specified temperture, Cp, H, S, and G. Otherwise, a float64 array of shape (4,) + coeffs.shape[:-1] + np.shape(temp), where each of Cp, H, S, and G is contiguous, e.g., (4, n_species, n_T).
     """
-    cp_t = (
-        coeffs[0]
-        + temp * coeffs[1]
-        + pow(temp, 2) * coeffs[2]
-        + pow(temp, 3) * coeffs[3]
-        + pow(temp, 4) * coeffs[4]
-    ) * R
-    H_t = (
-        coeffs[0] * temp
-        + (pow(temp, 2) / 2) * coeffs[1]
-        + (pow(temp, 3) / 3) * coeffs[2]
-        + (pow(temp, 4) / 4) * coeffs[3]
-        + (pow(temp, 5) / 5) * coeffs[4]
-        + coeffs[5]
-    ) * R
-    S_t = (
-        coeffs[0] * np.log(temp)
-        + temp * coeffs[1]
-        + pow(temp, 2) * (coeffs[2] / 2)
-        + pow(temp, 3) * (coeffs[3] / 3)
-        + pow(temp, 4) * (coeffs[4] / 4)
-        + coeffs[6]
-    ) * R
-    G_t = H_t - temp * S_t
-    thermo = [cp_t, H_t, S_t, G_t]
+    coeffs = np.asarray(coeffs, dtype=np.float64)
+    temp = np.asarray(temp, dtype=np.float64)
+    shape = coeffs.shape[:-1] + temp.shape
+    # Each coefficient is broadcast over the trailing temperature dimensions
+    a = np.moveaxis(coeffs, -1, 0).reshape((coeffs.shape[-1],) + coeffs.shape[:-1] + (1,) * temp.ndim)
+
+    thermo = np.empty((4,) + shape, dtype=np.float64)
+    thermo[0] = (a[0] + temp * (a[1] + temp * (a[2] + temp * (a[3] + temp * a[4])))) * R
+    thermo[1] = (temp * (a[0] + temp * (a[1] / 2 + temp * (a[2] / 3 + temp * (a[3] / 4 + temp * a[4] / 5)))) + a[5]) * R
+    thermo[2] = (a[0] * np.log(temp) + temp * (a[1] + temp * (a[2] / 2 + temp * (a[3] / 3 + temp * a[4] / 4))) + a[6]) * R
+    thermo[3] = thermo[1] - temp * thermo[2]
+    if thermo.ndim == 1:
+        thermo = list(thermo)
     return thermo
 
 
+class NasaThermoTable:
+    """
+    NASA polynomial coefficients of every species in a chemkin file, stored as NumPy arrays so that thermo can be evaluated for all species over a grid of temperatures at once.
+
+    Build with ``NasaThermoTable.from_chemkin(fname)``, once per file, and call ``evaluate`` for any number of temperatures.
+
+    Parameters
+    ----------
+    species : list
+        Names of the N species, in file order.
+    coeffs_low : numpy.ndarray
+        Array of shape (N,7) of the NASA polynomial coefficients of the low temperature range.
+    coeffs_high : numpy.ndarray
+        Array of shape (N,7) of the NASA polynomial coefficients of the high temperature range.
+    Tmin : numpy.ndarray
+        Array of shape (N,) of the lowest valid temperature (K) of each species.
+    Tmid : numpy.ndarray
+        Array of shape (N,) of the temperature (K) separating the low and high ranges of each species.
+    Tmax : numpy.ndarray
+        Array of shape (N,) of the highest valid temperature (K) of each species.
+
+    Attributes
+    ----------
+    index : dict
+        Dictionary of species name to row index in the coefficient arrays.
+    """
+
+    def __init__(self, species, coeffs_low, coeffs_high, Tmin, Tmid, Tmax):
+        self.species = list(species)
+        self.index = {name: i for i, name in enumerate(self.species)}
+        self.coeffs_low = np.asarray(coeffs_low, dtype=np.float64).reshape(-1, 7)
+        self.coeffs_high = np.asarray(coeffs_high, dtype=np.float64).reshape(-1, 7)
+        self.Tmin = np.asarray(Tmin, dtype=np.float64)
+        self.Tmid = np.asarray(Tmid, dtype=np.float64)
+        self.Tmax = np.asarray(Tmax, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.species)
+
+    def __repr__(self):
+        return "{}({} species)".format(type(self).__name__, len(self))
+
+    @classmethod
+    def from_chemkin(cls, fname):
+        """
+        Read the THERM section of a chemkin file, such as "chem.inp" output from Arkane thermo() calculations.
+
+        Parameters
+        ----------
+        fname : str
+            Specify the complete path to the chemkin file.
+
+        Returns
+        -------
+        table : NasaThermoTable
+            Table of the NASA polynomials of each species in the file.
+        """
+        with open(rf"{fname}", "r") as o:
+            lines = o.readlines()
+        for num, line in enumerate(lines):
+            if line.startswith("THERM"):
+                # "THERM ALL" is followed by a line of default temperature ranges
+                lines = lines[num + (2 if "ALL" in line else 1) :]
+                break
+        for num, line in enumerate(lines):
+            if line.startswith("END"):
+                lines = lines[:num]
+                break
+        lines = [line for line in lines if line.strip()]
+
+        species, coeffs_low, coeffs_high, temps = [], [], [], []
+        for i in range(len(lines) // 4):
+            header = lines[i * 4].split()
+            allCoeffs = lines[i * 4 + 1 : (i + 1) * 4]
+            species.append(header[0])
+            coeffs_high.append([float(allCoeffs[0][j * 15 : (j + 1) * 15]) for j in range(5)] + [float(allCoeffs[1][j * 15 : (j + 1) * 15]) for j in range(2)])
+            coeffs_low.append([float(allCoeffs[1][j * 15 : (j + 1) * 15]) for j in range(2, 5)] + [float(allCoeffs[2][j * 15 : (j + 1) * 15]) for j in range(4)])
+            temps.append([float(header[-4]), float(header[-2]), float(header[-3])])
+        temps = np.reshape(temps, (-1, 3))
+        return cls(species, coeffs_low, coeffs_high, temps[:, 0], temps[:, 1], temps[:, 2])
+
+    def evaluate(self, temperatures, species=None):
+        """
+        Calculate Cp(T), H(T), S(T), G(T) of the species over a grid of temperatures, with the low or high range polynomial chosen per element. All values are in kcal/mol or kcal/(mol*K).
+
+        Parameters
+        ----------
+        temperatures : float/numpy.ndarray
+            Absolute temperature(s) (K), of shape (n_T,).
+        species : list, Optional, default=None
+            Names of the species to evaluate, by default all species in file order.
+
+        Returns
+        -------
+        output_thermo : numpy.ndarray
+            Array of shape (n_species, n_T, 4) containing the Cp, H, S, and G of each species at each temperature. Temperatures outside of the fitted range of a species result in NaN values.
+        """
+        rows = slice(None) if species is None else [self.index[name] for name in species]
+        temperatures = np.atleast_1d(np.asarray(temperatures, dtype=np.float64))
+        Tmin, Tmid, Tmax = (values[rows, np.newaxis] for values in (self.Tmin, self.Tmid, self.Tmax))
+        low = (temperatures >= Tmin) & (temperatures <= Tmid)
+        high = (temperatures > Tmid) & (temperatures <= Tmax)
+
+        output_thermo = np.where(
+            low, calc_thermo_NASA(self.coeffs_low[rows], temperatures), calc_thermo_NASA(self.coeffs_high[rows], temperatures)
+        )
+        output_thermo[:, ~(low | high)] = np.nan
+        return np.ascontiguousarray(np.moveaxis(output_thermo, 0, -1))
+
+
+@functools.lru_cache(maxsize=32)
+def _read_nasa_table(fname, mtime, size):
+    """Parse a chemkin file once per (path, modification time, size)."""
+    return NasaThermoTable.from_chemkin(fname)
+
+
+@cached_parser
 def calc_thermo_Arkane(fname, temperature=298.15):
     """
     Read chemkin file "chem.inp" output from Arkane thermo() calculations. Determine high/low NASA polynomial coefficients for each "species" within the file, based on input temperature. Return calculated Cp(T), H(T), S(T), G(T) at that temperature. All values are in kcal/mol or kcal/(mol*K).
 
+    The parsed coefficients are kept for each unchanged file, so repeated calls over a temperature grid read the file once. See ``NasaThermoTable`` to evaluate a whole grid in one call.
+
     Parameters
     ----------
-    fname : str
-        Specify the complete path to the chem.inp file output from Arkane.
+    fname : str/NasaThermoTable
+        Specify the complete path to the chem.inp file output from Arkane, or an already read ``NasaThermoTable``.
     temperature : float, Optional, default=298.15
         Specify the absolute temperature (K) to calculate thermo at. Optional, default=298.15.
 
@@ -385,46 +661,23 @@ def calc_thermo_Arkane(fname, temperature=298.15):
         A 2D Numpy array containing the thermo (Cp,H,S,G at specified temperature) of each of the N molecules present in the chem.inp file, of shape (N,4). All values are in kcal/mol or kcal/(mol*K).
 
     """
-    with open(rf"{fname}", "r") as o:
-        lines = o.readlines()
-    for num, line in enumerate(lines):
-        if "THERM" in line:
-            lines = lines[num + 3 :]
-            break
-    for num, line in enumerate(lines):
-        if "END" in line:
-            lines = lines[: num - 2]
-            break
-    lines = [line for line in lines if line != "\n"]
-    molecules = []
-    for num, line in enumerate(lines):
-        if num % 4 == 0:
-            molecules.append(line.split()[0])
-    output_thermo = []
-    for i in range(len(molecules)):
-        allCoeffs = lines[i * 4 + 1 : (i + 1) * 4]
-        nasaPolyHigh = [float(allCoeffs[0][j * 15 : (j + 1) * 15]) for j in range(5)] + [float(allCoeffs[1][j * 15 : (j + 1) * 15]) for j in range(2)]
-        nasaPolyLow = [float(allCoeffs[1][j * 15 : (j + 1) * 15]) for j in range(2, 5)] + [float(allCoeffs[2][j * 15 : (j + 1) * 15]) for j in range(4)]
-        lowTemp = float(lines[i * 4].split()[-4])
-        midTemp = float(lines[i * 4].split()[-2])
-        highTemp = float(lines[i * 4].split()[-3])
-
-        coeffs = []
-        if temperature >= lowTemp and temperature <= midTemp:
-            coeffs = nasaPolyLow
-        elif temperature > midTemp and temperature <= highTemp:
-            coeffs = nasaPolyHigh
-        else:
-            return "Temperature out of fitted range. Please input a valid temperature."
-        output_thermo.append(calc_thermo_NASA(coeffs, temp=temperature))
-    output_thermo = np.reshape(output_thermo, (len(molecules), 4))
+    if isinstance(fname, NasaThermoTable):
+        table = fname
+    else:
+        stat = os.stat(fname)
+        table = _read_nasa_table(os.path.abspath(fname), stat.st_mtime_ns, stat.st_size)
+    output_thermo = table.evaluate(temperature)[:, 0, :]
+    if np.any(np.isnan(output_thermo)):
+        return "Temperature out of fitted range. Please input a valid temperature."
     return output_thermo
 
 
-def create_g16_input(fname, GasRouteSection, PCMRouteSection, coordFile, charge=0, spinMultiplicity=1):
+def create_g16_input(fname, GasRouteSection, PCMRouteSection, coordFile, charge=0, spinMultiplicity=1, last_geometry=False):
     """
     Create G16 input and associated .slurm submission script, from either a .xyz coordinates file or a CONVERGED .out/.log G16 optimization file.
 
+    The files are rendered from the "g16_gas" and "g16_pcm" templates, which can be replaced with ``register_template``.
+
     Parameters
     ----------
     fname : str
@@ -433,18 +686,23 @@ def create_g16_input(fname, GasRouteSection, PCMRouteSection, coordFile, charge=
         A string specifiying the keywords after the "# " portion of the standard Gaussian route section for the gas-phase opt/freq portion of the job. Do not include the "# ", only the keywords. For example, "opt=calcall freq ..." should be specified in full. All generated simulation files will have this same route section.
     PCMRouteSection : string
         A string specifiying the keywords after the "# " portion of the standard Gaussian route section for the SCRF=PCM portion of the job. MUST INCLUDE "geom=check". Do not include the "# ", only the keywords. For example, "opt=calcall freq ..." should be specified in full. All generated simulation files will have this same route section.
-    coordFile : string
-        A string containing the complete path of the .xyz coordinate specification file for which Gaussian simulation files should be created.
+    coordFile : string/tuple
+        A string containing the complete path of the .xyz coordinate specification file for which Gaussian simulation files should be created, or a tuple of the atomic symbols and the array of shape (atom_count, 3) of coordinates, such as yielded by ``iter_clusters``, to avoid writing and reading an intermediate file.
     charge : int, Optional, default=0
         An integer representing the total formal charge of the overall system. Optional, default=0.
     spinMultiplicity : int, Optional, default=1
         An integer representing the spin state of the system. Optional, default=1.
+    last_geometry : bool, Optional, default=False
+        If True and ``coordFile`` is a .out/.log file, the last geometry printed is used instead of the converged geometry, e.g., to restart an unconverged optimization.
 
     Returns
     ------
     There is no output after correct usage of the function. The generated Gaussian job file and associated .slurm script will appear in the directory within which this function is run.
     """
-    coords = extract_coordinates(coordFile)[0]
+    if isinstance(coordFile, tuple):
+        coords = [f"{atom}      {x:.5f}      {y:.5f}      {z:.5f}\n" for atom, (x, y, z) in zip(coordFile[0], np.asarray(coordFile[1]).tolist())]
+    else:
+        coords = extract_coordinates(coordFile, last_geometry=last_geometry)[0]
     path, filename = os.path.split(fname)
     if path:
         cwd = os.getcwd()
@@ -452,35 +710,61 @@ def create_g16_input(fname, GasRouteSection, PCMRouteSection, coordFile, charge=
             path = os.path.join(cwd,path)
     check_name = os.path.join(path,filename)
 
-    with open(rf"{fname}_gas.com", "w") as n:
-        n.writelines(
-            [
-                f"%chk={check_name}_gas.chk\n",
-                f"# {GasRouteSection}\n\n",
-                f"G16 gas-phase opt/freq job for {fname}\n\n",
-                f"{charge} {spinMultiplicity}\n",
-            ]
-        )
-        n.writelines(coords)
-        n.write("\n")
+    values = {"checkpoint": check_name, "title": fname, "charge": charge, "spinMultiplicity": spinMultiplicity}
+    get_template("g16_gas").write(f"{fname}_gas.com", route=GasRouteSection, coordinates="".join(coords), **values)
     if "scrf" not in PCMRouteSection:
         PCMRouteSection += " scrf=(iefpcm,solvent=water,externaliteration,1stvac,read)"
     if "geom=check" not in PCMRouteSection:
         PCMRouteSection += " geom=check"
+    get_template("g16_pcm").write(f"{fname}_PCM.com", route=PCMRouteSection, **values)
+
+def create_cluster_inputs(trajectory, solute, n_waters, GasRouteSection, PCMRouteSection, fname="cluster{:06d}", box=None, charge=0, spinMultiplicity=1, water="O", water_size=3, atom_map=None):
+    """
+    Create G16 inputs of clusters of a solute and its nearest water molecules, extracted from each frame of an MD trajectory.
+
+    Frames are read lazily and the clusters are passed to ``create_g16_input`` in memory, see ``iter_clusters``, so that no intermediate .xyz file is written or parsed.
+
+    Parameters
+    ----------
+    trajectory : str/iterable
+        Path of a multi-frame .xyz file, or an iterable of (atoms, coords) frames, see ``iter_clusters``.
+    solute : int/array_like
+        Index or indices of the solute atoms in each frame.
+    n_waters : int
+        Number of water molecules in each cluster.
+    GasRouteSection : string
+        Route section of the gas-phase opt/freq job, see ``create_g16_input``.
+    PCMRouteSection : string
+        Route section of the SCRF=PCM job, see ``create_g16_input``.
+    fname : str, Optional, default="cluster{:06d}"
+        Format of the name of the simulation files of each frame, formatted with the frame index.
+    box : float/array_like, Optional, default=None
+        Edge length(s) of the periodic box, see ``box_lengths``. If None, the system is not periodic.
+    charge : int, Optional, default=0
+        An integer representing the total formal charge of each cluster.
+    spinMultiplicity : int, Optional, default=1
+        An integer representing the spin state of each cluster.
+    water : str, Optional, default="O"
+        Label of the water oxygens in the trajectory.
+    water_size : int, Optional, default=3
+        Number of atoms of each water molecule.
+    atom_map : dict, Optional, default=None
+        Dictionary of trajectory labels to atomic symbols, see ``iter_clusters``.
+
+    Returns
+    -------
+    names : list
+        Names of the simulation files created, one per frame.
+    """
+    names = []
+    for frame, atoms, coords in iter_clusters(trajectory, solute, n_waters, box=box, water=water, water_size=water_size, atom_map=atom_map):
+        name = fname.format(frame)
+        create_g16_input(name, GasRouteSection, PCMRouteSection, (atoms, coords), charge=charge, spinMultiplicity=spinMultiplicity)
+        names.append(name)
+    return names
 
-    with open(rf"{fname}_PCM.com", "w") as n2:
-        n2.writelines(
-            [
-                f'%oldchk={check_name}_gas.chk\n',
-                f'%chk={check_name}_PCM.chk\n',
-                f'# {PCMRouteSection}\n\n',
-                f'G16 PCM job for {fname}\n\n',
-                f'{charge} {spinMultiplicity}\n',
-                f'\ndis\ncav\nrep\n\n\n'
-            ]
-        )
 
-def create_slurm_script(fname, filename_g16, nodes, partition, mem, time="168:00:00", filename_sterr=None, filename_stout=None, log_path=None):
+def create_slurm_script(fname, filename_g16, nodes, partition, mem, time="168:00:00", filename_sterr=None, filename_stout=None, log_path=None, template="submission_script"):
     """
     Create a .slurm submission script for a given Gaussian 16 job, using a template .slurm script that will automatically assign G16 environment variables in the most efficient setup.
     Parameters
@@ -503,6 +787,8 @@ def create_slurm_script(fname, filename_g16, nodes, partition, mem, time="168:00
         Filename for standard error, default is: ``sterr_{fname.split(os.sep)[-1]}.txt``
     log_path : str, Optional, default=None
         If None, that path (if any) contained in ``fname`` is used to save the gaussian log file, ``log_path + {fname.split(os.sep)[-1]}_X.log`` where ``X`` is "gas" or "PCM".
+    template : str, Optional, default="submission_script"
+        Name of the registered template, see ``register_template``, with the placeholders: job_name, nodes, mem, time, filename_stout, filename_sterr, partition, input and log_path.
 
     Returns
     -------
@@ -518,29 +804,117 @@ def create_slurm_script(fname, filename_g16, nodes, partition, mem, time="168:00
     if log_path == None:
         log_path = path
 
-    template = io.TextIOWrapper(io.BytesIO(pkgutil.get_data(__name__, "templates/submissionScriptTemplate")), encoding='utf-8')
-
-    lines = { 1: f'#SBATCH --job-name="{filename}"\n',
-              2: f"#SBATCH --nodes={nodes}                         # number of nodes\n",
-              3: f"#SBATCH --mem={mem}G                         # memory pool for all cores\n",
-              4: f"#SBATCH -t {time}                       # time (HH:MM:SS)\n",
-              5: f'#SBATCH --output="{filename_stout}"         # standard output\n',
-              6: f'#SBATCH --error="{filename_sterr}"          # standard error\n',
-              8: f"#SBATCH -p {partition}\n",
-              10: f"input='{filename_g16}'\n",
-              11: f'log_path="{log_path}"\n',
-            }
-    output = []
-    for i,line in enumerate(template):
-        if i in lines:
-            if i == 11 and log_path == None:
-                continue
-            output.append(lines[i])
-        else:
-            output.append(line)
+    get_template(template).write(
+        f"{fname}.slurm",
+        job_name=filename,
+        nodes=nodes,
+        mem=mem,
+        time=time,
+        filename_stout=filename_stout,
+        filename_sterr=filename_sterr,
+        partition=partition,
+        input=filename_g16,
+        log_path=log_path,
+    )
+
+
+def create_job_array(structures, GasRouteSection, PCMRouteSection, fname, nodes, partition, mem, time="168:00:00", names=None, charge=0, spinMultiplicity=1, runs_per_task=1, max_running=None, max_array_size=1001, filename_sterr=None, filename_stout=None, template="job_array"):
+    """
+    Create the G16 inputs of many structures in one pass, and the SLURM job array script that runs them.
+
+    The inputs are written with ``create_g16_input``, and a manifest, "{fname}_manifest.txt", maps each array task index to the inputs it runs, one tab separated "task input" line per input. Each task runs ``runs_per_task`` inputs side by side on its node, sharing the cores, memory and scratch space that the "gaussian_environment" template sets for a single job.
+
+    SLURM rejects array indices of ``MaxArraySize`` or more (1001 by default). If there are more tasks than ``max_array_size``, the tasks are split over several scripts, "{fname}_part000.slurm", "{fname}_part001.slurm", etc., each with at most ``max_array_size`` array indices offset into the same manifest; otherwise the script is "{fname}.slurm".
+
+    Parameters
+    ----------
+    structures : list
+        Coordinates of each structure, as accepted by ``coordFile`` in ``create_g16_input``, i.e., paths of .xyz or converged .log files, or tuples of atomic symbols and coordinates.
+    GasRouteSection : string
+        Route section of the gas-phase opt/freq jobs, see ``create_g16_input``.
+    PCMRouteSection : string
+        Route section of the SCRF=PCM jobs, see ``create_g16_input``.
+    fname : str
+        Filename of the SLURM submission script and manifest, NOT including the file extension. The inputs are written in the same directory.
+    nodes : int
+        An integer representing the number of nodes requested by each array task.
+    partition : str
+        A string representing the partition on which the job is to be scheduled.
+    mem : int
+        An integer representing the amount (in GB) of memory requested by each array task.
+    time : str, Optional, default="168:00:00"
+        Job WallClock Max of each array task before it is killed.
+    names : list, Optional, default=None
+        Names of the simulation files of each structure, without path or extension, by default "{fname}_{index:06d}".
+    charge : int, Optional, default=0
+        An integer representing the total formal charge of each structure.
+    spinMultiplicity : int, Optional, default=1
+        An integer representing the spin state of each structure.
+    runs_per_task : int, Optional, default=1
+        Number of Gaussian inputs packed in each array task, run concurrently on its node.
+    max_running : int, Optional, default=None
+        If not None, maximum number of array tasks running at once, i.e., the "%N" throttle of ``--array``.
+    max_array_size : int, Optional, default=1001
+        The ``MaxArraySize`` of the SLURM configuration (see ``scontrol show config``), beyond which the array is split over several scripts.
+    filename_stout : str, Optional, default=None
+        Filename for standard output, default is: ``stout_{fname.split(os.sep)[-1]}_%A_%a.txt``
+    filename_sterr : str, Optional, default=None
+        Filename for standard error, default is: ``sterr_{fname.split(os.sep)[-1]}_%A_%a.txt``
+    template : str, Optional, default="job_array"
+        Name of the registered template, see ``register_template``, with the placeholders of ``create_slurm_script`` besides input and log_path, and: array, manifest and task_offset, the manifest task of array index 0.
 
-    with open(f"{fname}.slurm", "w") as n:
-        n.writelines(output)
+    Returns
+    -------
+    manifest : list
+        List of (task index, input path) tuples, as written in the manifest, where the input path is absolute and does not include "_gas.com" or "_PCM.com". Task indices run over all the scripts.
+    """
+    structures = list(structures)
+    if not structures:
+        raise ValueError("No structures were provided.")
+    if runs_per_task < 1:
+        raise ValueError("runs_per_task must be a positive integer.")
+    if max_array_size < 1:
+        raise ValueError("max_array_size must be a positive integer.")
+    path, filename = os.path.split(os.path.abspath(fname))
+    if names is None:
+        names = ["{}_{:06d}".format(filename, i) for i in range(len(structures))]
+    elif len(names) != len(structures):
+        raise ValueError("The number of names, {}, does not match the number of structures, {}.".format(len(names), len(structures)))
+    if filename_sterr == None:
+        filename_sterr = "sterr_{}_%A_%a.txt".format(filename)
+    if filename_stout == None:
+        filename_stout = "stout_{}_%A_%a.txt".format(filename)
+
+    manifest = []
+    for i, (name, structure) in enumerate(zip(names, structures)):
+        input_path = os.path.join(path, name)
+        create_g16_input(input_path, GasRouteSection, PCMRouteSection, structure, charge=charge, spinMultiplicity=spinMultiplicity)
+        manifest.append((i // runs_per_task, input_path))
+    manifest_file = os.path.join(path, "{}_manifest.txt".format(filename))
+    with open(manifest_file, "w") as f:
+        f.writelines("{}\t{}\n".format(task, input_path) for task, input_path in manifest)
+
+    n_tasks = manifest[-1][0] + 1
+    template = get_template(template)
+    for part, task_offset in enumerate(range(0, n_tasks, max_array_size)):
+        array = "0-{}".format(min(max_array_size, n_tasks - task_offset) - 1)
+        if max_running is not None:
+            array += "%{}".format(max_running)
+        script = "{}.slurm".format(filename) if n_tasks <= max_array_size else "{}_part{:03d}.slurm".format(filename, part)
+        template.write(
+            os.path.join(path, script),
+            job_name=filename,
+            nodes=nodes,
+            mem=mem,
+            time=time,
+            filename_stout=filename_stout,
+            filename_sterr=filename_sterr,
+            partition=partition,
+            array=array,
+            manifest=manifest_file,
+            task_offset=task_offset,
+        )
+    return manifest
 
 def create_arkane_input(name, freq_log, pcm_log=None, linear=False, spinMultiplicity=1, opticalIsomers=1, kwargs_lot={}):
     """
@@ -571,39 +945,9 @@ def create_arkane_input(name, freq_log, pcm_log=None, linear=False, spinMultipli
     ------
     There is no output after correct usage of the function. The generated Arkane input files will appear in the directory within which this function is run.
     """
-    with open(freq_log, "r") as f:
-        lines = f.readlines()
-    symm = 0
-    for num, line in enumerate(lines):
-        if "Rotational symmetry number" in line:
-            symm = line.split()[3]
-            symm = int(symm[: symm.find(".")])
-    if pcm_log is None:
-        with open(f"{name}.py", "w") as s:
-            s.writelines(
-                [
-                    f"linear = {linear}\n\n",
-                    f"externalSymmetry = {symm}\n\n",
-                    f"spinMultiplicity = {spinMultiplicity}\n\n",
-                    f"opticalIsomers = {opticalIsomers}\n\n",
-                    f"energy = Log('{freq_log}')\n\n",
-                    f"geometry = Log('{freq_log}')\n\n",
-                    f"frequencies = Log('{freq_log}')\n\n",
-                ]
-            )
-    elif pcm_log is not None:
-        with open(f"{name}.py", "w") as s:
-            s.writelines(
-                [
-                    f"linear = {linear}\n\n",
-                    f"externalSymmetry = {symm}\n\n",
-                    f"spinMultiplicity = {spinMultiplicity}\n\n",
-                    f"opticalIsomers = {opticalIsomers}\n\n",
-                    f"energy = Log('{pcm_log}')\n\n",
-                    f"geometry = Log('{freq_log}')\n\n",
-                    f"frequencies = Log('{freq_log}')\n\n",
-                ]
-            )
+    symm = GaussianLog(freq_log).symmetry_number
+    with open(f"{name}.py", "w") as s:
+        s.writelines(_arkane_species_lines(freq_log, symm, pcm_log=pcm_log, linear=linear, spinMultiplicity=spinMultiplicity, opticalIsomers=opticalIsomers))
 
     if os.path.exists("input.py"):
         topOfFile = True
@@ -621,9 +965,25 @@ def create_arkane_input(name, freq_log, pcm_log=None, linear=False, spinMultipli
             write_arkane_input_header("input.py", **kwargs_lot)
 
     with open("input.py", "a") as i:
-        i.writelines(
-            ["\n\n", f"species('{name}', '{name}.py')\n", f"thermo('{name}', 'NASA')\n\n"]
-        )
+        i.writelines(_arkane_entry_lines(name))
+
+
+def _arkane_species_lines(freq_log, symm, pcm_log=None, linear=False, spinMultiplicity=1, opticalIsomers=1):
+    """Lines of the Arkane species file of a frequency calculation, see ``create_arkane_input``."""
+    return [
+        f"linear = {linear}\n\n",
+        f"externalSymmetry = {symm}\n\n",
+        f"spinMultiplicity = {spinMultiplicity}\n\n",
+        f"opticalIsomers = {opticalIsomers}\n\n",
+        f"energy = Log('{freq_log if pcm_log is None else pcm_log}')\n\n",
+        f"geometry = Log('{freq_log}')\n\n",
+        f"frequencies = Log('{freq_log}')\n\n",
+    ]
+
+
+def _arkane_entry_lines(name):
+    """Lines of the species and thermo entries of ``name`` in the Arkane input.py file."""
+    return ["\n\n", f"species('{name}', '{name}.py')\n", f"thermo('{name}', 'NASA')\n\n"]
 
 def write_arkane_input_header(filename, method=None, basis=None):
     """
@@ -644,7 +1004,15 @@ def write_arkane_input_header(filename, method=None, basis=None):
         Basis set used in Arkane.LevelOfTheory. This value is also used in the second portion of the atom energies filename
 
     """
+    lines = _arkane_header_lines(method=method, basis=basis)
+    with open(filename, "w") as i:
+        i.writelines(
+            lines
+        )
+
 
+def _arkane_header_lines(method=None, basis=None):
+    """Lines of the header of the Arkane input.py file, see ``write_arkane_input_header``."""
     if method == None:
         flag = False
         method = "ProvideMethodHere"
@@ -678,14 +1046,10 @@ def write_arkane_input_header(filename, method=None, basis=None):
         lines.append("frequencyScaleFactor = {}\n".format(freq_scaler))
     else:
         lines.append("#frequencyScaleFactor = \n")
+    return lines
 
-
-    with open("input.py", "w") as i:
-        i.writelines(
-            lines
-        )
-
-def extract_coordinates(fname):
+@cached_parser
+def extract_coordinates(fname, last_geometry=False):
     """
     Retrieve a list of strings, each containing a single line representing an atomic symbol and its corresponding coordinates, either from a .out/.log file or directly from a .xyz coordinates file.
 
@@ -693,8 +1057,10 @@ def extract_coordinates(fname):
 
     Parameters
     ----------
-    fname : str
-        A string specifying the complete path of the file from which coordinates are to be extracted.
+    fname : str/GaussianLog
+        A string specifying the complete path of the file from which coordinates are to be extracted, or an already indexed ``GaussianLog``.
+    last_geometry : bool, Optional, default=False
+        If True, the last geometry printed in a .out/.log file is extracted instead of the converged geometry, e.g., to restart an unconverged optimization.
 
     Returns
     -------
@@ -708,41 +1074,23 @@ def extract_coordinates(fname):
 
     output = []
     output2 = []
+    if isinstance(fname, GaussianLog) or ".out" in fname or ".log" in fname:
+        try:
+            log = _gaussian_log(fname)
+        except OSError:
+            return rf"Could not locate the file {fname}."
+        if last_geometry:
+            atoms, lines, coords = log._read_orientation(log._last_complete_orientation())
+        else:
+            atoms, lines, coords = log.atoms, log.coordinate_lines, log.coordinates
+        output = [" " + atom + " " * (6 - len(atom)) + line for atom, line in zip(atoms, lines)]
+        return output, coords, len(output)
     try:
         with open(fname, "r") as f:
             lines = f.readlines()
     except:
         return rf"Could not locate the file {fname}."
-    if ".out" in fname or ".log" in fname:
-        for num, line in enumerate(lines):
-            if "Optimization complete" in line:
-                lines = lines[num:]
-                break
-        for num, line in enumerate(lines):
-            if (
-                "Proceeding to internal job" in line
-                or "Normal termination of Gaussian" in line
-            ):
-                lines = lines[:num]
-                break
-        for num, line in enumerate(lines):
-            if "Input orientation" in line:
-                lines = lines[num + 5 :]
-                break
-        for num, line in enumerate(lines):
-            if "Distance matrix" in line:
-                lines = lines[: num - 1]
-                break
-        for num, line in enumerate(lines):
-            line = line.lstrip()
-            line = line[line.find(" ") :].lstrip()
-            atom = atomic_num[int(line[: line.find(" ")])]
-            temp = line[line.find(" ") :].lstrip()
-            lines[num] = temp[temp.find(" ") :].lstrip()
-            output.append(" " + atom + " " * (6 - len(atom)) + lines[num])
-            floatCoords = lines[num].split()
-            output2.append([float(c) for c in floatCoords])
-    elif ".xyz" in fname:
+    if ".xyz" in fname:
         for line in lines:
             if len(line.lstrip()) != len(line) and not line.isspace():
                 coord = line.lstrip().split()
@@ -754,132 +1102,96 @@ def extract_coordinates(fname):
     return output, output2, atom_count
 
 
-def distances(fname):
+def distances(fname, from_coordinates=False):
     """
     Extract a matrix of the distances between each atom and all others within the system from the Gaussian output file (.log/.out).
 
-    The function takes a Gaussian output file with extension .log or .out, and returns a 2-D distance matrix.
+    The function takes a Gaussian output file with extension .log or .out, and returns a 2-D distance matrix. By default, the distance matrix printed by Gaussian for the final geometry is read, and if Gaussian omitted it, the matrix is computed from the final coordinates with ``distance_matrix``.
 
     Parameters
     ----------
-    fname : str
-        A string specifying the complete path of the .log/.out file from which coordinates are to be extracted.
+    fname : str/GaussianLog
+        A string specifying the complete path of the .log/.out file from which coordinates are to be extracted, or an already indexed ``GaussianLog``.
+    from_coordinates : bool, Optional, default=False
+        If True, the matrix is always computed from the final coordinates, to full precision, instead of being read.
 
     Returns
     ------
     dist_df : dataframe
-        A Pandas dataframe containing the distances between each atom and all others in the system, in Angstroms.
+        A Pandas dataframe containing the distances between each atom and all others in the system, in Angstroms, see ``distance_dataframe``.
     matrix : array_like
         A 2-D Numpy array containing the distances between each atom and all others in the system, in Angstroms.
     """
-    atom_count = extract_coordinates(fname)[2]
-    try:
-        with open(fname, "r") as f:
-            lines = f.readlines()
-    except:
-        return rf"Could not locate the file {file}."
-    for num, line in enumerate(lines):
-        if "Optimization complete" in line:
-            lines = lines[num:]
-            break
-    for num, line in enumerate(lines):
-        if (
-            "Proceeding to internal job" in line
-            or "Normal termination of Gaussian" in line
-        ):
-            lines = lines[:num]
-            break
-    for num, line in enumerate(lines):
-        if "Distance matrix" in line:
-            lines = lines[num:]
-            break
-    for num, line in enumerate(lines):
-        if "Stoichiometry" in line:
-            lines = lines[:num]
-            break
-    lines = lines[2:]
-    for num, line in enumerate(lines):
-        lines[num] = line.lstrip().rstrip()
-    if atom_count > 5:
-        num_split = int(atom_count / 5)
-        for i in range(num_split):
-            append = lines[atom_count + 1 : 2 * atom_count + 1 - ((i + 1) * 5)]
-            for num, line in enumerate(append):
-                temp = line[line.find(" ") :].lstrip()
-                append[num] = temp[temp.find(" ") :].lstrip()
-                append[num] = append[num].rstrip()
-            for j in range(len(append)):
-                lines[j + (i + 1) * 5] = lines[j + (i + 1) * 5] + "   " + append[j]
-            lines = lines[:atom_count] + lines[2 * atom_count + 1 - (i + 1) * 5 :]
-    atom_list = {}
-    lines = [
-        "".join(
-            map(
-                str,
-                ["      "]
-                + [f"{i}" + " " * (11 - len(str(i))) for i in range(1, atom_count + 1)]
-                + ["\n"],
-            )
-        )
-    ] + lines
-    for i in range(1, len(lines)):
-        num = lines[i][: lines[i].find(" ")]
-        temp = lines[i][lines[i].find(" ") :].lstrip()
-        dist = temp[temp.find(" ") :].lstrip()
-        atom_name = temp[: temp.find(" ")].lstrip()
-        lines[i] = num + " " * (6 - len(num)) + dist + "\n"
-        atom_list[i] = atom_name
-
-    dist_matrix_1 = [line.split() for line in lines[1:]]
-    dist_matrix_2 = np.ndarray((atom_count, atom_count))
-    for num, row in enumerate(dist_matrix_1):
-        row = [float(x) for x in row[1:]]
-        for i in range(len(row), atom_count):
-            row.append(float(dist_matrix_1[i][num + 1]))
-        dist_matrix_2[num] = row
-
-    matrix = np.array(dist_matrix_2)
-
-    header = list(atom_list.values())
+    header = None
+    if not from_coordinates:
+        try:
+            header, matrix = _distance_matrix(fname)
+        except OSError:
+            return rf"Could not locate the file {fname}."
+        except ValueError:
+            # Gaussian omitted the distance matrix
+            pass
+    if header is None:
+        try:
+            log = _gaussian_log(fname)
+        except OSError:
+            return rf"Could not locate the file {fname}."
+        header, matrix = log.atoms, distance_matrix(log.coordinates)
+
+    return distance_dataframe(matrix, header), matrix
+
+
+def distance_dataframe(matrix, atoms):
+    """
+    Pandas view of a distance matrix, labeled with the atomic symbols.
+
+    Parameters
+    ----------
+    matrix : array_like
+        A 2-D Numpy array of shape (atom_count, atom_count) of distances, such as the output of ``distance_matrix``.
+    atoms : list
+        Atomic symbols, in the order of ``matrix``.
+
+    Returns
+    ------
+    dist_df : dataframe
+        A Pandas dataframe with a column per atom named after its symbol, the index being the atom numbers starting at 1, and a first column, "", of the atomic symbols.
+    """
+    atom_count = len(atoms)
     dist_df = pd.DataFrame(
-        dist_matrix_2, columns=header, index=[i for i in range(1, atom_count + 1)]
+        matrix, columns=atoms, index=[i for i in range(1, atom_count + 1)]
     )
-    dist_df.insert(0, "", header)
-
-    return dist_df, matrix
+    dist_df.insert(0, "", atoms)
+    return dist_df
 
 
+@cached_parser
 def dGSolvPCM(fname):
     """
     Extract the free energy of solvation from a continuum solvation calculation.
 
     Parameters
     ----------
-    fname : str
-        A string specifying the complete path of the file from which solvation free energies are to be extracted.
+    fname : str/GaussianLog
+        A string specifying the complete path of the file from which solvation free energies are to be extracted, or an already indexed ``GaussianLog``.
 
     Returns
     -------
     gSolv : float
         A float parameter representing the continuum-solvent based solvation free energy from the .log file
     """
-    gSolv = 0
-    with open(fname, "r") as p:
-        gS = p.readlines()
-    for line in gS:
-        if "DeltaG (solv)" in line:
-            gSolv = np.float(line.split()[4])
-    return gSolv
+    return _gaussian_log(fname).dG_solv
 
 
+@cached_parser
 def frequencies(fname):
     """
     Extract list of harmonic frequencies from a Gaussian frequency calculation .log/.out file.
 
     Parameters
     ----------
-    fname : str
-        A string specifying the complete path of the .log/.out file from which frequencies are to be extracted.
+    fname : str/GaussianLog
+        A string specifying the complete path of the .log/.out file from which frequencies are to be extracted, or an already indexed ``GaussianLog``.
 
     Returns
     ------
@@ -887,61 +1199,32 @@ def frequencies(fname):
         A list containing the harmonic frequencies of the system, in cm^(-1)
     """
     try:
-        with open(fname, "r") as f:
-            lines = f.readlines()
-    except:
+        log = _gaussian_log(fname)
+    except OSError:
         return rf"Could not locate the file {fname}."
-    for num, line in enumerate(lines):
-        if " Link1:  Proceeding to internal job step number  2." in line:
-            lines = lines[num:]
-            break
-    for num, line in enumerate(lines):
-        if "Harmonic frequencies (cm**-1)" in line:
-            lines = lines[num + 4 :]
-            break
-    for num, line in enumerate(lines):
-        if "Thermochemistry" in line:
-            lines = lines[:num]
-            break
-    freqValues = []
-    for line in lines:
-        if "Frequencies" in line:
-            freqValues.append([float(freq) for freq in line.split()[2:]])
-    freq = [value for sub in freqValues for value in sub]
-    return freq
+    return list(log.frequencies)
 
 
+@cached_parser
 def nbo_charges(fname):
     """
     Extract list of partial charges on each atom in the system from the Natural Population Analysis of the NBO 3.1 program built into Gaussian.
 
     Parameters
     ----------
-    file : str
-        A string specifying the complete path of the .log/.out file from which charges are to be extracted.
+    fname : str/GaussianLog
+        A string specifying the complete path of the .log/.out file from which charges are to be extracted, or an already indexed ``GaussianLog``.
 
     Returns
     ------
     partial_charges : dict
         A dictionary containing keys that specify the atom (type + index), and corresponding values that represent the partial charge on that atom.
     """
-
-    atom_count = extract_coordinates(fname)[2]
     try:
-        with open(fname, "r") as f:
-            lines = f.readlines()
-    except:
+        log = _gaussian_log(fname)
+    except OSError:
         return rf"Could not locate the file {fname}."
-    for num, line in enumerate(lines):
-        if "Summary of Natural Population Analysis" in line:
-            lines = lines[num + 6 : (num + 6) + atom_count]
-            break
-    partial_charges = {}
-    for line in lines:
-        line = line.split()
-        partial_charges[line[0] + "_" + line[1]] = np.float(line[2])
-
-    return partial_charges
+    return dict(log.nbo_charges)
 
 
 def multipole_moments(fname, center="coc"):
@@ -950,8 +1233,8 @@ def multipole_moments(fname, center="coc"):
 
     Parameters
     ----------
-    fname : str
-        Gaussian .out/.log file from which NBO charges can be extracted, and multipole moments calculated.
+    fname : str/GaussianLog
+        Gaussian .out/.log file from which NBO charges can be extracted, and multipole moments calculated, or an already indexed ``GaussianLog``.
     center : str/int/numpy.ndarray, Optional, default="coc"
         Instructions of how to calculate the origin for the calculation. Note that the dipole moment value could be translated later, but the quadrupole moment cannot, so this decision is important. By default, "coc", the center of charge is used. An integer index value that corresponds to an atom can also be used. Finally, an array of length 3, could define the origin.
 
@@ -963,8 +1246,9 @@ def multipole_moments(fname, center="coc"):
         The quadrupole moment of the set of atoms in Debye*Angstroms
 
     """
-    coords = extract_coordinates(fname)[1]
-    partials = list(nbo_charges(fname).values())
+    log = _gaussian_log(fname)
+    coords = log.coordinates
+    partials = list(log.nbo_charges.values())
 
     charges = np.array(partials)
     positions = np.array(coords)
@@ -1025,6 +1309,19 @@ def multipole_moments(fname, center="coc"):
     return dipole, quadrupole
 
 
+@cached_parser
+def _distance_matrix(fname):
+    """Atom labels and distance matrix of ``distances``, in a form that can be cached."""
+    return _gaussian_log(fname).distance_matrix
+
+
+def _gaussian_log(fname):
+    """Return ``fname`` if it is already a ``GaussianLog``, otherwise index the file it names."""
+    if isinstance(fname, GaussianLog):
+        return fname
+    return GaussianLog(fname)
+
+
 def calc_center(positions, weights):
     """
     Calculate the center of a group of coordinates based on some weighting. If the weights are masses, the result is the center of mass, if charges, the center of charge.
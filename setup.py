@@ -40,6 +40,8 @@ setup(
     ],
     description="Python package to process electronic structure calculation data (e.g., continuum solvation free energy) and statistical mechanics data (e.g., NASA polynomials) from Gaussian16, Arkane and related software. ",
     install_requires=requirements,
+    extras_require={'parquet': ['pyarrow']},
+    entry_points={'console_scripts': ['dft_toolbox=dft_toolbox.__main__:main']},
     license="NIST license",
     long_description=readme + '\n\n' + history,
     include_package_data=True,
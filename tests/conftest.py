@@ -0,0 +1,30 @@
+"""Fixtures shared by the tests of `dft_toolbox`."""
+
+import os
+import stat
+import pytest
+
+
+@pytest.fixture
+def jobs(tmp_path, monkeypatch):
+    """Three jobs in ``tmp_path``, of which 102 and 103 are in a fake ``squeue`` on PATH."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    squeue = bin_dir / "squeue"
+    squeue.write_text("#!/bin/sh\ncat {}\n".format(tmp_path / "queue.txt"))
+    squeue.chmod(squeue.stat().st_mode | stat.S_IEXEC)
+    (tmp_path / "queue.txt").write_text("102 RUNNING\n103 PENDING\n")
+    monkeypatch.setenv("PATH", "{}{}{}".format(bin_dir, os.pathsep, os.environ["PATH"]))
+
+    output_logs, error_logs = [], []
+    for i, job_id in enumerate(["101", "102", "103"]):
+        output_log = tmp_path / "outputlog{:05d}.txt".format(i)
+        output_log.write_text("Job ID: {}\nNumber of nodes:  1\n".format(job_id))
+        error_log = tmp_path / "errorlog{:05d}.txt".format(i)
+        error_log.write_text("real 0m1.0s\n")
+        output_logs.append(str(output_log))
+        error_logs.append(str(error_log))
+    (tmp_path / "sim00001.out").write_text("    -- Step size scaled by   0.000\n" * 3)
+    # The Gaussian outputs are found in the submission directory
+    monkeypatch.chdir(tmp_path)
+    return tmp_path, output_logs, error_logs
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+
+"""Tests for `dft_toolbox.batch` module."""
+
+import glob
+import os
+import pytest
+
+import dft_toolbox as dft
+
+data_dir = os.path.join(os.path.dirname(__file__), "..", "notebooks", "Ex01_supporting_files")
+
+
+@pytest.fixture(params=[False, True], ids=["uncached", "cached"])
+def parse_cache(request, tmp_path):
+    """Run a test without and with the parse cache enabled."""
+    if not request.param:
+        yield None
+        return
+    yield dft.enable_parse_cache(cache_dir=str(tmp_path / "cache"))
+    dft.disable_parse_cache()
+
+
+@pytest.mark.parametrize("backend", ["process", "thread"])
+def test_parse_logs_order_and_errors(backend, parse_cache):
+    paths = sorted(glob.glob(os.path.join(data_dir, "*_PCM.log")))[:3]
+    paths.insert(1, os.path.join(data_dir, "missing.log"))
+    results, errors = dft.parse_logs(paths, fields=["dGSolvPCM", "frequencies"], workers=2, backend=backend)
+    assert list(errors) == [1]
+    assert results[1] is None
+    for i, path in enumerate(paths):
+        if i != 1:
+            assert results[i]["dGSolvPCM"] == dft.dGSolvPCM(path)
+            assert results[i]["frequencies"] == dft.GaussianLog(path).frequencies
+
+
+@pytest.mark.parametrize("backend", ["process", "thread"])
+def test_parse_logs_all_fields(backend, parse_cache):
+    paths = sorted(glob.glob(os.path.join(data_dir, "*_gas.log")))
+    fields = ["extract_coordinates", "frequencies", "nbo_charges", "dGSolvPCM"]
+    results, errors = dft.parse_logs(paths, fields=fields, workers=4, backend=backend)
+    assert not errors
+    assert all(result is not None and set(result) == set(fields) for result in results)
+
+
+def test_parse_logs_unknown_field():
+    with pytest.raises(ValueError):
+        dft.parse_logs([], fields=["energy"])
+
+
+def test_create_arkane_inputs(tmp_path, monkeypatch, parse_cache):
+    specs = [{"name": "sim{}".format(i), "freq_log": os.path.join(data_dir, "sim00{}_gas.log".format(i)), "pcm_log": os.path.join(data_dir, "sim00{}_PCM.log".format(i))} for i in (1, 2, 3)]
+    specs[1]["spinMultiplicity"] = 2
+    kwargs_lot = {"method": "B3LYP", "basis": "aug-cc-pVDZ"}
+    os.makedirs(tmp_path / "serial")
+    monkeypatch.chdir(tmp_path / "serial")
+    for spec in specs:
+        dft.create_arkane_input(**spec, kwargs_lot=kwargs_lot)
+    os.makedirs(tmp_path / "batch")
+    monkeypatch.chdir(tmp_path / "batch")
+    (tmp_path / "batch" / "input.py").write_text("old\n")
+    assert dft.create_arkane_inputs(specs, workers=2, kwargs_lot=kwargs_lot) == ["sim1", "sim2", "sim3"]
+    for fname in ["input.py", "sim1.py", "sim2.py", "sim3.py"]:
+        assert (tmp_path / "batch" / fname).read_text() == (tmp_path / "serial" / fname).read_text()
+
+    with pytest.raises(ValueError):
+        dft.create_arkane_inputs([{"name": "missing", "freq_log": "missing.log"}], workers=1)
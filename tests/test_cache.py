@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+
+"""Tests for `dft_toolbox.cache` module."""
+
+import glob
+import os
+import shutil
+import numpy as np
+import pytest
+
+import dft_toolbox as dft
+from dft_toolbox.cache import _decode, _encode
+
+data_dir = os.path.join(os.path.dirname(__file__), "..", "notebooks", "Ex01_supporting_files")
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = dft.enable_parse_cache(cache_dir=str(tmp_path / "cache"))
+    yield cache
+    dft.disable_parse_cache()
+
+
+def test_encode_round_trip():
+    value = ([" O     0.0 0.0\n"], np.arange(6.0).reshape(2, 3), 2, {"Na_1": 0.9}, [1.5, 2.0], None, "text")
+    decoded = _decode(_encode(value))
+    assert decoded[0] == value[0]
+    assert np.array_equal(decoded[1], value[1])
+    assert decoded[2:] == value[2:]
+
+
+def test_cached_values_and_invalidation(cache, tmp_path):
+    fname = str(tmp_path / "sim001_PCM.log")
+    shutil.copy(os.path.join(data_dir, "sim001_PCM.log"), fname)
+    coords = dft.extract_coordinates(fname)
+    assert cache.get(fname, "extract_coordinates")[0]
+    cached = dft.extract_coordinates(fname)
+    assert cached[0] == coords[0] and np.array_equal(cached[1], coords[1]) and cached[2] == coords[2]
+    assert dft.dGSolvPCM(fname) == -32.67
+
+    with open(fname, "a") as f:
+        f.write(" DeltaG (solv)                            (kcal/mol) =     -10.00\n")
+    assert not cache.get(fname, "dGSolvPCM")[0]
+    assert dft.dGSolvPCM(fname) == -10.0
+
+
+def test_growing_file_is_parsed_again(cache, tmp_path):
+    fname = str(tmp_path / "running.log")
+    with open(fname, "w") as f:
+        f.write("step 1\n")
+
+    @dft.cached_parser
+    def steps(fname):
+        with open(fname) as f:
+            count = len(f.readlines())
+        # The job appends a step while the file is parsed
+        with open(fname, "a") as f:
+            f.write("step {}\n".format(count + 1))
+        return count
+
+    assert steps(fname) == 1
+    assert steps(fname) == 2
+
+
+def test_lru_eviction(cache, tmp_path):
+    paths = {}
+    for key in "ABC":
+        paths[key] = str(tmp_path / "{}.log".format(key))
+        open(paths[key], "w").close()
+    cache.set(paths["A"], "value", np.zeros(100))
+    nbytes = cache.connection.execute("SELECT nbytes FROM entries").fetchone()[0]
+    cache.max_size = 2 * nbytes
+    cache.set(paths["B"], "value", np.zeros(100))
+    # Reading A makes B the least recently used entry
+    assert cache.get(paths["A"], "value")[0]
+    cache.set(paths["C"], "value", np.zeros(100))
+    assert [cache.get(paths[key], "value")[0] for key in "ABC"] == [True, False, True]
+
+
+def test_cache_shared_by_threads(cache):
+    paths = sorted(glob.glob(os.path.join(data_dir, "*_gas.log")))
+    for _ in range(2):
+        # Cold, then warm cache
+        results, errors = dft.parse_logs(paths, fields=["dGSolvPCM", "frequencies"], workers=4, backend="thread")
+        assert not errors
+        assert [result["frequencies"] for result in results] == [dft.GaussianLog(path).frequencies for path in paths]
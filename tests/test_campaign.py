@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+
+"""Tests for `dft_toolbox.campaign` module."""
+
+import os
+import numpy as np
+import pytest
+
+import dft_toolbox as dft
+
+data_dir = os.path.join(os.path.dirname(__file__), "..", "notebooks", "Ex01_supporting_files")
+
+
+@pytest.mark.parametrize("extension", [".parquet", ".feather"])
+def test_campaign_table_round_trip(tmp_path, extension):
+    pytest.importorskip("pyarrow")
+    names = ["sim001", "sim002", "sim003"]
+    table = dft.CampaignTable()
+    errors = table.add_logs(
+        [os.path.join(data_dir, name + "_gas.log") for name in names[:2]],
+        [os.path.join(data_dir, name + "_PCM.log") for name in names[:2]],
+        group="Na_5w",
+        workers=1,
+    )
+    assert errors == {}
+    table.add(os.path.join(data_dir, "sim003_gas.log"), group="other")
+
+    fname = str(tmp_path / ("campaign" + extension))
+    table.write(fname)
+    subset = dft.CampaignTable.read(fname, columns=["simulation", "dG_solv", "frequencies"], groups=["Na_5w"])
+    assert list(subset.columns) == ["simulation", "dG_solv", "frequencies"]
+    assert list(subset["simulation"]) == names[:2]
+    assert np.allclose(subset["dG_solv"], [dft.dGSolvPCM(os.path.join(data_dir, name + "_PCM.log")) for name in names[:2]])
+    assert np.allclose(subset["frequencies"][0], dft.frequencies(os.path.join(data_dir, "sim001_gas.log")))
+
+
+def test_campaign_table_partitioned_by_simulation(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    table = dft.CampaignTable()
+    table.add_logs([os.path.join(data_dir, "sim00{}_gas.log".format(i)) for i in (1, 2, 3)], workers=1)
+    fname = str(tmp_path / "campaign.parquet")
+    table.write(fname)
+    assert pq.ParquetFile(fname).metadata.num_row_groups == 3
+    subset = dft.CampaignTable.read(fname, columns=["simulation", "scf_energy"], groups=["sim002"])
+    assert list(subset["simulation"]) == ["sim002"]
@@ -2,12 +2,142 @@
 
 """Tests for `dft_toolbox` package."""
 
+import os
+import subprocess
 import sys
 import pytest
+import numpy as np
 
 import dft_toolbox
 
+data_dir = os.path.join(os.path.dirname(__file__), "..", "notebooks", "Ex01_supporting_files")
+
 
 def test_dft_toolbox_imported():
     """Sample test, will always pass so long as import statement worked."""
     assert "dft_toolbox" in sys.modules
+
+
+def test_boltzmann_average_batched():
+    """Averages along an axis match row-by-row evaluation and don't overflow in float64."""
+    rng = np.random.default_rng(0)
+    G = rng.normal(-90, 2, size=(4, 10))
+    S = rng.normal(0.03, 0.005, size=(4, 10))
+    beta = 1 / (dft_toolbox.R * 298.15)
+    avgG, avgH, avgS = dft_toolbox.boltzmann_average(G, beta, H=G, S=S, axis=-1)
+    assert avgG.shape == (4,)
+    assert np.all(np.isfinite(avgG))
+    assert np.allclose(avgG, avgH)
+    for i in range(4):
+        pxi = np.exp(-(G[i] - G[i].min()) * beta)
+        pxi /= pxi.sum()
+        assert np.isclose(avgG[i], dft_toolbox.boltzmannG(G[i], np.full(10, beta)))
+        assert np.isclose(avgG[i], np.dot(G[i], pxi))
+        assert np.isclose(avgS[i], np.dot(S[i], pxi) - dft_toolbox.R * np.dot(pxi, np.log(pxi)))
+
+
+@pytest.mark.parametrize("method", ["percentile", "bca"])
+def test_bootstrap_boltzmann_matches_scipy(method):
+    """Intervals agree with scipy's bootstrap of boltzmannG and are reproducible when chunked."""
+    st = pytest.importorskip("scipy.stats")
+    rng = np.random.default_rng(0)
+    G = rng.normal(-90, 2, 10)
+    temperatures = np.array([283.15, 323.15])
+    output = dft_toolbox.bootstrap_boltzmann(G, temperatures=temperatures, n_resamples=5000, seed=1, method=method)["G"]
+    chunked = dft_toolbox.bootstrap_boltzmann(G, temperatures=temperatures, n_resamples=5000, seed=1, method=method, chunk_size=700)["G"]
+    assert output.shape == (3, 2)
+    assert np.array_equal(output, chunked)
+    # Chunks smaller than the number of samples also split the BCa jackknife
+    chunked = dft_toolbox.bootstrap_boltzmann(G, temperatures=temperatures, n_resamples=5000, seed=1, method=method, chunk_size=3)["G"]
+    assert np.array_equal(output, chunked)
+    for i, temp in enumerate(temperatures):
+        beta = np.full(len(G), 1 / (dft_toolbox.R * temp))
+        ref = st.bootstrap((G, beta), dft_toolbox.boltzmannG, paired=True, vectorized=True, n_resamples=5000, method=method, random_state=2)
+        assert np.isclose(output[0, i], dft_toolbox.boltzmannG(G, beta))
+        assert np.allclose(output[1:, i], [ref.confidence_interval.low, ref.confidence_interval.high], atol=0.1)
+
+
+def test_nasa_thermo_table_grid():
+    """Evaluating the table on a grid matches calc_thermo_NASA with the coefficients of the valid range."""
+    table = dft_toolbox.NasaThermoTable.from_chemkin(os.path.join(data_dir, "refChem.inp"))
+    assert table.species == ["Cl_ion", "H2O", "Na_ion"]
+    temperatures = np.array([300.0, 768.42, 900.0, 5000.0])
+    thermo = table.evaluate(temperatures)
+    assert thermo.shape == (3, 4, 4)
+    i = table.index["H2O"]
+    assert np.allclose(thermo[i, 1], dft_toolbox.calc_thermo_NASA(table.coeffs_low[i], temp=768.42))
+    assert np.allclose(thermo[i, 2], dft_toolbox.calc_thermo_NASA(table.coeffs_high[i], temp=900.0))
+    assert np.all(np.isnan(thermo[:, 3]))
+
+
+def test_calc_thermo_NASA_broadcast():
+    """A coefficient matrix over a temperature array matches scalar evaluation element by element."""
+    table = dft_toolbox.NasaThermoTable.from_chemkin(os.path.join(data_dir, "refChem.inp"))
+    temperatures = np.linspace(300, 700, 5)
+    thermo = dft_toolbox.calc_thermo_NASA(table.coeffs_low, temperatures)
+    assert thermo.shape == (4, 3, 5)
+    for i, coeffs in enumerate(table.coeffs_low):
+        for j, temp in enumerate(temperatures):
+            assert np.allclose(thermo[:, i, j], dft_toolbox.calc_thermo_NASA(list(coeffs), temp=temp))
+
+
+def test_create_job_array(tmp_path):
+    xyz = os.path.join(data_dir, "sodiumIonCluster_1.xyz")
+    structures = [xyz, xyz, (["Na", "O"], np.array([[0.0, 0.0, 0.0], [2.4, 0.0, 0.0]]))]
+    manifest = dft_toolbox.create_job_array(structures, "opt freq b3lyp/6-31g(d)", "b3lyp/6-31g(d)", str(tmp_path / "array"), 1, "batch", 64, runs_per_task=2, max_running=4)
+    assert [task for task, _ in manifest] == [0, 0, 1]
+    assert manifest[2][1] == str(tmp_path / "array_000002")
+    assert all(os.path.isfile(input_path + "_gas.com") and os.path.isfile(input_path + "_PCM.com") for _, input_path in manifest)
+    with open(tmp_path / "array_000002_gas.com") as f:
+        assert f.readlines()[6:8] == ["Na      0.00000      0.00000      0.00000\n", "O      2.40000      0.00000      0.00000\n"]
+
+    script = (tmp_path / "array.slurm").read_text()
+    assert "#SBATCH --array=0-1%4\n" in script and "export GAUSS_SCRDIR" in script
+    assert subprocess.run(["sh", "-n", str(tmp_path / "array.slurm")]).returncode == 0
+    # The inputs of a task are read back from the manifest
+    lines = [line for line in script.splitlines() if line.startswith(("manifest=", "task=", "inputs="))]
+    command = "\n".join(lines + ["echo ${inputs}"])
+    output = subprocess.run(["sh", "-c", command], env={"SLURM_ARRAY_TASK_ID": "0"}, stdout=subprocess.PIPE, universal_newlines=True).stdout
+    assert output.split() == [manifest[0][1], manifest[1][1]]
+
+    # Arrays larger than MaxArraySize are split over scripts offset into the same manifest
+    manifest = dft_toolbox.create_job_array(structures, "opt", "b3lyp", str(tmp_path / "split"), 1, "batch", 64, max_array_size=2)
+    assert [task for task, _ in manifest] == [0, 1, 2]
+    scripts = [(tmp_path / "split_part{:03d}.slurm".format(part)).read_text() for part in range(2)]
+    assert "#SBATCH --array=0-1\n" in scripts[0] and "#SBATCH --array=0-0\n" in scripts[1]
+    lines = [line for line in scripts[1].splitlines() if line.startswith(("manifest=", "task=", "inputs="))]
+    command = "\n".join(lines + ["echo ${inputs}"])
+    output = subprocess.run(["sh", "-c", command], env={"SLURM_ARRAY_TASK_ID": "0"}, stdout=subprocess.PIPE, universal_newlines=True).stdout
+    assert output.split() == [manifest[2][1]]
+
+
+def test_pqct_free_energies():
+    rng = np.random.default_rng(3)
+    temperatures = np.linspace(283.15, 323.15, 4)
+    G_cluster = rng.normal(-100, 2, size=(4, 30))
+    G_H2O = np.linspace(-10, -12, 4)
+    G_solute = np.linspace(-20, -21, 4)
+    dG_pcm = rng.normal(-40, 1, size=30)
+    n_water = rng.integers(3, 7, size=30)
+
+    dG_solv, averaged = dft_toolbox.pqct_free_energies(G_cluster, G_H2O, dG_pcm, n_water, temperatures, G_solute=G_solute, dG_solv_H2O=-1.2, n_resamples=500, seed=0)
+    expected = [
+        [dft_toolbox.calc_pQCT(G_cluster[t, i], G_H2O[t], dG_pcm[i], n_water[i], dG_solv_H2O=-1.2, temp=temp) - G_solute[t] - dft_toolbox.R * temp * np.log(24.46) for i in range(30)]
+        for t, temp in enumerate(temperatures)
+    ]
+    assert np.allclose(dG_solv, expected)
+    assert averaged.shape == (3, 4)
+    assert np.allclose(averaged, dft_toolbox.bootstrap_boltzmann(expected, temperatures=temperatures, n_resamples=500, seed=0)["G"])
+
+    G_aq, averaged = dft_toolbox.pqct_free_energies(G_cluster[0], G_H2O[0], dG_pcm, n_water, temperatures[0], n_resamples=100, seed=0)
+    assert G_aq.shape == (30,) and averaged.shape == (3,)
+    assert np.isclose(G_aq[0], dft_toolbox.calc_pQCT(G_cluster[0, 0], G_H2O[0], dG_pcm[0], n_water[0], temp=temperatures[0]))
+    with pytest.raises(ValueError):
+        dft_toolbox.pqct_free_energies(G_cluster, G_H2O[:2], dG_pcm, n_water, temperatures)
+
+    # The delta method interval is close to the bootstrapped one
+    G_cluster = rng.normal(-100, 0.5, size=(4, 200))
+    dG_solv, delta = dft_toolbox.pqct_free_energies(G_cluster, G_H2O, -40, 5, temperatures, G_solute=G_solute, method="delta")
+    bootstrapped = dft_toolbox.bootstrap_boltzmann(dG_solv, temperatures=temperatures, n_resamples=4000, seed=0)["G"]
+    assert np.allclose(delta[0], bootstrapped[0])
+    assert np.allclose(delta[2] - delta[1], bootstrapped[2] - bootstrapped[1], rtol=0.25)
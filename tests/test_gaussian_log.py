@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+
+"""Tests for `dft_toolbox.gaussian_log` module."""
+
+import os
+import numpy as np
+import pytest
+
+import dft_toolbox as dft
+
+data_dir = os.path.join(os.path.dirname(__file__), "..", "notebooks", "Ex01_supporting_files")
+
+log_text = """ Optimization completed.
+                          Input orientation:
+ ---------------------------------------------------------------------
+ Center     Atomic      Atomic             Coordinates (Angstroms)
+ Number     Number       Type             X           Y           Z
+ ---------------------------------------------------------------------
+      1          8           0        0.000000    0.000000    0.000000
+      2          1           0        0.960000    0.000000    0.000000
+      3          1           0        0.000000    0.960000    0.000000
+ ---------------------------------------------------------------------
+                    Distance matrix (angstroms):
+                    1          2          3
+     1  O    0.000000
+     2  H    0.960000   0.000000
+     3  H    0.960000   1.357645   0.000000
+ Stoichiometry    H2O
+ Rotational symmetry number  2.
+ Summary of Natural Population Analysis:
+
+                                       Natural Population
+                Natural  -----------------------------------------------
+    Atom  No    Charge         Core      Valence    Rydberg      Total
+ -----------------------------------------------------------------------
+      O    1   -0.90000      1.99979     6.92613    0.01022     8.90000
+      H    2    0.45000      0.00000     0.54000    0.01000     0.55000
+      H    3    0.45000      0.00000     0.54000    0.01000     0.55000
+ =======================================================================
+ DeltaG (solv)                            (kcal/mol) =      -1.34
+ Normal termination of Gaussian 16.
+"""
+
+
+@pytest.fixture
+def water_log(tmp_path):
+    fname = tmp_path / "water_gas.log"
+    fname.write_text(log_text)
+    return str(fname)
+
+
+def test_sections_from_single_index(water_log):
+    log = dft.GaussianLog(water_log)
+    assert log.atoms == ["O", "H", "H"]
+    assert log.symmetry_number == 2
+    assert log.dG_solv == -1.34
+    assert log.nbo_charges == {"O_1": -0.9, "H_2": 0.45, "H_3": 0.45}
+    atoms, matrix = log.distance_matrix
+    assert np.allclose(matrix, matrix.T)
+    assert matrix[2, 1] == 1.357645
+
+
+def test_wrappers_accept_gaussian_log(water_log):
+    log = dft.GaussianLog(water_log)
+    coords = dft.extract_coordinates(log)
+    assert coords[2] == 3
+    assert coords[0][1] == " H     0.960000    0.000000    0.000000\n"
+    assert dft.nbo_charges(water_log) == dft.nbo_charges(log)
+    dipole, quadrupole = dft.multipole_moments(log, center=0)
+    assert dipole > 0
+
+
+def test_distance_matrix_matches_geometry():
+    log = dft.GaussianLog(os.path.join(data_dir, "sim001_gas.log"))
+    coords = log.coordinates
+    matrix = dft.distances(log)[1]
+    expected = np.linalg.norm(coords[:, np.newaxis] - coords[np.newaxis, :], axis=-1)
+    assert matrix.shape == (16, 16)
+    assert np.allclose(matrix, expected, atol=1e-5)
+    assert len(log.job_steps) == 2
+
+
+def test_locators_without_full_index():
+    """Sections are found by searching the memory map, the full index is only built on request."""
+    log = dft.GaussianLog(os.path.join(data_dir, "sim001_gas.log"))
+    coords = log.coordinates
+    atoms, last = log.last_geometry
+    assert log._offsets is None
+    assert len(atoms) == 16 and last.shape == (16, 3)
+    assert log.symmetry_number == 1
+
+    indexed = dft.GaussianLog(log.fname)
+    indexed.offsets
+    assert np.array_equal(indexed.coordinates, coords)
+    assert np.array_equal(indexed.last_geometry[1], last)
+    assert indexed._last("input_orientation") == indexed.offsets["input_orientation"][-1]
+
+
+def test_iter_geometries(tmp_path):
+    fname = os.path.join(data_dir, "sim001_gas.log")
+    log = dft.GaussianLog(fname)
+    steps = list(dft.iter_geometries(log))
+    assert len(steps) == len(log.offsets["input_orientation"])
+    assert [step for step, _, _ in steps] == list(range(len(steps)))
+    assert np.array_equal(steps[-1][2], log.last_geometry[1])
+
+    energies, coords = dft.read_geometries(fname)
+    assert coords.dtype == np.float32 and coords.shape == (len(steps), 16, 3)
+    assert np.allclose(coords[-1], log.last_geometry[1], atol=1e-5)
+    assert energies[0] == steps[0][1] and energies[-1] == log.scf_energy
+    # The converged geometry printed at the end of the optimization has no SCF of its own
+    assert np.isnan(energies[-2]) and np.isfinite(energies[:-2]).all()
+
+    # A table still being written at the end of the file is skipped
+    partial = tmp_path / "partial.log"
+    with open(fname, "rb") as f:
+        data = f.read()
+    partial.write_bytes(data[: data.rfind(b"Input orientation") + 300])
+    energies, coords = dft.read_geometries(str(partial))
+    assert coords.shape == (len(steps) - 1, 16, 3)
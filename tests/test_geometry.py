@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+
+"""Tests for `dft_toolbox.geometry` module."""
+
+import glob
+import itertools
+import os
+import numpy as np
+import pytest
+
+import dft_toolbox as dft
+
+data_dir = os.path.join(os.path.dirname(__file__), "..", "notebooks", "Ex01_supporting_files")
+
+
+def test_distance_matrix():
+    fname = os.path.join(data_dir, "sim001_gas.log")
+    df, table = dft.distances(fname)
+    matrix = dft.distance_matrix(dft.extract_coordinates(fname)[1])
+    assert matrix.dtype == np.float64
+    assert np.allclose(matrix, table, atol=1e-5)
+    computed_df, computed = dft.distances(fname, from_coordinates=True)
+    assert np.array_equal(computed, matrix)
+    assert list(computed_df.columns) == list(df.columns) and list(computed_df.index) == list(df.index)
+
+    rng = np.random.default_rng(0)
+    coords = rng.uniform(-2, 12, size=(30, 3))
+    box = np.array([10.0, 11.0, 12.0])
+    images = np.array(list(itertools.product([-2, -1, 0, 1, 2], repeat=3))) * box
+    expected = np.linalg.norm(coords[:, None, None] - coords[None, :, None] - images, axis=-1).min(axis=-1)
+    assert np.allclose(dft.distance_matrix(coords, box=box), expected)
+    assert np.allclose(dft.distance_matrix(coords, box=10.0), dft.distance_matrix(coords, box=[10.0] * 3))
+
+    large = rng.uniform(0, 50, size=(dft.float32_atoms + 1, 3))
+    matrix = dft.distance_matrix(large)
+    assert matrix.dtype == np.float32
+    assert np.allclose(matrix[::97], np.linalg.norm(large[::97, None] - large[None], axis=-1), atol=1e-4)
+
+
+def test_neighbor_pairs():
+    rng = np.random.default_rng(1)
+    box = 15.0
+    coords = rng.uniform(-box, box, size=(300, 3))
+    matrix = dft.distance_matrix(coords, box=box)
+    cutoff = 3.5
+    expected = np.argwhere(np.triu(matrix <= cutoff, 1))
+
+    pairs, distances, coordination = dft.neighbor_pairs(coords, cutoff, box=box)
+    assert np.array_equal(pairs, expected)
+    assert np.allclose(distances, matrix[pairs[:, 0], pairs[:, 1]])
+    assert np.array_equal(coordination, (matrix <= cutoff).sum(axis=1) - 1)
+
+    # Neighbors of a few central atoms among a subset of the atoms
+    selection, neighbors = [5, 0], np.arange(0, 300, 3)
+    pairs, distances, coordination = dft.neighbor_pairs(coords, cutoff, box=box, selection=selection, neighbors=neighbors)
+    for k, center in enumerate(selection):
+        found = pairs[pairs[:, 0] == center, 1]
+        within = neighbors[(matrix[center, neighbors] <= cutoff) & (neighbors != center)]
+        assert np.array_equal(found, within) and coordination[k] == len(within)
+
+    pairs, distances, coordination = dft.neighbor_pairs(coords, cutoff)
+    assert np.array_equal(pairs, np.argwhere(np.triu(dft.distance_matrix(coords) <= cutoff, 1)))
+
+
+def test_wrap_coordinates_and_files(tmp_path):
+    pattern = os.path.join(data_dir, "sodiumIonCluster_*.xyz")
+    fnames = sorted(glob.glob(pattern))
+    frames = dft.read_xyz(fnames[-1])[1] + np.random.default_rng(2).uniform(-3, 3, size=(5, 1, 3))
+    wrapped = dft.wrap_coordinates(frames, 8.0, 4.0)
+    assert wrapped.shape == frames.shape
+    for frame, expected in zip(frames, wrapped):
+        columns = [dft.modify_coordinates(frame[:, axis], 8.0, 4.0) for axis in range(3)]
+        assert np.array_equal(np.transpose(columns), expected)
+    assert np.allclose(dft.wrap_coordinates(frames, 8.0, 4.0, center=frames[:, 0]), wrapped)
+
+    outputs = dft.wrap_xyz_files(pattern, 8.0, 4.0, str(tmp_path / "wrapped"), workers=2)
+    assert [os.path.basename(output) for output in outputs] == [os.path.basename(fname) for fname in fnames]
+    copy = tmp_path / "copy.xyz"
+    copy.write_bytes(open(fnames[0], "rb").read())
+    dft.coordinate_wrapper(str(copy), 8.0, 4.0)
+    assert copy.read_text() == open(outputs[0]).read()
+    assert np.allclose(dft.extract_coordinates(outputs[-1])[1], dft.wrap_coordinates(dft.read_xyz(fnames[-1])[1], 8.0, 4.0), atol=1e-5)
+    with pytest.raises(ValueError):
+        dft.wrap_xyz_files(fnames[:1], 8.0, 4.0, data_dir)
+
+
+def water_box(rng, n_waters=60, box=12.0):
+    """Atoms and coordinates of a Na+ ion and ``n_waters`` waters in a periodic box."""
+    oxygens = rng.uniform(0, box, size=(n_waters, 3))
+    hydrogens = oxygens[:, None] + rng.normal(scale=0.6, size=(n_waters, 2, 3))
+    waters = np.concatenate([oxygens[:, None], hydrogens], axis=1).reshape(-1, 3)
+    atoms = ["Na"] + ["O", "H", "H"] * n_waters
+    return atoms, np.vstack([rng.uniform(0, box, size=(1, 3)), waters]) % box
+
+
+def test_cluster_pipeline(tmp_path, monkeypatch):
+    rng = np.random.default_rng(3)
+    frames = [water_box(rng) for _ in range(3)]
+    trajectory = tmp_path / "traj.xyz"
+    with open(trajectory, "w") as f:
+        for atoms, coords in frames:
+            f.write("{}\nframe\n".format(len(atoms)))
+            f.writelines("{} {:.6f} {:.6f} {:.6f}\n".format(atom, *xyz) for atom, xyz in zip(atoms, coords))
+        f.write("181\nframe being written\nNa 1.0 2.0\n")
+    read = list(dft.iter_xyz_frames(str(trajectory)))
+    assert len(read) == 3 and list(read[1][0]) == frames[1][0]
+    assert np.allclose(read[1][1], frames[1][1], atol=1e-6)
+
+    atoms, coords = frames[0]
+    index = dft.select_cluster(atoms, coords, 0, 4, box=12.0)
+    distances = dft.distance_matrix(coords, box=12.0)[0, 1::3]
+    assert np.array_equal(index[1::3], 1 + 3 * np.argsort(distances)[:4])
+    assert np.array_equal(index[2::3], index[1::3] + 1)
+
+    clusters = list(dft.iter_clusters(str(trajectory), 0, 4, box=12.0, atom_map={"Na": "Na"}))
+    frame, cluster_atoms, cluster = clusters[0]
+    assert cluster_atoms == ["Na"] + ["O", "H", "H"] * 4
+    assert np.array_equal(cluster[0], np.zeros(3)) and np.all(np.abs(cluster[1::3]) <= 6.0)
+    assert np.allclose(np.linalg.norm(cluster[1::3], axis=1), np.sort(distances)[:4])
+    # Hydrogens are at their minimum image distance from their oxygen
+    oxygens = index[1::3]
+    bonds = np.stack([oxygens, oxygens + 1], axis=1)
+    assert np.allclose(np.linalg.norm(cluster[2::3] - cluster[1::3], axis=1), dft.pair_distances(coords, bonds, box=12.0))
+
+    monkeypatch.chdir(tmp_path)
+    names = dft.create_cluster_inputs(str(trajectory), 0, 4, "opt freq b3lyp/6-31g(d)", "b3lyp/6-31g(d)", box=12.0, charge=1)
+    assert names == ["cluster000000", "cluster000001", "cluster000002"]
+    with open("cluster000002_gas.com") as f:
+        lines = f.readlines()
+    assert lines[5] == "1 1\n" and len(lines) == 6 + 13 + 1
+    assert np.allclose(np.array([line.split()[1:] for line in lines[6:19]], dtype=float), clusters[2][2], atol=1e-5)
+
+
+def test_iter_clusters_whole_molecules():
+    # The water straddles half the box length from the ion
+    atoms = ["Na", "O", "H", "H"]
+    coords = [[0.0, 0.0, 0.0], [5.8, 0.0, 0.0], [6.4, 0.0, 0.0], [5.8, 0.6, 0.0]]
+    _, _, cluster = next(dft.iter_clusters([(atoms, coords)], 0, 1, box=12.0))
+    assert np.allclose(cluster, coords)
+    # And is whole if the trajectory wrapped its atoms independently
+    coords[2] = [-5.6, 0.0, 0.0]
+    _, _, cluster = next(dft.iter_clusters([(atoms, coords)], 0, 1, box=12.0))
+    assert np.allclose(cluster[2], [6.4, 0.0, 0.0])
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+
+"""Tests for `dft_toolbox.jobs` module."""
+
+import os
+import numpy as np
+
+import dft_toolbox as dft
+
+data_dir = os.path.join(os.path.dirname(__file__), "..", "notebooks", "Ex01_supporting_files")
+
+
+def test_job_monitor(jobs):
+    tmp_path, output_logs, error_logs = jobs
+    monitor = dft.JobMonitor("user", output_logs, error_logs=error_logs, n_points=4)
+    assert monitor.gaussian_outputs[1] == str(tmp_path / "sim00001.out")
+    status = monitor.check()
+    assert status == {"Running": ["102", "103"], "Oscillating": [], "Complete": ["101"], "Failed": []}
+
+    # Only the appended lines are read, an incomplete line is left for the next check
+    offset = monitor.detector.jobs[monitor.gaussian_outputs[1]]["offset"]
+    with open(monitor.gaussian_outputs[1], "a") as f:
+        f.write("    -- Step size scaled by   0.000\n    -- Step size scaled")
+    assert monitor.check()["Oscillating"] == ["102"]
+    assert monitor.detector.jobs[monitor.gaussian_outputs[1]]["offset"] == offset + 35
+
+    (tmp_path / "queue.txt").write_text("103 RUNNING\n")
+    with open(error_logs[1], "a") as f:
+        f.write("Error: segmentation violation\n")
+    monitor.check()
+    monitor.write_csv(monitor.check(), str(tmp_path / "status.csv"))
+    assert (tmp_path / "status.csv").read_text().splitlines() == ["JobID,Status", "103,In Progress", "101,Complete", "102,Failed"]
+
+
+def test_job_monitor_gaussian_dir(jobs, monkeypatch):
+    tmp_path, output_logs, error_logs = jobs
+    monkeypatch.chdir(tmp_path.parent)
+    monitor = dft.JobMonitor("user", output_logs, error_logs=error_logs, gaussian_dir=str(tmp_path))
+    assert monitor.gaussian_outputs[1] == str(tmp_path / "sim00001.out")
+    assert dft.JobMonitor("user", output_logs, error_logs=error_logs).gaussian_outputs[1] == str(tmp_path.parent / "sim00001.out")
+
+
+def test_job_monitor_state_file(jobs):
+    tmp_path, output_logs, error_logs = jobs
+    state_file = str(tmp_path / "state.json")
+    dft.JobMonitor("user", output_logs, error_logs=error_logs, state_file=state_file).check()
+    size = os.path.getsize(state_file)
+    assert len(dft.OscillationDetector(state_file).jobs) == 2
+
+    # A finished job is dropped from the state file of the next run
+    (tmp_path / "queue.txt").write_text("103 RUNNING\n")
+    dft.JobMonitor("user", output_logs, error_logs=error_logs, state_file=state_file).check()
+    assert list(dft.OscillationDetector(state_file).jobs) == [os.path.abspath(str(tmp_path / "sim00002.out"))]
+    assert os.path.getsize(state_file) < size
+
+
+def test_check_oscillating_job(jobs):
+    tmp_path, output_logs, error_logs = jobs
+    assert dft.checkOscillatingJob(["102"], output_logs, n_points=3) == [True]
+    assert dft.checkOscillatingJob(["102", "103"], output_logs, n_points=4) == [False, False]
+
+
+def optimization_steps(energies, step_size=0.1):
+    return "".join(
+        " SCF Done:  E(RB3LYP) =  {:.9f}     A.U. after    6 cycles\n"
+        " RMS     Force            0.002000     0.000300     NO \n"
+        "    -- Step size scaled by   {:.3f}\n".format(energy, step_size)
+        for energy in energies
+    )
+
+
+def test_oscillation_detector(tmp_path):
+    state_file = str(tmp_path / "state.json")
+    fname = tmp_path / "sim00001.out"
+    steps = np.arange(40)
+    rotation = -500.0 + 1e-3 * np.sin(2 * np.pi * steps / 8)
+    fname.write_text(optimization_steps(rotation[:20]))
+
+    detector = dft.OscillationDetector(state_file)
+    assert detector.check([str(fname)]) == {str(fname): "sinusoidal"}
+    offset = detector.jobs[str(fname)]["offset"]
+    assert offset == os.path.getsize(fname)
+
+    # The state is resumed from the file, only the appended steps are read
+    with open(fname, "a") as f:
+        f.write(optimization_steps(rotation[20:], step_size=0.0))
+    detector = dft.OscillationDetector(state_file, window=30)
+    state = detector.update(str(fname))
+    assert len(state["energies"]) == 30 and state["energies"][-1] == round(rotation[-1], 9)
+    assert detector.classify(str(fname), update=False) == "piecewise"
+
+    # A converging optimization
+    assert detector.classify(os.path.join(data_dir, "sim001_gas.log")) is None
+    fname.write_text(optimization_steps(-500.0 - 1e-3 * np.sqrt(steps)))
+    assert detector.classify(str(fname)) is None
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+
+"""Tests for `dft_toolbox.monitor` module."""
+
+import asyncio
+import json
+import subprocess
+import sys
+
+from dft_toolbox.monitor import MonitorService
+
+
+async def http_get(path, port=None, socket_path=None):
+    if socket_path is not None:
+        reader, writer = await asyncio.open_unix_connection(socket_path)
+    else:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write("GET {} HTTP/1.0\r\nHost: localhost\r\n\r\n".format(path).encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    header, body = response.split(b"\r\n\r\n", 1)
+    return header.split(b"\r\n")[0].decode(), json.loads(body)
+
+
+def test_monitor_service(jobs):
+    tmp_path = jobs[0]
+
+    async def session():
+        service = MonitorService("user", [str(tmp_path)], interval=3600, n_points=3)
+        server = await service.start_server(port=0)
+        port = server.sockets[0].getsockname()[1]
+        status = await service.poll()
+        line, served = await http_get("/status", port=port)
+        missing, _ = await http_get("/jobs", port=port)
+
+        # A new job appears and the scheduler fails, the previous status is kept
+        (tmp_path / "outputlog00003.txt").write_text("Job ID: 104\n")
+        (tmp_path / "queue.txt").write_text("104 RUNNING\n")
+        await service.poll()
+        (tmp_path / "bin" / "squeue").write_text("#!/bin/sh\nexit 1\n")
+        failed = await service.poll()
+        server.close()
+        await server.wait_closed()
+        return status, line, served, missing, failed
+
+    status, line, served, missing, failed = asyncio.run(session())
+    assert line == "HTTP/1.0 200 OK" and missing == "HTTP/1.0 404 Not Found"
+    assert served["jobs"] == status["jobs"]
+    assert status["jobs"] == {"Running": ["102", "103"], "Oscillating": ["102"], "Complete": ["101"], "Failed": []}
+    assert failed["error"].startswith("RuntimeError")
+    assert failed["jobs"]["Running"] == ["104"] and failed["jobs"]["Complete"] == ["101", "102", "103"]
+
+
+def test_monitor_command_unix_socket(jobs, tmp_path):
+    socket_path = str(tmp_path / "monitor.sock")
+    command = [sys.executable, "-m", "dft_toolbox", "monitor", "user", str(tmp_path), "--socket", socket_path, "--interval", "0.1"]
+    process = subprocess.Popen(command)
+
+    async def query():
+        for _ in range(200):
+            try:
+                line, status = await http_get("/", socket_path=socket_path)
+            except (FileNotFoundError, ConnectionRefusedError):
+                await asyncio.sleep(0.05)
+                continue
+            if status["updated"] is not None:
+                return status
+            await asyncio.sleep(0.05)
+
+    try:
+        status = asyncio.run(query())
+    finally:
+        process.terminate()
+        process.wait(10)
+    assert status["jobs"]["Running"] == ["102", "103"]
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+
+"""Tests for `dft_toolbox.policy` module."""
+
+import json
+import os
+import numpy as np
+import pytest
+
+import dft_toolbox as dft
+
+data_dir = os.path.join(os.path.dirname(__file__), "..", "notebooks", "Ex01_supporting_files")
+
+
+def test_update_route_options():
+    assert dft.update_route_options("opt freq b3lyp/6-31g(d)", {"maxstep": 10}) == "opt=(maxstep=10) freq b3lyp/6-31g(d)"
+    route = "opt=(calcfc,MaxStep=30) scrf=(iefpcm,solvent=water)"
+    assert dft.update_route_options(route, {"maxstep": 5, "gdiis": None}) == "opt=(calcfc,maxstep=5,gdiis) scrf=(iefpcm,solvent=water)"
+    assert dft.update_route_options("Opt(tight) freq", {"maxstep": 5}) == "Opt=(tight,maxstep=5) freq"
+    with pytest.raises(ValueError):
+        dft.update_route_options("freq", {"maxstep": 5})
+
+
+def test_resubmit_oscillating_job(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    dft.create_g16_input("sim1", "opt=calcfc freq b3lyp/6-31g(d)", "b3lyp/6-31g(d)", os.path.join(data_dir, "sodiumIonCluster_1.xyz"), charge=1)
+    with open(os.path.join(data_dir, "sim001_gas.log"), "rb") as f:
+        data = f.read()
+    # An optimization still running, with the last geometry being written
+    partial = data[: data.find(b"Optimization completed")]
+    partial = partial[: partial.rfind(b"Input orientation") + 500] + b"\n"
+    oscillation = b"    -- Step size scaled by   0.000\n" * 5
+
+    backend = dft.LocalBackend(first_id=100)
+    backend.set_state("99", "RUNNING")
+    policy = dft.ResubmitPolicy(backend, {"nodes": 1, "partition": "batch", "mem": 16}, max_retries=1, state_file="policy.json")
+    policy.add_job("sim1", "99")
+    (tmp_path / "sim1_gas.log").write_bytes(partial)
+    assert policy.check() == []
+
+    with open("sim1_gas.log", "ab") as f:
+        f.write(oscillation)
+    actions = policy.check()
+    assert [action["action"] for action in actions] == ["cancel", "resubmit"]
+    assert backend.cancelled == ["99"] and backend.submitted[0][:2] == ("100", "sim1.slurm")
+    assert os.path.isfile("sim1_gas_retry1.log") and not os.path.isfile("sim1_gas.log")
+
+    with open("sim1_gas.com") as f:
+        lines = f.readlines()
+    assert lines[1] == "# opt=(calcfc,maxstep=10) freq b3lyp/6-31g(d)\n" and lines[5] == "1 1\n"
+    geometry = list(dft.iter_geometries("sim1_gas_retry1.log"))[-1][2]
+    assert lines[22] == "\n"
+    assert np.allclose(np.array([line.split()[1:] for line in lines[6:22]], dtype=float), geometry)
+
+    # The retry limit is reached, the job is cancelled and abandoned
+    backend.set_state("100", "RUNNING")
+    (tmp_path / "sim1_gas.log").write_bytes(partial + oscillation)
+    policy = dft.ResubmitPolicy(backend, {"nodes": 1, "partition": "batch", "mem": 16}, max_retries=1, state_file="policy.json")
+    assert [action["action"] for action in policy.check()] == ["cancel", "abandon"]
+    assert policy.jobs["sim1"]["status"] == "abandoned" and backend.cancelled == ["99", "100"]
+    with open("resubmit_audit.jsonl") as f:
+        audit = [json.loads(line) for line in f]
+    assert [record["action"] for record in audit] == ["cancel", "resubmit", "cancel", "abandon"]
+    assert audit[1]["previous_job_id"] == "99" and audit[1]["job_id"] == "100"
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+
+"""Tests for `dft_toolbox.ragged` module."""
+
+import os
+import numpy as np
+import pytest
+
+import dft_toolbox as dft
+
+data_dir = os.path.join(os.path.dirname(__file__), "..", "notebooks", "Ex01_supporting_files")
+
+
+def test_ragged_array(tmp_path):
+    sequences = [[1.0, 2.0, 3.0], [], [4.0], [], [5.0, -6.0]]
+    ragged = dft.RaggedArray.from_sequences(sequences)
+    assert len(ragged) == 5
+    assert list(ragged.offsets) == [0, 3, 3, 4, 4, 6]
+    assert np.shares_memory(ragged[0], ragged.data)
+    assert list(ragged[-1]) == [5.0, -6.0]
+    assert [list(values) for values in ragged] == sequences
+    assert np.allclose(ragged.sum(), [6, 0, 4, 0, -1])
+    assert np.allclose(ragged.max(), [3, np.nan, 4, np.nan, 5], equal_nan=True)
+    assert np.allclose(ragged.mean(), [2, np.nan, 4, np.nan, -0.5], equal_nan=True)
+    assert np.allclose(ragged.padded(0), [[1, 2, 3], [0, 0, 0], [4, 0, 0], [0, 0, 0], [5, -6, 0]])
+
+    view = ragged[2:]
+    assert np.shares_memory(view.data, ragged.data)
+    assert [list(values) for values in view] == sequences[2:]
+    assert [list(values) for values in ragged[[4, 0]]] == [sequences[4], sequences[0]]
+
+    ragged.save(str(tmp_path / "freq"))
+    loaded = dft.RaggedArray.load(str(tmp_path / "freq"))
+    assert isinstance(loaded.data, np.memmap)
+    assert np.array_equal(loaded.data, ragged.data) and np.array_equal(loaded.offsets, ragged.offsets)
+
+    coordinates = dft.RaggedArray.from_sequences([np.ones((2, 3)), np.zeros((0, 3))], value_shape=(3,))
+    assert coordinates.sum().shape == (2, 3)
+    with pytest.raises(ValueError):
+        dft.RaggedArray([1.0, 2.0], [0, 3])
+
+
+def test_extract_ragged():
+    paths = [os.path.join(data_dir, "sim00{}_gas.log".format(i)) for i in (1, 2)]
+    paths += [os.path.join(data_dir, "missing.log")]
+    arrays, errors = dft.extract_ragged(paths, fields=["frequencies", "coordinates", "atomic_numbers"], workers=1)
+    assert list(errors) == [2]
+    for i, path in enumerate(paths[:2]):
+        log = dft.GaussianLog(path)
+        assert np.array_equal(arrays["frequencies"][i], log.frequencies)
+        assert np.array_equal(arrays["coordinates"][i], log.coordinates)
+        assert len(arrays["atomic_numbers"][i]) == log.atom_count
+    assert arrays["atomic_numbers"].data.dtype == np.int64 and arrays["frequencies"].data.dtype == np.float64
+    assert arrays["atomic_numbers"].sum().dtype == np.int64
+    assert np.isnan(arrays["atomic_numbers"].padded()[2]).all()
+    assert arrays["frequencies"].lengths[2] == 0
+
+    # The packed frequencies are accepted by the thermochemistry
+    padded = dft.quasi_rrho_vibrations(arrays["frequencies"].padded(), 298.15)
+    packed = dft.quasi_rrho_vibrations(arrays["frequencies"], 298.15)
+    assert np.allclose(padded, packed)
+
+    # Coordinates are also read from .xyz files
+    arrays, errors = dft.extract_ragged([os.path.join(data_dir, "sodiumIonCluster_1.xyz")], fields=["coordinates"], workers=1)
+    assert not errors
+    assert np.array_equal(arrays["coordinates"][0], dft.extract_coordinates(os.path.join(data_dir, "sodiumIonCluster_1.xyz"))[1])
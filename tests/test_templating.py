@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+
+"""Tests for `dft_toolbox.templating` module."""
+
+import pytest
+
+import dft_toolbox as dft
+from dft_toolbox import templating
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(templating, "_registry", dict(templating._registry))
+    monkeypatch.setattr(templating, "_compiled", {})
+
+
+def test_template_render():
+    template = dft.Template("#SBATCH -p {{partition}}\n{{ nodes }} nodes, {{partition}}\n", name="test")
+    assert template.fields == {"partition", "nodes"}
+    assert template.render(partition="batch", nodes=2, unused=None) == "#SBATCH -p batch\n2 nodes, batch\n"
+    with pytest.raises(ValueError):
+        template.render(partition="batch")
+    # Shell variables are not placeholders
+    assert dft.Template("echo ${input} {x}").render() == "echo ${input} {x}"
+
+
+def test_register_template(registry, tmp_path):
+    assert dft.get_template("submission_script") is dft.get_template("submission_script")
+    assert "gaussian_environment" not in dft.get_template("submission_script").fields
+
+    # A cluster with its own environment settings, included in the shipped scripts
+    dft.register_template("gaussian_environment", text="module load g16\n")
+    dft.create_slurm_script(str(tmp_path / "job"), "sim1", 1, "batch", 16)
+    script = (tmp_path / "job.slurm").read_text()
+    assert "#SBATCH -p batch\n" in script and "\nmodule load g16\n\n#####\n" in script
+    dft.register_template("gaussian_environment", text="module load g16/{{version}}\n")
+    with pytest.raises(ValueError):
+        dft.create_slurm_script(str(tmp_path / "job"), "sim1", 1, "batch", 16)
+    (tmp_path / "cluster.slurm").write_text("#!/bin/sh\n#SBATCH -p {{partition}}\n{{> gaussian_environment}}g16 < {{input}}_gas.com\n")
+    dft.register_template("cluster", fname=str(tmp_path / "cluster.slurm"))
+    assert dft.render_template("cluster", partition="gpu", version="C.01", input="sim1") == "#!/bin/sh\n#SBATCH -p gpu\nmodule load g16/C.01\ng16 < sim1_gas.com\n"
+
+    dft.register_template("loop", text="{{> loop}}")
+    with pytest.raises(ValueError):
+        dft.get_template("loop")
+    with pytest.raises(ValueError):
+        dft.get_template("missing")
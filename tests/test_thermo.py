@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+
+"""Tests for `dft_toolbox.thermo` module."""
+
+import os
+import numpy as np
+import pytest
+
+import dft_toolbox as dft
+
+data_dir = os.path.join(os.path.dirname(__file__), "..", "notebooks", "Ex01_supporting_files")
+
+
+def test_rrho_matches_gaussian():
+    log = dft.GaussianLog(os.path.join(data_dir, "sim001_gas.log"))
+    masses = [dft.atomic_masses[atom] for atom in log.atoms]
+    # Gaussian prints its thermochemistry at 1 atm with unscaled frequencies
+    thermo = dft.rrho_thermo([log.frequencies], [masses], [log.coordinates], 1, 298.15, pressure=101325.0)
+    assert thermo.shape == (1, 1, 4)
+    assert np.isclose(thermo[0, 0, 2] * 1000, 141.169, atol=2e-3)
+    zpe = dft.zero_point_energy([log.frequencies])[0]
+    assert np.isclose((zpe + thermo[0, 0, 1]) / dft.hartree_to_kcal, 0.138125, atol=2e-6)
+
+
+def test_rrho_linear_and_monatomic():
+    # Sackur-Tetrode entropy of Na+ as fitted by Arkane in refChem.inp
+    table = dft.NasaThermoTable.from_chemkin(os.path.join(data_dir, "refChem.inp"))
+    arkane = table.evaluate([298.15, 500.0], species=["Na_ion"])
+    thermo = dft.rrho_thermo([[]], [[dft.atomic_masses["Na"]]], [[[0.0, 0.0, 0.0]]], 1, [298.15, 500.0], E0=arkane[0, 0, 1] - 2.5 * dft.R * 298.15)
+    assert np.allclose(thermo[..., :3], arkane[..., :3], atol=5e-5)
+
+    # CO2 is detected as a linear rotor
+    masses = [[dft.atomic_masses[atom] for atom in "OCO"]]
+    coordinates = [[[0, 0, -1.16], [0, 0, 0], [0, 0, 1.16]]]
+    thermo = dft.rrho_thermo([[667.0, 667.0, 1333.0, 2349.0]], masses, coordinates, 2, 298.15)
+    assert np.isclose(thermo[0, 0, 2] * 1000, 51.07, atol=0.1)
+    assert np.isclose(thermo[0, 0, 0] * 1000, 8.9, atol=0.1)
+
+
+def test_rrho_thermo_from_logs_against_arkane():
+    specs = [{"name": "sim00{}".format(i), "freq_log": os.path.join(data_dir, "sim00{}_gas.log".format(i))} for i in (1, 2, 3)]
+    temperatures = np.array([298.15, 500.0, 1000.0])
+    names, thermo = dft.rrho_thermo_from_logs(specs, temperatures, method="B3LYP", basis="aug-cc-pVDZ", workers=1)
+    assert names == ["sim001", "sim002", "sim003"] and thermo.shape == (3, 3, 4)
+    differences = dft.compare_thermo_arkane(names, thermo, os.path.join(data_dir, "clustersChem.inp"), temperatures)
+    # Within the error of the NASA polynomial fits
+    assert np.all(np.abs(differences[..., 0]) < 2e-3)
+    assert np.all(np.abs(differences[..., 1]) < 0.3)
+    assert np.all(np.abs(differences[..., 2]) < 1e-3)
+
+    with pytest.raises(ValueError):
+        dft.rrho_thermo_from_logs(specs, temperatures, method="B3LYP", basis="missing", workers=1)
+
+
+def test_quasi_rrho_vibrations():
+    frequencies = dft.GaussianLog(os.path.join(data_dir, "sim001_gas.log")).frequencies
+    temperatures = [298.15, 400.0]
+    H, S = dft.quasi_rrho_vibrations([frequencies], temperatures, method="harmonic")
+    # Gaussian's vibrational entropy, and thermal energy including the zero-point energy
+    assert np.isclose(S[0, 0] * 1000, 71.965, atol=1e-3) and np.isclose(H[0, 0], 84.305, atol=1e-3)
+
+    # Padded, packed and list inputs, with an imaginary mode and a cluster without modes
+    ragged = [frequencies, [-35.0] + frequencies[:10], []]
+    padded = np.full((3, len(frequencies)), np.nan)
+    padded[0] = frequencies
+    padded[1, :11] = ragged[1]
+    packed = np.concatenate([np.asarray(values, dtype=float) for values in ragged])
+    offsets = [0, len(frequencies), len(frequencies) + 11, len(frequencies) + 11]
+    results = [dft.quasi_rrho_vibrations(values, temperatures, offsets=offsets if values is packed else None) for values in (ragged, padded, packed)]
+    for H, S in results[1:]:
+        assert np.allclose(H, results[0][0]) and np.allclose(S, results[0][1])
+    H, S = results[0]
+    assert H.shape == (3, 2) and np.all(H[2] == 0) and np.all(S[2] == 0)
+    H_10, S_10 = dft.quasi_rrho_vibrations([frequencies[:10]], temperatures)
+    assert np.allclose(H[1], H_10[0]) and np.allclose(S[1], S_10[0])
+
+    # Stiff modes are harmonic, soft modes free rotors, and raised to the cutoff with the "truhlar" method
+    H, S = dft.quasi_rrho_vibrations([[3000.0], [1.0]], 298.15)
+    H_harmonic, S_harmonic = dft.quasi_rrho_vibrations([[3000.0], [1.0], [100.0]], 298.15, method="harmonic")
+    assert np.isclose(S[0, 0], S_harmonic[0, 0]) and np.isclose(H[0, 0], H_harmonic[0, 0])
+    moment = 6.62607015e-34 / (8 * np.pi ** 2 * 29979245800.0)
+    moment = moment * 1e-44 / (moment + 1e-44)
+    S_rotor = dft.R * (0.5 + np.log(np.sqrt(8 * np.pi ** 3 * moment * 1.380649e-23 * 298.15) / 6.62607015e-34))
+    assert np.isclose(S[1, 0], S_rotor, rtol=1e-6) and np.isclose(H[1, 0], 0.5 * dft.R * 298.15, rtol=1e-6)
+    H, S = dft.quasi_rrho_vibrations([[1.0]], 298.15, method="truhlar")
+    assert np.isclose(S[0, 0], S_harmonic[2, 0]) and np.isclose(H[0, 0], H_harmonic[2, 0])
+
+    with pytest.raises(ValueError):
+        dft.quasi_rrho_vibrations(packed, temperatures, offsets=[0, 5])